@@ -0,0 +1,151 @@
+"""Benchmark scan_addons() syscalls and wall time on a synthetic tree.
+
+Generates a tree of LIBRARIES x SCRIPTS (default 1000 x 20) in a temporary
+directory and measures cold scans (no index) and warm scans (index fresh).
+
+Filesystem calls are counted with ``strace -c`` when it is installed, and
+otherwise by counting calls to the os/io functions the scanner goes
+through (stat, lstat, scandir, listdir, open, mkdir).
+
+Usage:
+    python benchmarks/bench_scan.py [--libraries 1000] [--scripts 20] [--runs 5]
+"""
+
+import argparse
+import builtins
+import io
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic import make_addons_tree  # noqa: E402
+
+from corun import index, scanner  # noqa: E402
+
+# Functions counted when strace is not available
+COUNTED_CALLS = ("stat", "lstat", "scandir", "listdir", "open", "mkdir")
+
+
+@contextmanager
+def count_fs_calls():
+    """Count calls to os/io filesystem functions while active."""
+    counts: Counter = Counter()
+    originals = {}
+
+    def wrap(module, name, key):
+        original = getattr(module, name)
+        originals[(module, name)] = original
+
+        def counted(*args, **kwargs):
+            counts[key] += 1
+            return original(*args, **kwargs)
+
+        setattr(module, name, counted)
+
+    for name in ("stat", "lstat", "scandir", "listdir", "mkdir"):
+        wrap(os, name, name)
+    wrap(builtins, "open", "open")
+    wrap(io, "open", "open")
+
+    try:
+        yield counts
+    finally:
+        for (module, name), original in originals.items():
+            setattr(module, name, original)
+
+
+def strace_counts(home: Path, warm: bool) -> Counter:
+    """Count syscalls of one scan in a subprocess with strace -c."""
+    if not warm:
+        index.invalidate_index()
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from corun import scanner; scanner.scan_addons()"
+    )
+    with tempfile.NamedTemporaryFile("r") as out:
+        subprocess.run(
+            ["strace", "-f", "-c", "-o", out.name, sys.executable, "-c", code, str(SRC_DIR)],
+            env=dict(os.environ, HOME=str(home)),
+            check=True,
+        )
+        counts: Counter = Counter()
+        for line in out.read().splitlines():
+            parts = line.split()
+            # % time, seconds, usecs/call, calls, [errors], syscall
+            if len(parts) >= 5 and parts[3].isdigit():
+                counts[parts[-1]] = int(parts[3])
+        return counts
+
+
+def time_scans(runs: int, warm: bool) -> list[float]:
+    """Time scan_addons() runs in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        if not warm:
+            index.invalidate_index()
+        start = time.perf_counter()
+        scanner.scan_addons()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--libraries", type=int, default=1000)
+    parser.add_argument("--scripts", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        addons_dir = home / ".corun" / "addons"
+        make_addons_tree(addons_dir, options.libraries, options.scripts)
+        scanner.ADDONS_DIR = addons_dir
+        index.INDEX_FILE = home / ".corun" / "index.json"
+
+        print(
+            f"Tree: {options.libraries} libraries x {options.scripts} scripts "
+            f"({options.libraries * options.scripts} commands)\n"
+        )
+
+        for label, warm in (("cold", False), ("warm", True)):
+            # Make sure the index exists before warm runs
+            scanner.scan_addons()
+            samples = time_scans(options.runs, warm)
+
+            if shutil.which("strace"):
+                counts = strace_counts(home, warm)
+                source = "strace"
+            else:
+                if not warm:
+                    index.invalidate_index()
+                with count_fs_calls() as counts:
+                    scanner.scan_addons()
+                source = "os/io calls"
+
+            print(
+                f"{label}: min {min(samples):8.1f} ms  "
+                f"median {statistics.median(samples):8.1f} ms"
+            )
+            calls = ", ".join(
+                f"{name}={count}" for name, count in sorted(counts.items())
+            )
+            print(f"      {source}: total={sum(counts.values())}  {calls}\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
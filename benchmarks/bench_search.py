@@ -0,0 +1,101 @@
+"""Benchmark `corun search` on a synthetic tree.
+
+Generates a tree of LIBRARIES x SCRIPTS (default 500 x 20 = 10k commands)
+in a temporary directory and measures:
+
+- build: first search, indexing every command
+- warm: search with an unchanged tree (registry scan + index check + query)
+- query: the index lookup alone
+- incremental: search after one library gained a script
+
+Usage:
+    python benchmarks/bench_search.py [--libraries 500] [--scripts 20] [--runs 5]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic import make_addons_tree, write_script  # noqa: E402
+
+from corun import index, registry, scanner, search  # noqa: E402
+
+# Queries: a command name, words with a short one, a word in every row,
+# and a typo (fuzzy)
+QUERIES = ("cmd007", "library number 42", "synthetic", "synthetc")
+
+
+def time_search(query: str) -> float:
+    """Time one search() with a fresh registry, in milliseconds."""
+    registry._registry = None
+    start = time.perf_counter()
+    search.search(query)
+    return (time.perf_counter() - start) * 1000
+
+
+def time_query(query: str, runs: int) -> list[float]:
+    """Time the index lookup alone, in milliseconds."""
+    conn, has_fts = search.connect(search.get_search_file())
+    words = query.lower().split()
+    samples = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            search.query_index(conn, words, has_fts, 20)
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        conn.close()
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--libraries", type=int, default=500)
+    parser.add_argument("--scripts", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        addons_dir = home / ".corun" / "addons"
+        make_addons_tree(addons_dir, options.libraries, options.scripts)
+        scanner.ADDONS_DIR = addons_dir
+        index.INDEX_FILE = home / ".corun" / "index.json"
+        search.SEARCH_FILE = home / ".corun" / "search.db"
+
+        print(
+            f"Tree: {options.libraries} libraries x {options.scripts} scripts "
+            f"({options.libraries * options.scripts} commands)\n"
+        )
+
+        # Warm the scan index so "build" measures the search index only
+        scanner.scan_addons()
+        print(f"build:       {time_search(QUERIES[0]):8.1f} ms")
+
+        for query in QUERIES:
+            warm = [time_search(query) for _ in range(options.runs)]
+            fts = time_query(query, options.runs)
+            print(
+                f"{query!r:22} warm median {statistics.median(warm):7.1f} ms  "
+                f"query median {statistics.median(fts):6.2f} ms"
+            )
+
+        samples = []
+        for i in range(options.runs):
+            write_script(addons_dir / "lib00000" / f"new{i:03d}.sh")
+            samples.append(time_search(QUERIES[0]))
+        print(f"\nincremental: median {statistics.median(samples):7.1f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Import-time budget check for the corun run path.
+
+Runs ``python -X importtime -m corun <script>`` against a throwaway addons
+tree and fails if the run path imports modules it should not need (rich,
+pydantic, the library sub-app) or if its cumulative import time goes over
+a multiple of the baseline: ``import typer`` timed the same way, on the
+same machine and interpreter. An absolute budget depends too much on the
+machine to be useful.
+
+tests/test_importtime.py runs the same checks (modules and the ratio to
+``import typer``) with the test suite.
+
+Usage:
+    python benchmarks/check_importtime.py [--max-ratio 1.3] [--runs 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Modules that must not be imported when running a script
+FORBIDDEN_MODULES = ("rich", "pydantic", "corun.library.commands", "corun.metadata")
+
+# Baseline: the dependency the run path cannot avoid
+BASELINE = "import typer"
+
+
+def make_addons_tree(home: Path) -> None:
+    """Create an addons tree with one library and one standalone script."""
+    addons_dir = home / ".corun" / "addons"
+    library_dir = addons_dir / "lib"
+    library_dir.mkdir(parents=True)
+
+    (library_dir / "metadata.json").write_text(
+        '{"name": "Lib", "version": "1.0.0", "description": "Test",'
+        ' "library_id": "lib"}'
+    )
+    for script in (library_dir / "cmd.sh", addons_dir / "hello.sh"):
+        script.write_text("#!/bin/sh\nexit 0\n")
+        script.chmod(0o755)
+
+
+def parse_importtime(stderr: str) -> tuple[int, set[str]]:
+    """
+    Parse -X importtime output.
+
+    Returns:
+        Tuple of (total microseconds of top-level imports, imported modules)
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        modules.add(name.strip())
+        # Only top-level imports: nested ones are part of their parent
+        if not name.startswith("  "):
+            total_us += int(parts[1])
+    return total_us, modules
+
+
+def measure(home: Path, argv: list[str]) -> tuple[int, set[str]]:
+    """Run corun once with -X importtime and parse the result."""
+    return measure_python(home, ["-m", "corun", *argv])
+
+
+def measure_python(home: Path, argv: list[str]) -> tuple[int, set[str]]:
+    """Run the interpreter once with -X importtime and parse the result."""
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"python {' '.join(argv)} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=1.3,
+        help=f"Largest import time allowed, as a multiple of {BASELINE!r}",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per target")
+    options = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        make_addons_tree(home)
+        # Warm the index so we measure the steady-state run path
+        measure(home, ["hello"])
+
+        baseline_ms = min(
+            measure_python(home, ["-c", BASELINE])[0] / 1000
+            for _ in range(options.runs)
+        )
+        budget_ms = baseline_ms * options.max_ratio
+        print(f"base  {BASELINE:16}  {baseline_ms:7.1f} ms")
+
+        for argv in (["hello"], ["lib", "cmd"]):
+            samples = []
+            for _ in range(options.runs):
+                total_us, modules = measure(home, argv)
+                samples.append(total_us / 1000)
+
+            best_ms = min(samples)
+            forbidden = sorted(
+                m
+                for m in modules
+                if any(m == f or m.startswith(f + ".") for f in FORBIDDEN_MODULES)
+            )
+            status = "ok"
+            if forbidden or best_ms > budget_ms:
+                status = "FAIL"
+                failed = True
+
+            print(
+                f"{status:4}  corun {' '.join(argv):10}  "
+                f"{best_ms:7.1f} ms (x{best_ms / baseline_ms:.2f}, "
+                f"budget x{options.max_ratio:g})"
+            )
+            if forbidden:
+                print(f"      unexpected imports: {', '.join(forbidden)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
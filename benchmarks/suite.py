@@ -0,0 +1,236 @@
+"""Startup and scan benchmark suite.
+
+For each tree size, generates a synthetic addons tree (optionally with
+libraries lacking metadata.json, broken JSON and naming conflicts) and
+measures:
+
+- scan_addons(), cold (no index) and warm
+- register_dynamic_commands() building the full command tree
+- ``corun --help`` cold start
+- time-to-exec of a trivial library script (spawn, exec handoff, and via
+  the ``corun serve`` daemon)
+- peak RSS of the corun process for each of the above
+
+Results are printed as a table and can be written as JSON to track
+regressions between releases.
+
+Usage:
+    python benchmarks/suite.py --sizes 10,100,1000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from synthetic import make_addons_tree  # noqa: E402
+
+import corun  # noqa: E402
+
+# In-process probes, run in a fresh interpreter; each prints milliseconds
+SCAN_PROBE = """
+import time
+from corun import index, scanner
+if {cold}:
+    index.invalidate_index()
+start = time.perf_counter()
+scanner.scan_addons()
+print((time.perf_counter() - start) * 1000)
+"""
+
+REGISTER_PROBE = """
+import time
+from corun import main
+from corun.registry import get_registry
+get_registry()
+start = time.perf_counter()
+main.register_dynamic_commands()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run_measured(argv: list[str], env: dict) -> tuple[float, int, str]:
+    """
+    Run a command and measure it.
+
+    Returns:
+        Tuple of (wall time in ms, peak RSS in KiB, stdout)
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        argv,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    # os.wait4 gives the rusage of this child alone
+    stdout = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = (time.perf_counter() - start) * 1000
+    process.stdout.close()
+    return elapsed, rusage.ru_maxrss, stdout.decode()
+
+
+def measure(argv: list[str], env: dict, runs: int, probe: bool = False) -> dict:
+    """
+    Run a command several times.
+
+    Args:
+        argv: Command line
+        env: Environment
+        runs: Number of runs
+        probe: Use the time printed by the command instead of wall time
+
+    Returns:
+        Dict with min/median milliseconds and peak RSS (KiB)
+    """
+    samples = []
+    peak_rss = 0
+    for _ in range(runs):
+        elapsed, rss, stdout = run_measured(argv, env)
+        samples.append(float(stdout.strip().splitlines()[-1]) if probe else elapsed)
+        peak_rss = max(peak_rss, rss)
+    return {
+        "min_ms": round(min(samples), 2),
+        "median_ms": round(statistics.median(samples), 2),
+        "peak_rss_kib": peak_rss,
+    }
+
+
+def bench_size(size: int, options: argparse.Namespace) -> dict:
+    """Run every benchmark on a tree with `size` libraries."""
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        make_addons_tree(
+            home / ".corun" / "addons",
+            libraries=size,
+            scripts_per_library=options.scripts,
+            metadata_ratio=options.metadata_ratio,
+            broken=round(size * options.broken_ratio),
+            conflicts=round(size * options.conflict_ratio),
+        )
+        env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+        env.pop("CORUN_EXEC", None)
+        python = [sys.executable]
+        runs = options.runs
+
+        # Last library never has broken metadata or a conflict
+        run_target = [f"lib{size - 1:05d}", "cmd000"]
+
+        results = {
+            "libraries": size,
+            "scripts_per_library": options.scripts,
+            "scan_cold": measure(
+                python + ["-c", SCAN_PROBE.format(cold=True)], env, runs, probe=True
+            ),
+            "scan_warm": measure(
+                python + ["-c", SCAN_PROBE.format(cold=False)], env, runs, probe=True
+            ),
+            "register_full_tree": measure(
+                python + ["-c", REGISTER_PROBE], env, runs, probe=True
+            ),
+            "help_cold_start": measure(python + ["-m", "corun", "--help"], env, runs),
+            "exec_trivial_spawn": measure(
+                python + ["-m", "corun", *run_target], env, runs
+            ),
+            "exec_trivial_handoff": measure(
+                python + ["-m", "corun", *run_target], dict(env, CORUN_EXEC="1"), runs
+            ),
+        }
+
+        daemon_env = dict(env, CORUN_SOCKET=str(home / "bench.sock"))
+        daemon = subprocess.Popen(
+            python + ["-m", "corun", "serve", "--no-watch"],
+            env=daemon_env,
+            stdin=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not (home / "bench.sock").exists():
+                if time.monotonic() > deadline or daemon.poll() is not None:
+                    raise RuntimeError("corun serve did not start")
+                time.sleep(0.05)
+            results["exec_trivial_daemon"] = measure(
+                python + ["-m", "corun", *run_target], daemon_env, runs
+            )
+        finally:
+            daemon.terminate()
+            daemon.wait()
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    """Print results as a table (median ms / peak RSS MiB)."""
+    keys = [key for key in results[0] if isinstance(results[0][key], dict)]
+    print(f"{'libraries':>10}  " + "  ".join(f"{key:>22}" for key in keys))
+    for result in results:
+        cells = [
+            f"{result[key]['median_ms']:9.1f} ms {result[key]['peak_rss_kib'] / 1024:6.1f} MiB"
+            for key in keys
+        ]
+        print(f"{result['libraries']:>10}  " + "  ".join(f"{cell:>22}" for cell in cells))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", default="10,100,1000", help="Comma-separated library counts"
+    )
+    parser.add_argument("--scripts", type=int, default=20, help="Scripts per library")
+    parser.add_argument(
+        "--metadata-ratio", type=float, default=0.9,
+        help="Fraction of libraries with metadata.json",
+    )
+    parser.add_argument(
+        "--broken-ratio", type=float, default=0.01,
+        help="Fraction of libraries with broken metadata.json",
+    )
+    parser.add_argument(
+        "--conflict-ratio", type=float, default=0.01,
+        help="Fraction of libraries shadowed by a standalone script",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    options = parser.parse_args()
+
+    sizes = [int(size) for size in options.sizes.split(",") if size]
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size} libraries...", file=sys.stderr)
+        results.append(bench_size(size, options))
+
+    print_table(results)
+
+    if options.output:
+        report = {
+            "corun_version": corun.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "options": {
+                key: value for key, value in vars(options).items() if key != "output"
+            },
+            "results": results,
+        }
+        options.output.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {options.output}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Generate synthetic addons trees for benchmarks."""
+
+import json
+from pathlib import Path
+
+SCRIPT_BODY = "#!/bin/sh\n# Synthetic command {name}\nexit 0\n"
+
+
+def write_script(path: Path) -> None:
+    """Write an executable no-op script."""
+    path.write_text(SCRIPT_BODY.format(name=path.stem))
+    path.chmod(0o755)
+
+
+def make_addons_tree(
+    addons_dir: Path,
+    libraries: int = 1000,
+    scripts_per_library: int = 20,
+    standalone: int = 20,
+    metadata_ratio: float = 1.0,
+    broken: int = 0,
+    conflicts: int = 0,
+) -> Path:
+    """
+    Create an addons tree.
+
+    Args:
+        addons_dir: Directory to create
+        libraries: Number of library directories
+        scripts_per_library: Number of .sh files per library
+        standalone: Number of standalone scripts
+        metadata_ratio: Fraction of libraries with a metadata.json
+        broken: Number of libraries whose metadata.json is invalid JSON
+        conflicts: Number of standalone scripts named like a library ID
+
+    Returns:
+        The addons directory
+    """
+    addons_dir.mkdir(parents=True, exist_ok=True)
+    with_metadata = round(libraries * metadata_ratio)
+
+    for i in range(libraries):
+        library_id = f"lib{i:05d}"
+        library_dir = addons_dir / library_id
+        library_dir.mkdir()
+
+        metadata_file = library_dir / "metadata.json"
+        if i < broken:
+            metadata_file.write_text('{"name": "Broken", "version": ')
+        elif i < with_metadata:
+            metadata = {
+                "name": f"Library {i}",
+                "version": "1.0.0",
+                "description": f"Synthetic library number {i}",
+                "library_id": library_id,
+            }
+            metadata_file.write_text(json.dumps(metadata))
+
+        for j in range(scripts_per_library):
+            write_script(library_dir / f"cmd{j:03d}.sh")
+
+    for k in range(standalone):
+        write_script(addons_dir / f"tool{k:03d}.sh")
+
+    for i in range(min(conflicts, libraries)):
+        write_script(addons_dir / f"lib{i:05d}.sh")
+
+    return addons_dir
@@ -0,0 +1,41 @@
+"""Console entry point for Corun CLI."""
+
+import os
+import sys
+
+from . import trace
+from .builtin_commands import BUILTIN_COMMANDS
+
+
+def main():
+    """Run corun, answering shell completion from the index when possible."""
+    if os.environ.get("_CORUN_COMPLETE"):
+        from .completion import fast_complete
+
+        if fast_complete():
+            return
+
+    trace.configure(sys.argv)
+
+    # Plain script runs go to the daemon if one is running. Built-ins are
+    # never served by it, and traced runs stay here so phases are recorded.
+    if (
+        len(sys.argv) > 1
+        and not sys.argv[1].startswith("-")
+        and sys.argv[1] not in BUILTIN_COMMANDS
+        and not trace.is_enabled()
+    ):
+        from .client import run_via_daemon
+
+        exit_code = run_via_daemon(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    with trace.span("import"):
+        from .main import cli
+
+    cli()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Packed library archives (``<library>.corunlib``).
+
+A packed library is a single file holding ``metadata.json`` and the
+library's scripts, so installing or scanning it touches one inode instead
+of one per script. Layout::
+
+    b"CORUNLB1"                  magic
+    uint32 (little endian)       header length
+    header (JSON)                {"metadata": {...} | null,
+                                  "scripts": {"name": [offset, size]}}
+    data                         script contents, offsets relative to here
+
+Archives live next to library directories in the addons directory. The
+scanner reads the header through one ``mmap``; a script inside an archive
+is addressed as ``<archive>/<name>.sh``. To run it, the script is copied
+from the mapping into a sealed ``memfd_create`` file and executed through
+its ``/proc/<pid>/fd`` path, so nothing is unpacked to disk (Linux only).
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+ARCHIVE_SUFFIX = ".corunlib"
+MAGIC = b"CORUNLB1"
+HEADER_SIZE = struct.Struct("<I")
+
+# memfd_create() flags (linux/memfd.h); MFD_EXEC needs Linux 6.3+
+MFD_ALLOW_SEALING = 0x0002
+MFD_EXEC = 0x0010
+
+# memfds of scripts already prepared in this process
+_memfds: dict[Path, int] = {}
+
+
+class ArchiveError(Exception):
+    """Invalid or unreadable archive."""
+
+
+class Archive:
+    """A packed library opened through a read-only memory map."""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Archive file
+
+        Raises:
+            ArchiveError: If the file cannot be read or is not an archive
+        """
+        import mmap
+
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise ArchiveError(f"Cannot read {path}: {e}")
+
+        prefix = len(MAGIC) + HEADER_SIZE.size
+        if len(self.map) < prefix or self.map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ArchiveError(f"Not a corun archive: {path}")
+        (header_size,) = HEADER_SIZE.unpack_from(self.map, len(MAGIC))
+        self.data_offset = prefix + header_size
+        try:
+            header = json.loads(bytes(self.map[prefix : self.data_offset]))
+            self.metadata: Optional[dict] = header["metadata"]
+            self.scripts: dict[str, list[int]] = header["scripts"]
+        except (ValueError, KeyError, TypeError) as e:
+            self.close()
+            raise ArchiveError(f"Invalid archive header in {path}: {e}")
+
+    def read(self, name: str) -> bytes:
+        """
+        Get a script's content.
+
+        Raises:
+            KeyError: If the archive has no such script
+            ArchiveError: If the script's entry is invalid or truncated
+        """
+        try:
+            offset, size = self.scripts[name]
+            start = self.data_offset + offset
+            end = start + size
+        except (ValueError, TypeError) as e:
+            raise ArchiveError(f"Invalid entry for '{name}' in {self.path}: {e}")
+        if not self.data_offset <= start <= end <= len(self.map):
+            raise ArchiveError(f"Truncated archive: {self.path}")
+        return self.map[start:end]
+
+    def close(self) -> None:
+        """Unmap the archive."""
+        self.map.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def is_archive(path: Path) -> bool:
+    """Check whether a library path is a packed archive (by name only)."""
+    return path.name.endswith(ARCHIVE_SUFFIX)
+
+
+def is_packed(script_path: Path) -> bool:
+    """Check whether a script path points inside an archive (no stat)."""
+    return script_path.parent.name.endswith(ARCHIVE_SUFFIX)
+
+
+def read_script(script_path: Path) -> bytes:
+    """
+    Read a script stored in an archive.
+
+    Raises:
+        ArchiveError: If the archive cannot be read or is corrupt
+        KeyError: If the script is not in the archive
+    """
+    with Archive(script_path.parent) as archive:
+        return archive.read(script_path.stem)
+
+
+def pack_library(source: Path, output: Path, metadata: Optional[dict]) -> list[str]:
+    """
+    Write a library directory's scripts and metadata into an archive.
+
+    Only ``*.sh`` files at the top level are packed.
+
+    Args:
+        source: Library directory
+        output: Archive file to write (replaced atomically)
+        metadata: Parsed metadata.json, or None
+
+    Returns:
+        Names of the packed scripts
+    """
+    names = sorted(
+        entry.name[:-3]
+        for entry in os.scandir(source)
+        if entry.name.endswith(".sh") and entry.is_file()
+    )
+    scripts = {}
+    contents = []
+    offset = 0
+    for name in names:
+        content = (source / f"{name}.sh").read_bytes()
+        scripts[name] = [offset, len(content)]
+        contents.append(content)
+        offset += len(content)
+
+    header = json.dumps(
+        {"metadata": metadata, "scripts": scripts}, separators=(",", ":")
+    ).encode("utf-8")
+
+    temp = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp, "wb") as f:
+            f.write(MAGIC + HEADER_SIZE.pack(len(header)) + header)
+            for content in contents:
+                f.write(content)
+        os.replace(temp, output)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return names
+
+
+def create_memfd(name: str, content: bytes) -> int:
+    """
+    Put content into a sealed, executable memfd.
+
+    The descriptor is inheritable, so a process that execs into the script
+    (handoff) still has it open when the interpreter opens the path.
+
+    Raises:
+        OSError: If memfd_create is unavailable
+    """
+    if not hasattr(os, "memfd_create"):
+        raise OSError("Packed libraries need memfd_create (Linux)")
+    try:
+        fd = os.memfd_create(name, MFD_ALLOW_SEALING | MFD_EXEC)
+    except OSError:
+        # Kernel older than 6.3: memfds are executable by default
+        fd = os.memfd_create(name, MFD_ALLOW_SEALING)
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view) :]
+        import fcntl
+
+        if hasattr(fcntl, "F_ADD_SEALS"):
+            fcntl.fcntl(
+                fd,
+                fcntl.F_ADD_SEALS,
+                fcntl.F_SEAL_SEAL | fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW
+                | fcntl.F_SEAL_WRITE,
+            )
+    except BaseException:
+        os.close(fd)
+        raise
+    os.set_inheritable(fd, True)
+    return fd
+
+
+def exec_path(script_path: Path) -> str:
+    """
+    Get a path the kernel can exec for a script stored in an archive.
+
+    The memfd stays open for the life of this process; children started
+    by it open the script through the parent's ``/proc/<pid>/fd`` entry.
+
+    Raises:
+        OSError: If the script cannot be read from the archive or prepared
+    """
+    fd = _memfds.get(script_path)
+    if fd is None:
+        try:
+            content = read_script(script_path)
+        except (ArchiveError, KeyError) as e:
+            raise OSError(f"Cannot read {script_path}: {e}")
+        fd = create_memfd(script_path.name, content)
+        _memfds[script_path] = fd
+    return f"/proc/{os.getpid()}/fd/{fd}"
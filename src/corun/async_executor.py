@@ -0,0 +1,257 @@
+"""Execute many scripts concurrently with multiplexed output capture.
+
+Each job runs with its own stdout/stderr pipes. The asyncio event loop
+(a selector loop) reads all pipes without blocking, so a chatty job can
+never stall on a full pipe buffer while another job is being read. Output
+is line-buffered per job and handed to an output sink:
+
+- ``prefix``: lines are written as they arrive, tagged with the job label
+- ``buffer``: each job's output is written in one block when it finishes
+- ``log``: each job's output goes to its own log file
+
+A line longer than MAX_LINE is handed over in MAX_LINE pieces, so a job
+that never writes a newline cannot grow the buffer without bound. If
+stdout or stderr is closed by its reader (e.g. ``| head``), that stream is
+pointed at /dev/null and the jobs' remaining output on it is discarded.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Optional
+
+from .executor import exit_code_from_returncode
+
+# Output modes
+OUTPUT_PREFIX = "prefix"
+OUTPUT_BUFFER = "buffer"
+OUTPUT_LOG = "log"
+OUTPUT_MODES = (OUTPUT_PREFIX, OUTPUT_BUFFER, OUTPUT_LOG)
+
+# Bytes read from a pipe at a time
+READ_SIZE = 64 * 1024
+
+# Longest line handed to a sink in one piece
+MAX_LINE = 1024 * 1024
+
+
+@dataclass
+class Job:
+    """A command line to run."""
+
+    label: str
+    argv: list[str]
+
+
+@dataclass
+class JobResult:
+    """Result of one job."""
+
+    label: str
+    argv: list[str]
+    exit_code: int
+    duration: float
+    log_path: Optional[Path] = None
+
+
+class OutputSink:
+    """Receives complete output lines from running jobs."""
+
+    def start(self, index: int, job: Job) -> None:
+        """Called when a job starts."""
+
+    def line(self, index: int, job: Job, stream: IO[bytes], data: bytes) -> None:
+        """Called for each complete line (including the newline)."""
+
+    def finish(self, index: int, job: Job, result: JobResult) -> None:
+        """Called when a job exits and its pipes are drained."""
+
+
+def drop_stream(stream: IO[bytes]) -> None:
+    """Point a stream at /dev/null after its reader went away (no flush errors at exit)."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, stream.fileno())
+    finally:
+        os.close(devnull)
+
+
+def write_output(stream: IO[bytes], data: bytes, flush: bool = True) -> None:
+    """Write job output, dropping the stream if its reader has gone away."""
+    try:
+        stream.write(data)
+        if flush:
+            stream.flush()
+    except BrokenPipeError:
+        drop_stream(stream)
+
+
+class PrefixSink(OutputSink):
+    """Write lines as they arrive, tagged with the job label."""
+
+    def line(self, index, job, stream, data):
+        write_output(stream, f"[{job.label}] ".encode() + data)
+
+
+class BufferSink(OutputSink):
+    """Collect each job's output and write it in one block on completion."""
+
+    def __init__(self):
+        self.buffers: dict[int, list[tuple[IO[bytes], bytes]]] = {}
+
+    def start(self, index, job):
+        self.buffers[index] = []
+
+    def line(self, index, job, stream, data):
+        self.buffers[index].append((stream, data))
+
+    def finish(self, index, job, result):
+        write_output(sys.stdout.buffer, f"=== {job.label} ===\n".encode())
+        for stream, data in self.buffers.pop(index):
+            write_output(stream, data, flush=False)
+        write_output(sys.stdout.buffer, b"")
+        write_output(sys.stderr.buffer, b"")
+
+
+class LogSink(OutputSink):
+    """Write each job's output to its own file in a log directory."""
+
+    def __init__(self, log_dir: Path):
+        self.log_dir = log_dir
+        self.files: dict[int, IO[bytes]] = {}
+
+    def log_path(self, index: int, job: Job) -> Path:
+        """Build a filesystem-safe log file name for a job."""
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", job.label).strip("_")[:60]
+        return self.log_dir / f"{index + 1:04d}-{safe_label or 'job'}.log"
+
+    def start(self, index, job):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.files[index] = open(self.log_path(index, job), "wb")
+
+    def line(self, index, job, stream, data):
+        self.files[index].write(data)
+
+    def finish(self, index, job, result):
+        self.files.pop(index).close()
+        result.log_path = self.log_path(index, job)
+        print(
+            f"[{job.label}] exit {result.exit_code} -> {result.log_path}",
+            file=sys.stderr,
+        )
+
+
+def make_sink(output_mode: str, log_dir: Optional[Path] = None) -> OutputSink:
+    """Create the output sink for an output mode."""
+    if output_mode == OUTPUT_BUFFER:
+        return BufferSink()
+    if output_mode == OUTPUT_LOG:
+        return LogSink(log_dir or Path.cwd() / "corun-logs")
+    return PrefixSink()
+
+
+async def pump(
+    reader: asyncio.StreamReader,
+    index: int,
+    job: Job,
+    stream: IO[bytes],
+    sink: OutputSink,
+) -> None:
+    """Read a pipe to EOF, handing complete lines to the sink."""
+    pending = bytearray()
+    while True:
+        chunk = await reader.read(READ_SIZE)
+        if not chunk:
+            break
+        # Only the new chunk is searched; earlier bytes had no newline
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            pending += chunk
+        else:
+            lines = (bytes(pending) + chunk[:end]).split(b"\n")
+            for line in lines:
+                sink.line(index, job, stream, line + b"\n")
+            pending = bytearray(chunk[end + 1 :])
+
+        while len(pending) >= MAX_LINE:
+            sink.line(index, job, stream, bytes(pending[:MAX_LINE]) + b"\n")
+            del pending[:MAX_LINE]
+
+    # Unterminated last line
+    if pending:
+        sink.line(index, job, stream, bytes(pending) + b"\n")
+
+
+async def run_job(
+    index: int, job: Job, sink: OutputSink, semaphore: asyncio.Semaphore
+) -> JobResult:
+    """Run one job once a concurrency slot is free."""
+    async with semaphore:
+        start = time.monotonic()
+        sink.start(index, job)
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *job.argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            sink.line(
+                index, job, sys.stderr.buffer, f"Error executing script: {e}\n".encode()
+            )
+            result = JobResult(job.label, job.argv, 1, time.monotonic() - start)
+            sink.finish(index, job, result)
+            return result
+
+        await asyncio.gather(
+            pump(process.stdout, index, job, sys.stdout.buffer, sink),
+            pump(process.stderr, index, job, sys.stderr.buffer, sink),
+        )
+        returncode = await process.wait()
+
+        result = JobResult(
+            job.label,
+            job.argv,
+            exit_code_from_returncode(returncode),
+            time.monotonic() - start,
+        )
+        sink.finish(index, job, result)
+        return result
+
+
+async def run_jobs_async(
+    jobs: list[Job], concurrency: int, sink: OutputSink
+) -> list[JobResult]:
+    """Run jobs with at most `concurrency` processes alive at once."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(
+        *(run_job(index, job, sink, semaphore) for index, job in enumerate(jobs))
+    )
+
+
+def run_jobs(
+    jobs: list[Job],
+    concurrency: int,
+    output_mode: str = OUTPUT_PREFIX,
+    log_dir: Optional[Path] = None,
+) -> list[JobResult]:
+    """
+    Run jobs concurrently and multiplex their output.
+
+    Args:
+        jobs: Jobs to run
+        concurrency: Maximum number of concurrent processes
+        output_mode: OUTPUT_PREFIX, OUTPUT_BUFFER or OUTPUT_LOG
+        log_dir: Directory for OUTPUT_LOG (default: ./corun-logs)
+
+    Returns:
+        Results in the same order as jobs
+    """
+    sink = make_sink(output_mode, log_dir)
+    return asyncio.run(run_jobs_async(jobs, concurrency, sink))
@@ -0,0 +1,43 @@
+"""Names and help text of corun's built-in commands.
+
+Kept free of imports so the daemon client and the completion fast path can
+check a name without loading the registry.
+"""
+
+# corun's built-in commands and their help text, used by the Typer app and
+# by the completion fast path (None: hidden command, not completed)
+BUILTIN_HELP: dict[str, str | None] = {
+    "chain": (
+        "Pipe commands into each other: corun chain 'a x' 'b y'.\n\n"
+        "Scripts are connected directly with OS pipes, with a single corun process."
+    ),
+    "completion": (
+        "Show shell completion setup instructions.\n\n"
+        "This command helps you set up tab completion for your shell."
+    ),
+    "library": "Manage script libraries",
+    "parallel": (
+        "Run one command for many argument sets concurrently.\n\n"
+        "Reads one argument set per line (shell quoting) from stdin or --file."
+    ),
+    "pipeline": "Run DAGs of library commands",
+    "run": None,
+    "search": "Search commands by name, library, description and script header comments.",
+    "serve": (
+        "Run the corun daemon for fast dispatch.\n\n"
+        "While it runs, `corun <library> <command>` is served over a Unix socket\n"
+        "without starting the full CLI."
+    ),
+    "shell": (
+        "Start an interactive corun shell.\n\n"
+        "Libraries stay loaded between commands, with tab completion and history."
+    ),
+    "stats": (
+        "Show duration percentiles and failure rates from the run history.\n\n"
+        "Runs are recorded when CORUN_HISTORY is set."
+    ),
+}
+
+# Names of corun's built-in commands; a library or script with one of these
+# names cannot be run and is reported as shadowed
+BUILTIN_COMMANDS = frozenset(BUILTIN_HELP)
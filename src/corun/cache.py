@@ -0,0 +1,266 @@
+"""On-disk result cache for idempotent library commands.
+
+A library opts in per command in metadata.json::
+
+    "cache": {"cpu": 30},
+    "cache_env": ["LANG"]
+
+A cached command's stdout and exit code are stored under
+``~/.corun/cache``, keyed by the script's content hash, its arguments and
+the values of the ``cache_env`` variables. An entry is served while it is
+younger than the command's TTL. Only successful runs are cached; stderr
+is never captured.
+
+The cache is bounded by CORUN_CACHE_MAX_BYTES (default 64 MiB). Hits
+refresh an entry's access time, and writes evict the least recently used
+entries once the bound is exceeded. ``--no-cache`` (before the command
+name) or CORUN_NO_CACHE=1 bypasses the cache.
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+NO_CACHE_FLAG = "--no-cache"
+NO_CACHE_ENV = "CORUN_NO_CACHE"
+CACHE_MAX_BYTES_ENV = "CORUN_CACHE_MAX_BYTES"
+
+# Default cache directory
+CACHE_DIR = Path.home() / ".corun" / "cache"
+
+# Default size bound
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Bytes read from the script's stdout at a time
+READ_SIZE = 64 * 1024
+
+_disabled = False
+
+
+def get_cache_dir() -> Path:
+    """Get the cache directory."""
+    return CACHE_DIR
+
+
+def get_cache_max_bytes() -> int:
+    """Get the cache size bound (CORUN_CACHE_MAX_BYTES)."""
+    try:
+        return int(os.environ.get(CACHE_MAX_BYTES_ENV, CACHE_MAX_BYTES))
+    except ValueError:
+        return CACHE_MAX_BYTES
+
+
+def disable_cache() -> None:
+    """Bypass the cache for this process (--no-cache)."""
+    global _disabled
+    _disabled = True
+
+
+def is_enabled() -> bool:
+    """Check whether cached results may be used."""
+    return not _disabled and os.environ.get(NO_CACHE_ENV, "") in ("", "0")
+
+
+def cache_key(script_path: Path, args: Optional[list[str]], env_names: list[str]) -> str:
+    """
+    Build the cache key for a run.
+
+    Args:
+        script_path: Path to the script
+        args: Script arguments
+        env_names: Environment variables that affect the output
+
+    Returns:
+        Hex digest, or an empty string if the script cannot be read
+    """
+    from .executor import read_script_content
+
+    try:
+        digest = hashlib.sha256(read_script_content(script_path))
+    except OSError:
+        return ""
+    for arg in args or []:
+        digest.update(b"\0a" + arg.encode("utf-8", "surrogateescape"))
+    for name in env_names:
+        value = os.environ.get(name)
+        digest.update(b"\0e" + name.encode())
+        if value is not None:
+            digest.update(b"=" + value.encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def lookup(key: str, ttl: float) -> Optional[tuple[int, bytes]]:
+    """
+    Read a cache entry younger than `ttl` seconds.
+
+    Args:
+        key: Key from cache_key()
+        ttl: Maximum age in seconds
+
+    Returns:
+        Tuple of (exit code, stdout), or None on a miss
+    """
+    path = get_cache_dir() / key
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if time.time() - st.st_mtime > ttl:
+                return None
+            header, _, stdout = f.read().partition(b"\n")
+        exit_code = int(header)
+        # Access time drives LRU eviction; keep mtime as the creation time
+        os.utime(path, (time.time(), st.st_mtime))
+    except (OSError, ValueError):
+        return None
+    return exit_code, stdout
+
+
+def store(key: str, exit_code: int, stdout: bytes) -> None:
+    """Write a cache entry atomically, then enforce the size bound."""
+    cache_dir = get_cache_dir()
+    path = cache_dir / key
+    tmp_path = cache_dir / f".{key}.{os.getpid()}.tmp"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(b"%d\n" % exit_code)
+            f.write(stdout)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return
+    evict(get_cache_max_bytes())
+
+
+def evict(max_bytes: int) -> None:
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    entries = []
+    total = 0
+    try:
+        with os.scandir(get_cache_dir()) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_atime, st.st_size, entry.path))
+                total += st.st_size
+    except OSError:
+        return
+
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+def drop_stdout() -> None:
+    """Point stdout at /dev/null after its reader went away (no flush errors at exit)."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, sys.stdout.fileno())
+    finally:
+        os.close(devnull)
+
+
+def capture_script(cmd: list[str]) -> tuple[int, Optional[bytes]]:
+    """
+    Run a script, echoing its stdout while capturing it.
+
+    If stdout is closed by its reader (e.g. ``| head``), echoing stops and
+    the script's pipe is closed, so it gets SIGPIPE as it would without
+    corun in between.
+
+    Args:
+        cmd: Command line from build_command()
+
+    Returns:
+        Tuple of (exit code, captured stdout). stdout is None if it was
+        cut short, so the run must not be cached.
+    """
+    from .executor import exit_code_from_returncode, forward_signals, wait_script
+
+    try:
+        process = subprocess.Popen(
+            cmd, stdin=sys.stdin, stdout=subprocess.PIPE, stderr=sys.stderr
+        )
+    except Exception as e:
+        print(f"Error executing script: {e}", file=sys.stderr)
+        return 1, b""
+
+    out = sys.stdout.buffer
+    chunks: Optional[list[bytes]] = []
+    with forward_signals(process):
+        try:
+            while True:
+                chunk = process.stdout.read1(READ_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+                out.flush()
+                chunks.append(chunk)
+        except BrokenPipeError:
+            chunks = None
+            drop_stdout()
+        finally:
+            process.stdout.close()
+        returncode = wait_script(process)
+
+    stdout = b"".join(chunks) if chunks is not None else None
+    return exit_code_from_returncode(returncode), stdout
+
+
+def run_cached(
+    cmd: list[str],
+    script_path: Path,
+    args: Optional[list[str]],
+    ttl: float,
+    env_names: list[str],
+) -> int:
+    """
+    Serve a run from the cache, or run it and cache the result.
+
+    Args:
+        cmd: Command line from build_command()
+        script_path: Path to the script
+        args: Script arguments
+        ttl: Cache TTL in seconds
+        env_names: Environment variables that are part of the key
+
+    Returns:
+        Exit code of the (possibly cached) run
+    """
+    key = cache_key(script_path, args, env_names)
+    if key:
+        hit = lookup(key, ttl)
+        if hit is not None:
+            exit_code, stdout = hit
+            try:
+                sys.stdout.flush()
+                sys.stdout.buffer.write(stdout)
+                sys.stdout.buffer.flush()
+            except BrokenPipeError:
+                drop_stdout()
+            return exit_code
+
+    exit_code, stdout = capture_script(cmd)
+    # Partial output (reader closed the pipe) is never stored
+    if key and exit_code == 0 and stdout is not None:
+        store(key, exit_code, stdout)
+    return exit_code
@@ -0,0 +1,168 @@
+"""Run corun commands connected stdout-to-stdin (``corun chain``).
+
+Replaces ``corun a x | corun b y``: one corun process starts every script
+with OS pipes between them, and the data never passes through Python. The
+first script reads corun's stdin and the last writes corun's stdout
+directly.
+
+With a log file, the last script writes into a pipe that corun drains with
+``splice`` (pipe -> log file) and ``sendfile`` (log file -> stdout), so the
+bytes are moved in the kernel. Where those calls are unavailable (not
+Linux, or stdout opened with O_APPEND), a plain read/write loop is used.
+"""
+
+import os
+import shlex
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+from .executor import exit_code_from_returncode, forward_signals
+
+# Bytes moved per splice/sendfile call
+SPLICE_SIZE = 1024 * 1024
+
+
+def parse_stages(stages: list[str]) -> list[list[str]]:
+    """
+    Split chain stages into words.
+
+    Args:
+        stages: Command lines as typed after ``corun`` (shell quoting)
+
+    Returns:
+        List of word lists
+
+    Raises:
+        ValueError: If a stage is empty or badly quoted
+    """
+    parsed = []
+    for stage in stages:
+        words = shlex.split(stage)
+        if not words:
+            raise ValueError("empty stage")
+        parsed.append(words)
+    return parsed
+
+
+def copy_buffered(src: int, log_fd: int, out_fd: int, offset: int) -> None:
+    """Fallback tee: the log file from `offset` on, then the rest of the pipe."""
+    while True:
+        data = os.pread(log_fd, SPLICE_SIZE, offset)
+        if not data:
+            break
+        offset += len(data)
+        write_all(out_fd, data)
+    while True:
+        data = os.read(src, SPLICE_SIZE)
+        if not data:
+            return
+        write_all(log_fd, data)
+        write_all(out_fd, data)
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """Write all of `data` to a file descriptor."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def tee_to_log(src: int, log_fd: int, out_fd: int) -> None:
+    """
+    Copy a pipe to both a log file and an output descriptor until EOF.
+
+    Args:
+        src: Read end of the pipe
+        log_fd: Log file, opened read-write and empty
+        out_fd: Output descriptor (usually stdout)
+
+    Raises:
+        BrokenPipeError: If the output was closed by its reader
+    """
+    # Bytes of the log already written to out_fd
+    sent = 0
+    try:
+        while True:
+            size = os.splice(src, log_fd, SPLICE_SIZE)
+            if size == 0:
+                return
+            end = sent + size
+            while sent < end:
+                sent += os.sendfile(out_fd, log_fd, sent, end - sent)
+    except BrokenPipeError:
+        raise
+    except (OSError, AttributeError):
+        pass
+    copy_buffered(src, log_fd, out_fd, sent)
+
+
+def run_chain(
+    commands: list[list[str]],
+    log_file: Optional[Path] = None,
+    pipefail: bool = False,
+) -> int:
+    """
+    Run commands with each one's stdout piped into the next one's stdin.
+
+    Args:
+        commands: Resolved command lines, in pipe order
+        log_file: Also write the final output to this file
+        pipefail: Report the last non-zero exit code of any stage instead of
+            the last stage's (like ``set -o pipefail``)
+
+    Returns:
+        Exit code of the chain (128+N if killed by signal N)
+    """
+    # Fail on an unwritable log before anything runs
+    log_fd: Optional[int] = None
+    if log_file is not None:
+        log_fd = os.open(log_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    processes: list[subprocess.Popen] = []
+    stdin_fd: Optional[int] = None
+    try:
+        for position, cmd in enumerate(commands):
+            last = position == len(commands) - 1
+            read_fd = write_fd = None
+            if not last or log_fd is not None:
+                read_fd, write_fd = os.pipe()
+            try:
+                processes.append(
+                    subprocess.Popen(cmd, stdin=stdin_fd, stdout=write_fd)
+                )
+            except OSError:
+                if read_fd is not None:
+                    os.close(read_fd)
+                raise
+            finally:
+                # The child holds its own copies now
+                if stdin_fd is not None:
+                    os.close(stdin_fd)
+                if write_fd is not None:
+                    os.close(write_fd)
+            stdin_fd = read_fd
+    except OSError:
+        if log_fd is not None:
+            os.close(log_fd)
+        # Earlier stages see their stdout closed and exit
+        for process in processes:
+            process.wait()
+        raise
+
+    with forward_signals(*processes):
+        if log_fd is not None:
+            try:
+                tee_to_log(stdin_fd, log_fd, 1)
+            except BrokenPipeError:
+                # Reader went away: the last stage gets SIGPIPE, as with tee
+                pass
+            finally:
+                os.close(stdin_fd)
+                os.close(log_fd)
+        returncodes = [process.wait() for process in processes]
+
+    exit_codes = [exit_code_from_returncode(code) for code in returncodes]
+    if pipefail:
+        return next((code for code in reversed(exit_codes) if code != 0), 0)
+    return exit_codes[-1]
@@ -0,0 +1,141 @@
+"""Thin client for the corun daemon (``corun serve``).
+
+Kept free of heavy imports (not even pathlib): when the daemon socket does
+not exist this costs a single stat. Otherwise argv, cwd, the environment,
+umask and resource limits are sent over the Unix socket together with the
+caller's stdin/stdout/stderr (SCM_RIGHTS), and the daemon runs the script
+with them. Signals received while waiting are forwarded to the script. If
+the daemon is not running or cannot handle the command, the caller falls
+back to running corun in-process.
+
+Interactive runs (any of stdin/stdout/stderr is a terminal) never use the
+daemon: its scripts run in a session of their own, without a controlling
+terminal, so /dev/tty, password prompts (sudo, ssh) and job control (Ctrl+Z)
+would not work.
+"""
+
+import os
+import sys
+
+SOCKET_ENV = "CORUN_SOCKET"
+DAEMON_ENV = "CORUN_DAEMON"
+
+# Default socket path
+SOCKET_FILE = os.path.join(os.path.expanduser("~"), ".corun", "daemon.sock")
+
+# Message types: daemon -> client
+MSG_FALLBACK = b"F"  # not handled, run in-process
+MSG_STARTED = b"R"  # script spawned
+MSG_EXIT = b"E"  # followed by the exit code (!i)
+# Message types: client -> daemon
+MSG_SIGNAL = b"S"  # followed by the signal number (one byte)
+
+
+def get_socket_file() -> str:
+    """Get the daemon socket path (CORUN_SOCKET overrides the default)."""
+    return os.environ.get(SOCKET_ENV) or SOCKET_FILE
+
+
+def get_umask() -> int:
+    """Get the process umask (it can only be read by setting it)."""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def get_rlimits() -> dict[str, list[int]]:
+    """Get the process resource limits, as {"RLIMIT_...": [soft, hard]}."""
+    import resource
+
+    return {
+        name: list(resource.getrlimit(getattr(resource, name)))
+        for name in dir(resource)
+        if name.startswith("RLIMIT_")
+    }
+
+
+def recv_exactly(sock, size: int) -> bytes:
+    """Read exactly `size` bytes, or fewer if the peer closed the socket."""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def run_via_daemon(argv: list[str]) -> int | None:
+    """
+    Ask a running daemon to execute a command.
+
+    Args:
+        argv: Command line arguments (without program name)
+
+    Returns:
+        Exit code of the script, or None to run in-process instead (no
+        daemon, CORUN_DAEMON=0, a terminal on stdin/stdout/stderr, or the
+        daemon cannot handle this command)
+    """
+    if os.environ.get(DAEMON_ENV) == "0":
+        return None
+    socket_file = get_socket_file()
+    if not os.path.exists(socket_file):
+        return None
+    if any(os.isatty(fd) for fd in (0, 1, 2)):
+        return None
+
+    import json
+    import signal
+    import socket
+    import struct
+
+    payload = json.dumps(
+        {
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+            "umask": get_umask(),
+            "rlimits": get_rlimits(),
+        }
+    ).encode("utf-8", "surrogateescape")
+    message = struct.pack("!I", len(payload)) + payload
+
+    started = False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_file)
+        sent = socket.send_fds(sock, [message], [0, 1, 2])
+        sock.sendall(message[sent:])
+
+        def forward_signal(signum, frame):
+            try:
+                sock.sendall(MSG_SIGNAL + bytes([signum]))
+            except OSError:
+                pass
+
+        previous = {}
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            previous[signum] = signal.signal(signum, forward_signal)
+        try:
+            if recv_exactly(sock, 1) != MSG_STARTED:
+                return None
+            # From here on the script runs: never fall back and run it twice
+            started = True
+            if recv_exactly(sock, 1) == MSG_EXIT:
+                data = recv_exactly(sock, 4)
+                if len(data) == 4:
+                    return struct.unpack("!i", data)[0]
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+    except OSError:
+        # Stale socket, or the daemon went away
+        pass
+    finally:
+        sock.close()
+
+    if started:
+        print("Error: corun daemon connection lost", file=sys.stderr)
+        return 1
+    return None
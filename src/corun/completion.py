@@ -1,12 +1,13 @@
 """Shell completion utilities for Corun CLI."""
 
 import os
+import re
+import shlex
 import sys
+from typing import Optional
 
-from rich.console import Console
-from rich.markdown import Markdown
-
-console = Console()
+# Length Typer (click) shortens command help to in completion results
+SHORT_HELP_LENGTH = 45
 
 
 def get_shell() -> str:
@@ -127,6 +128,11 @@ corun --show-completion fish
 
 def show_completion_help(shell: str = None):
     """Show completion setup instructions."""
+    from rich.console import Console
+    from rich.markdown import Markdown
+
+    console = Console()
+
     if shell is None:
         shell = get_shell()
     
@@ -143,3 +149,193 @@ def show_completion_help(shell: str = None):
     console.print("  • Tab completion for all commands")
     console.print("  • Library and command suggestions")
     console.print("  • Option and flag completion")
+
+
+def split_completion_args(words: str) -> list[str]:
+    """Split a partial command line, tolerating unterminated quotes."""
+    try:
+        return shlex.split(words)
+    except ValueError:
+        return words.split()
+
+
+def get_completion_args(mode: str) -> tuple[list[str], str]:
+    """
+    Read the words being completed from the environment.
+
+    Mirrors the protocol used by Typer's completion scripts.
+
+    Args:
+        mode: Completion mode (complete_bash, complete_zsh, complete_fish)
+
+    Returns:
+        Tuple of (completed args after the program name, incomplete word)
+    """
+    if mode == "complete_bash":
+        cwords = split_completion_args(os.environ.get("COMP_WORDS", ""))
+        cword = int(os.environ.get("COMP_CWORD", "0"))
+        args = cwords[1:cword]
+        incomplete = cwords[cword] if cword < len(cwords) else ""
+        return args, incomplete
+
+    completion_args = os.environ.get("_TYPER_COMPLETE_ARGS", "")
+    args = split_completion_args(completion_args)[1:]
+    if args and not completion_args.endswith(" "):
+        return args[:-1], args[-1]
+    return args, ""
+
+
+def make_short_help(help_text: str, max_length: int = SHORT_HELP_LENGTH) -> str:
+    """
+    Shorten help text the way click does for completion results.
+
+    Same rules as click's make_default_short_help(): first paragraph only,
+    cut after the first sentence or before the word that passes
+    `max_length`, with "..." when cut mid-sentence.
+    """
+    paragraph_end = help_text.find("\n\n")
+    if paragraph_end != -1:
+        help_text = help_text[:paragraph_end]
+
+    words = help_text.split()
+    if not words:
+        return ""
+    if words[0] == "\b":
+        words = words[1:]
+
+    total_length = 0
+    last_index = len(words) - 1
+    for i, word in enumerate(words):
+        total_length += len(word) + (i > 0)
+        if total_length > max_length:
+            break
+        if word[-1] == ".":
+            return " ".join(words[: i + 1])
+        if total_length == max_length and i != last_index:
+            break
+    else:
+        return " ".join(words)
+
+    total_length += len("...")
+    while i > 0:
+        total_length -= len(words[i]) + (i > 0)
+        if total_length <= max_length:
+            break
+        i -= 1
+    return " ".join(words[:i]) + "..."
+
+
+def get_index_candidates(
+    args: list[str], incomplete: str
+) -> Optional[list[tuple[str, str]]]:
+    """
+    Answer a completion request from the command index.
+
+    Args:
+        args: Completed args after the program name
+        incomplete: Word being completed
+
+    Returns:
+        List of (value, short help) candidates, or None if the request
+        needs the full CLI (options, built-in subcommands, or a stale index)
+    """
+    from .builtin_commands import BUILTIN_HELP
+
+    if incomplete.startswith("-") or len(args) > 1:
+        return None
+    if args and (args[0].startswith("-") or args[0] in BUILTIN_HELP):
+        return None
+
+    from .index import get_fresh_names
+    from .scanner import get_search_paths
+
+    names = get_fresh_names([path for _, path in get_search_paths()])
+    if names is None:
+        return None
+
+    if not args:
+        # Top level: visible built-ins, library IDs and standalone scripts
+        candidates = {
+            name: make_short_help(help_text)
+            for name, help_text in BUILTIN_HELP.items()
+            if help_text is not None
+        }
+        for name, (_, entry) in names.items():
+            if name in BUILTIN_HELP:
+                continue
+            if entry is None:
+                candidates[name] = ""
+            else:
+                metadata = entry.get("metadata")
+                candidates[name] = make_short_help(
+                    metadata["description"] if metadata else "No description"
+                )
+    else:
+        # Second level: commands of a library
+        _, entry = names.get(args[0], (None, None))
+        if entry is None:
+            # Standalone script or unknown name: let the CLI decide
+            return None
+        candidates = {name: "" for name in entry["commands"]}
+
+    return [
+        (value, help_text)
+        for value, help_text in sorted(candidates.items())
+        if value.startswith(incomplete)
+    ]
+
+
+def escape_zsh(value: str) -> str:
+    """Escape a value for Typer's zsh completion script."""
+    return (
+        value.replace('"', '""')
+        .replace("'", "''")
+        .replace("$", "\\$")
+        .replace("`", "\\`")
+        .replace(":", r"\\:")
+    )
+
+
+def fast_complete() -> bool:
+    """
+    Answer shell completion requests without importing the full CLI.
+
+    Handles ``corun <TAB>`` and ``corun <library> <TAB>`` straight from the
+    command index, skipping typer, rich, pydantic and the library sub-app.
+
+    Returns:
+        True if the request was answered, False to fall back to Typer
+    """
+    mode = os.environ.get("_CORUN_COMPLETE", "")
+    if mode not in ("complete_bash", "complete_zsh", "complete_fish"):
+        return False
+
+    args, incomplete = get_completion_args(mode)
+    candidates = get_index_candidates(args, incomplete)
+    if candidates is None:
+        return False
+
+    if mode == "complete_bash":
+        out = [value for value, _ in candidates]
+    elif mode == "complete_zsh":
+        items = [
+            f'"{escape_zsh(value)}":"{escape_zsh(help_text)}"'
+            if help_text
+            else f'"{escape_zsh(value)}"'
+            for value, help_text in candidates
+        ]
+        out = ["_arguments '*: :((" + "\n".join(items) + "))'"] if items else ["_files"]
+    else:
+        action = os.environ.get("_TYPER_COMPLETE_FISH_ACTION", "")
+        if action == "is-args":
+            sys.exit(0 if candidates else 1)
+        out = []
+        if action == "get-args":
+            out = [
+                value + "\t" + re.sub(r"\s", " ", help_text) if help_text else value
+                for value, help_text in candidates
+            ]
+
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
+    return True
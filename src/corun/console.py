@@ -0,0 +1,22 @@
+"""Lazily created rich console."""
+
+
+class LazyConsole:
+    """
+    Proxy that creates a rich Console on first use.
+
+    Importing rich costs tens of milliseconds; the run path only needs it
+    when something is actually printed (errors, warnings, prompts).
+    """
+
+    _console = None
+
+    def __getattr__(self, name: str):
+        if LazyConsole._console is None:
+            from rich.console import Console
+
+            LazyConsole._console = Console()
+        return getattr(LazyConsole._console, name)
+
+
+console = LazyConsole()
@@ -0,0 +1,300 @@
+"""Corun daemon (``corun serve``).
+
+Keeps the registry warm (updated by the addons watcher) and runs scripts
+for thin clients (see corun.client) over a Unix domain socket. The script
+is spawned with the caller's stdin/stdout/stderr, working directory,
+environment and umask, in its own session; signals the client receives are
+forwarded to the script's process group. The script has no controlling
+terminal, so the client never uses the daemon from a terminal.
+
+Only plain script runs are handled here. Anything that needs the full CLI
+(built-in commands, options, help, naming conflicts, cached commands,
+missing shebang, a caller whose addons layers differ from the daemon's -
+e.g. another project directory - or whose resource limits differ, or other
+errors) is answered with a fallback and the client runs corun in-process,
+so behaviour and error messages stay identical.
+"""
+
+import json
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from . import history
+from .builtin_commands import BUILTIN_COMMANDS
+from .client import (
+    MSG_EXIT,
+    MSG_FALLBACK,
+    MSG_SIGNAL,
+    MSG_STARTED,
+    get_rlimits,
+    get_socket_file,
+    recv_exactly,
+)
+from .executor import exit_code_from_returncode, has_shebang
+from .models import Command
+from .registry import Registry, get_registry
+
+# Largest accepted request (argv + cwd + env)
+MAX_REQUEST = 4 * 1024 * 1024
+
+
+def resolve_request(
+    registry: Registry, argv: list[str]
+) -> Optional[tuple[Command, list[str]]]:
+    """
+    Resolve argv to a script the daemon can run directly.
+
+    Mirrors the CLI's dynamic commands: ``<library> <command> [args...]``
+    or ``<script> [args...]``.
+
+    Args:
+        registry: Current registry
+        argv: Command line arguments (without program name)
+
+    Returns:
+        Tuple of (command, script args), or None if the CLI must handle it
+    """
+    if not argv or argv[0] in BUILTIN_COMMANDS:
+        return None
+    # Options (including --help and --) are parsed by the CLI
+    if any(arg.startswith("-") for arg in argv):
+        return None
+
+    if argv[0] in registry.conflicts:
+        return None
+
+    resolved = registry.resolve(argv)
+    if resolved is None:
+        return None
+    cmd, _ = resolved
+    library = registry.get_library(cmd.library_id) if cmd.library_id else None
+    if library and library.get_cache_ttl(cmd.name):
+        return None
+    return resolved
+
+
+def same_layers(registry: Registry, request: dict) -> bool:
+    """Check that the caller's cwd and env select the daemon's addons layers."""
+    from .scanner import get_search_paths
+
+    cwd = request.get("cwd")
+    env = request.get("env")
+    if not isinstance(cwd, str) or not isinstance(env, dict):
+        return False
+    paths = [path for _, path in get_search_paths(Path(cwd), env)]
+    return paths == [layer.path for layer in registry.layers]
+
+
+def same_rlimits(request: dict) -> bool:
+    """Check that the caller's resource limits are the daemon's own."""
+    return request.get("rlimits") == get_rlimits()
+
+
+def get_request_umask(request: dict) -> Optional[int]:
+    """Get the caller's umask from a request (None if missing or invalid)."""
+    umask = request.get("umask")
+    if isinstance(umask, int) and not isinstance(umask, bool) and 0 <= umask <= 0o777:
+        return umask
+    return None
+
+
+def can_spawn(script_path: Path) -> bool:
+    """Check that a script runs as-is (else the CLI reports the problem)."""
+    return os.access(script_path, os.X_OK) and has_shebang(script_path)
+
+
+def read_request(conn: socket.socket) -> tuple[dict, list[int]]:
+    """
+    Read one request and the file descriptors sent with it.
+
+    Returns:
+        Tuple of (request, received fds)
+
+    Raises:
+        ValueError: If the request is malformed
+    """
+    data, fds, _, _ = socket.recv_fds(conn, 64 * 1024, 3)
+    try:
+        if len(data) < 4:
+            raise ValueError("truncated request")
+        (size,) = struct.unpack("!I", data[:4])
+        if size > MAX_REQUEST:
+            raise ValueError("request too large")
+        payload = data[4:]
+        if len(payload) < size:
+            payload += recv_exactly(conn, size - len(payload))
+        request = json.loads(payload.decode("utf-8", "surrogateescape"))
+        if len(fds) != 3 or not isinstance(request.get("argv"), list):
+            raise ValueError("invalid request")
+    except ValueError:
+        for fd in fds:
+            os.close(fd)
+        raise
+    return request, fds
+
+
+def relay_signals(conn: socket.socket, process: subprocess.Popen) -> None:
+    """Forward signal messages from the client until it stops sending."""
+    while True:
+        try:
+            message = recv_exactly(conn, 2)
+        except OSError:
+            return
+        if len(message) < 2 or message[:1] != MSG_SIGNAL:
+            return
+        try:
+            os.killpg(process.pid, message[1])
+        except (OSError, ValueError):
+            pass
+
+
+def handle_connection(conn: socket.socket) -> None:
+    """Serve one client: spawn its script and report the exit code."""
+    fds: list[int] = []
+    try:
+        # Only serve the user running the daemon (the socket is 0600 too)
+        if hasattr(socket, "SO_PEERCRED"):
+            creds = conn.getsockopt(
+                socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+            )
+            _, uid, _ = struct.unpack("3i", creds)
+            if uid != os.getuid():
+                return
+
+        try:
+            request, fds = read_request(conn)
+        except ValueError:
+            return
+
+        registry = get_registry()
+        resolved = resolve_request(registry, request["argv"])
+        umask = get_request_umask(request)
+        if (
+            resolved is None
+            or umask is None
+            or not same_layers(registry, request)
+            or not same_rlimits(request)
+            or not can_spawn(resolved[0].script_path)
+        ):
+            conn.sendall(MSG_FALLBACK)
+            return
+
+        cmd, args = resolved
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            process = subprocess.Popen(
+                [str(cmd.script_path), *args],
+                stdin=fds[0],
+                stdout=fds[1],
+                stderr=fds[2],
+                cwd=request.get("cwd"),
+                env=request.get("env"),
+                umask=umask,
+                start_new_session=True,
+            )
+        except OSError:
+            conn.sendall(MSG_FALLBACK)
+            return
+        finally:
+            for fd in fds:
+                os.close(fd)
+            fds = []
+
+        conn.sendall(MSG_STARTED)
+        threading.Thread(
+            target=relay_signals, args=(conn, process), daemon=True
+        ).start()
+
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        exit_code = exit_code_from_returncode(process.returncode)
+        conn.sendall(MSG_EXIT + struct.pack("!i", exit_code))
+
+        env = request.get("env") or {}
+        if env.get(history.HISTORY_ENV, "") not in ("", "0"):
+            history.record_run(
+                command=cmd.name,
+                library_id=cmd.library_id,
+                args=args,
+                start=start,
+                duration=time.perf_counter() - started,
+                exit_code=exit_code,
+                max_rss=rusage.ru_maxrss,
+            )
+    except OSError:
+        pass
+    finally:
+        for fd in fds:
+            os.close(fd)
+        conn.close()
+
+
+def serve(socket_file: Optional[Path] = None, watch: bool = True) -> None:
+    """
+    Run the daemon until interrupted.
+
+    Args:
+        socket_file: Socket path (default: CORUN_SOCKET or ~/.corun/daemon.sock)
+        watch: Keep the registry up to date with the addons watcher
+    """
+    socket_file = socket_file or Path(get_socket_file())
+    socket_file.parent.mkdir(parents=True, exist_ok=True)
+
+    # Refuse to take over the socket of a running daemon
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_file))
+        raise OSError(f"A daemon is already listening on {socket_file}")
+    except (ConnectionRefusedError, FileNotFoundError):
+        pass
+    finally:
+        probe.close()
+    try:
+        socket_file.unlink()
+    except FileNotFoundError:
+        pass
+
+    get_registry()
+    watcher = None
+    if watch:
+        from .watcher import start_watcher
+
+        watcher = start_watcher()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(str(socket_file))
+    finally:
+        os.umask(old_umask)
+    server.listen(128)
+
+    # Let SIGTERM shut down cleanly like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    print(f"corun daemon listening on {socket_file}", file=sys.stderr)
+    try:
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(
+                target=handle_connection, args=(conn,), daemon=True
+            ).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try:
+            socket_file.unlink()
+        except OSError:
+            pass
+        if watcher:
+            watcher.stop()
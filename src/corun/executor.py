@@ -1,14 +1,26 @@
 """Execute shell scripts."""
 
 import os
+import signal
 import subprocess
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 
+from . import trace
+from .archive import is_packed
+
 # ANSI codes
 ITALIC = '\033[3m'
 RESET = '\033[0m'
 
+# Same variable as corun.history.HISTORY_ENV, checked here so runs with
+# history off never import it
+HISTORY_ENV = "CORUN_HISTORY"
+
+# Peak RSS in KiB of the last child reaped by wait_script() (0 if none ran)
+last_max_rss = 0
+
 
 def has_shebang(script_path: Path) -> bool:
     """
@@ -21,6 +33,8 @@ def has_shebang(script_path: Path) -> bool:
         True if script starts with #!, False otherwise
     """
     try:
+        if is_packed(script_path):
+            return read_script_content(script_path)[:2] == b'#!'
         with open(script_path, 'rb') as f:
             first_bytes = f.read(2)
             return first_bytes == b'#!'
@@ -28,6 +42,46 @@ def has_shebang(script_path: Path) -> bool:
         return False
 
 
+def read_script_content(script_path: Path) -> bytes:
+    """
+    Read a script, on disk or inside a packed library.
+
+    Raises:
+        OSError: If the script cannot be read
+    """
+    if not is_packed(script_path):
+        return script_path.read_bytes()
+
+    from .archive import ArchiveError, read_script
+
+    try:
+        return read_script(script_path)
+    except (ArchiveError, KeyError) as e:
+        raise OSError(f"Cannot read {script_path}: {e}")
+
+
+def script_exists(script_path: Path) -> bool:
+    """
+    Check that a script exists, on disk or inside a packed library.
+
+    Args:
+        script_path: Path to the shell script
+
+    Returns:
+        True if the script can be read
+    """
+    if not is_packed(script_path):
+        return script_path.exists()
+
+    from .archive import Archive, ArchiveError
+
+    try:
+        with Archive(script_path.parent) as archive:
+            return script_path.stem in archive.scripts
+    except ArchiveError:
+        return False
+
+
 def get_default_shell() -> str:
     """
     Get the default shell to use for scripts without shebang.
@@ -39,48 +93,249 @@ def get_default_shell() -> str:
     return shell
 
 
-def execute_script(script_path: Path, args: list[str] | None = None) -> int:
+def build_command(script_path: Path, args: list[str] | None = None) -> list[str]:
     """
-    Execute a shell script with the given arguments.
+    Build the argv used to run a script.
+
+    Scripts without a shebang are run through the default shell (with a
+    warning on stderr). Scripts inside a packed library run from a memfd
+    (see corun.archive).
 
     Args:
         script_path: Path to the shell script
         args: Optional list of arguments to pass
 
     Returns:
-        Exit code from the script
+        Command line as a list of strings
+
+    Raises:
+        OSError: If a packed script cannot be prepared
     """
-    if not script_path.exists():
-        print(f"Error: Script not found: {script_path}", file=sys.stderr)
-        return 1
+    path = str(script_path)
+    if is_packed(script_path):
+        from .archive import exec_path
 
-    if not os.access(script_path, os.X_OK):
-        print(f"Error: Script not executable: {script_path}", file=sys.stderr)
-        print(f"\nTo fix, run:\n  chmod +x {script_path}", file=sys.stderr)
-        return 1
+        path = exec_path(script_path)
 
     # Check for shebang
     if not has_shebang(script_path):
         shell = get_default_shell()
         print(f"{ITALIC}Warning: '{script_path.name}' missing shebang, using {shell}{RESET}\n", file=sys.stderr)
         # Build command with explicit shell
-        cmd = [shell, str(script_path)]
+        cmd = [shell, path]
     else:
         # Build command normally
-        cmd = [str(script_path)]
+        cmd = [path]
 
     if args:
         cmd.extend(args)
 
+    return cmd
+
+
+def use_handoff() -> bool:
+    """Check whether exec handoff is enabled (CORUN_EXEC=1)."""
+    return os.environ.get("CORUN_EXEC", "") not in ("", "0")
+
+
+def exit_code_from_returncode(returncode: int) -> int:
+    """Map a Popen return code to a shell-style exit code (128+N on signal N)."""
+    if returncode < 0:
+        return 128 - returncode
+    return returncode
+
+
+def handoff_script(cmd: list[str]) -> int:
+    """
+    Replace the current process with the script.
+
+    Only returns if exec fails.
+
+    Args:
+        cmd: Command line from build_command()
+
+    Returns:
+        Exit code (1) if the exec failed
+    """
+    # Anything buffered would be lost once the process image is replaced
+    trace.report()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execv(cmd[0], cmd)
+    except OSError as e:
+        print(f"Error executing script: {e}", file=sys.stderr)
+        return 1
+
+
+def wait_script(process: subprocess.Popen) -> int:
+    """
+    Wait for a script's process and note its own peak RSS.
+
+    os.wait4() reports the usage of this child alone, unlike
+    getrusage(RUSAGE_CHILDREN), which is the maximum over every child
+    reaped so far.
+
+    Args:
+        process: Running script process
+
+    Returns:
+        The process's return code
+    """
+    global last_max_rss
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    last_max_rss = rusage.ru_maxrss
+    return process.returncode
+
+
+@contextmanager
+def forward_signals(*processes: subprocess.Popen):
+    """
+    While waiting on children, leave SIGINT to them and forward SIGTERM/SIGHUP.
+
+    Args:
+        processes: Running child processes
+    """
+
+    def forward_signal(signum, frame):
+        for process in processes:
+            process.send_signal(signum)
+
+    previous = {}
+    try:
+        previous[signal.SIGINT] = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for signum in (signal.SIGTERM, signal.SIGHUP):
+            previous[signum] = signal.signal(signum, forward_signal)
+    except ValueError:
+        # Not in the main thread: leave signal handling alone
+        pass
+
+    try:
+        yield
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+def spawn_script(cmd: list[str]) -> int:
+    """
+    Run the script as a child process and wait for it.
+
+    SIGINT is left to the child (it shares the terminal), while SIGTERM and
+    SIGHUP sent to corun are forwarded to it.
+
+    Args:
+        cmd: Command line from build_command()
+
+    Returns:
+        Exit code from the script (128+N if it was killed by signal N)
+    """
     try:
         # Run script, passing through stdin/stdout/stderr
-        result = subprocess.run(
-            cmd,
-            stdin=sys.stdin,
-            stdout=sys.stdout,
-            stderr=sys.stderr,
-        )
-        return result.returncode
+        with trace.span("spawn"):
+            process = subprocess.Popen(
+                cmd,
+                stdin=sys.stdin,
+                stdout=sys.stdout,
+                stderr=sys.stderr,
+            )
     except Exception as e:
         print(f"Error executing script: {e}", file=sys.stderr)
         return 1
+
+    with forward_signals(process), trace.span("runtime"):
+        returncode = wait_script(process)
+
+    return exit_code_from_returncode(returncode)
+
+
+def execute_script(
+    script_path: Path,
+    args: list[str] | None = None,
+    handoff: bool | None = None,
+    library_id: str | None = None,
+    cache_ttl: float | None = None,
+    cache_env: list[str] | None = None,
+) -> int:
+    """
+    Execute a shell script with the given arguments.
+
+    Args:
+        script_path: Path to the shell script
+        args: Optional list of arguments to pass
+        handoff: Replace the corun process with the script via exec instead
+            of waiting on a child. Defaults to CORUN_EXEC from the environment.
+        library_id: Library the script belongs to, recorded in the run
+            history (None for standalone scripts)
+        cache_ttl: Serve stdout and exit code from the result cache for this
+            many seconds (see corun.cache). Cached runs never use handoff.
+        cache_env: Environment variables that are part of the cache key
+
+    Returns:
+        Exit code from the script
+    """
+    trace.end("resolve")
+    trace.begin("check")
+
+    if not script_exists(script_path):
+        print(f"Error: Script not found: {script_path}", file=sys.stderr)
+        return 1
+
+    # Packed scripts are always run from an executable memfd
+    if not is_packed(script_path) and not os.access(script_path, os.X_OK):
+        print(f"Error: Script not executable: {script_path}", file=sys.stderr)
+        print(f"\nTo fix, run:\n  chmod +x {script_path}", file=sys.stderr)
+        return 1
+
+    try:
+        cmd = build_command(script_path, args)
+    except OSError as e:
+        print(f"Error executing script: {e}", file=sys.stderr)
+        return 1
+    trace.end("check")
+
+    def run() -> int:
+        return spawn_script(cmd)
+
+    if cache_ttl:
+        from . import cache
+
+        if cache.is_enabled():
+            # Output has to be captured, so the process cannot be replaced
+            handoff = False
+
+            def run() -> int:
+                return cache.run_cached(
+                    cmd, script_path, args, cache_ttl, cache_env or []
+                )
+
+    if handoff is None:
+        handoff = use_handoff()
+    if handoff:
+        return handoff_script(cmd)
+
+    if os.environ.get(HISTORY_ENV, "") in ("", "0"):
+        return run()
+
+    import time
+
+    from . import history
+
+    global last_max_rss
+    # Stays 0 if the script cannot be started or the result is cached
+    last_max_rss = 0
+    start = time.time()
+    started = time.perf_counter()
+    exit_code = run()
+    history.record_run(
+        command=script_path.stem,
+        library_id=library_id,
+        args=args,
+        start=start,
+        duration=time.perf_counter() - started,
+        exit_code=exit_code,
+        max_rss=last_max_rss,
+    )
+    return exit_code
@@ -0,0 +1,226 @@
+"""Run history of script executions, stored in SQLite.
+
+Enabled with CORUN_HISTORY=1 (default database ``~/.corun/history.db``) or
+CORUN_HISTORY=<path>. Each run executed as a child process appends one row;
+``corun stats`` summarizes durations and failure rates per command.
+
+The table is capped at CORUN_HISTORY_MAX rows (default 10000): every
+PRUNE_INTERVAL inserts, the oldest rows beyond the cap are deleted, so the
+database stays small and an insert stays a single cheap statement.
+"""
+
+import hashlib
+import math
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+HISTORY_ENV = "CORUN_HISTORY"
+HISTORY_MAX_ENV = "CORUN_HISTORY_MAX"
+
+# Default database file
+HISTORY_FILE = Path.home() / ".corun" / "history.db"
+
+# Default maximum number of rows kept
+HISTORY_MAX = 10000
+
+# Prune every N inserts
+PRUNE_INTERVAL = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    command TEXT NOT NULL,
+    library_id TEXT,
+    args_hash TEXT NOT NULL,
+    start REAL NOT NULL,
+    duration REAL NOT NULL,
+    exit_code INTEGER NOT NULL,
+    max_rss INTEGER NOT NULL
+)
+"""
+
+
+@dataclass
+class CommandStats:
+    """Latency and failure summary for one command."""
+
+    library_id: Optional[str]
+    command: str
+    runs: int
+    failures: int
+    p50: float
+    p95: float
+    p99: float
+    max_rss: int
+
+    @property
+    def label(self) -> str:
+        """Display name: '<library_id> <command>' or the script name."""
+        if self.library_id:
+            return f"{self.library_id} {self.command}"
+        return self.command
+
+    @property
+    def failure_rate(self) -> float:
+        """Fraction of runs with a non-zero exit code."""
+        return self.failures / self.runs if self.runs else 0.0
+
+
+def is_enabled() -> bool:
+    """Check whether run history is recorded."""
+    return os.environ.get(HISTORY_ENV, "") not in ("", "0")
+
+
+def get_history_file() -> Path:
+    """Get the database path (CORUN_HISTORY if it names a file)."""
+    value = os.environ.get(HISTORY_ENV, "")
+    if value and value not in ("0", "1"):
+        return Path(value).expanduser()
+    return HISTORY_FILE
+
+
+def get_history_max() -> int:
+    """Get the maximum number of rows kept (CORUN_HISTORY_MAX)."""
+    try:
+        return max(1, int(os.environ.get(HISTORY_MAX_ENV, HISTORY_MAX)))
+    except ValueError:
+        return HISTORY_MAX
+
+
+def hash_args(args: Optional[list[str]]) -> str:
+    """Hash script arguments so the history does not store them verbatim."""
+    data = "\0".join(args or []).encode("utf-8", "surrogateescape")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def connect(path: Path):
+    """Open the database, creating the schema if needed."""
+    import sqlite3
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=1.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def record_run(
+    command: str,
+    library_id: Optional[str],
+    args: Optional[list[str]],
+    start: float,
+    duration: float,
+    exit_code: int,
+    max_rss: int,
+) -> None:
+    """
+    Append one run to the history. Failures only print a warning.
+
+    Args:
+        command: Command (script) name
+        library_id: Library ID, or None for standalone scripts
+        args: Script arguments (only a hash is stored)
+        start: Start time (Unix timestamp)
+        duration: Wall time in seconds
+        exit_code: Exit code of the script
+        max_rss: Peak RSS of the script in KiB
+    """
+    import sqlite3
+
+    try:
+        conn = connect(get_history_file())
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (command, library_id, args_hash, start,"
+                    " duration, exit_code, max_rss) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        command,
+                        library_id,
+                        hash_args(args),
+                        start,
+                        duration,
+                        exit_code,
+                        max_rss,
+                    ),
+                )
+                if cursor.lastrowid % PRUNE_INTERVAL == 0:
+                    conn.execute(
+                        "DELETE FROM runs WHERE id <= ?",
+                        (cursor.lastrowid - get_history_max(),),
+                    )
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: could not record run history: {e}", file=sys.stderr)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def get_stats(
+    command: Optional[str] = None, since: Optional[float] = None
+) -> list[CommandStats]:
+    """
+    Summarize the history per command.
+
+    Args:
+        command: Only include this command or library ID
+        since: Only include runs started after this Unix timestamp
+
+    Returns:
+        Stats per command, slowest p95 first
+    """
+    path = get_history_file()
+    if not path.exists():
+        return []
+
+    query = "SELECT library_id, command, duration, exit_code, max_rss FROM runs"
+    conditions = []
+    params: list = []
+    if command:
+        conditions.append("(command = ? OR library_id = ?)")
+        params += [command, command]
+    if since is not None:
+        conditions.append("start >= ?")
+        params.append(since)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    conn = connect(path)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    groups: dict[tuple, list] = {}
+    for library_id, name, duration, exit_code, max_rss in rows:
+        groups.setdefault((library_id, name), []).append((duration, exit_code, max_rss))
+
+    stats = []
+    for (library_id, name), runs in groups.items():
+        durations = sorted(duration for duration, _, _ in runs)
+        stats.append(
+            CommandStats(
+                library_id=library_id,
+                command=name,
+                runs=len(runs),
+                failures=sum(1 for _, exit_code, _ in runs if exit_code != 0),
+                p50=percentile(durations, 50),
+                p95=percentile(durations, 95),
+                p99=percentile(durations, 99),
+                max_rss=max(max_rss for _, _, max_rss in runs),
+            )
+        )
+
+    stats.sort(key=lambda s: s.p95, reverse=True)
+    return stats
@@ -0,0 +1,261 @@
+"""Persistent on-disk index of the addons directory.
+
+The index caches the result of scanning each library so that a warm start
+only needs a few ``stat`` calls instead of globbing every library and
+re-parsing every ``metadata.json``.
+
+Each library entry is keyed on a fingerprint of its directory (mtime, inode)
+and of its ``metadata.json`` (mtime, inode, size). Adding or removing a script
+changes the directory mtime, editing metadata changes the metadata
+fingerprint; either one causes that library - and only that library - to be
+rescanned.
+"""
+
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .models import Library
+
+# Bump when the on-disk layout changes; older files are discarded.
+INDEX_VERSION = 2
+
+# Default index file
+INDEX_FILE = Path.home() / ".corun" / "index.json"
+
+
+def get_index_file() -> Path:
+    """Get the index file path."""
+    return INDEX_FILE
+
+
+def stat_fingerprint(st: os.stat_result) -> list[int]:
+    """Build a fingerprint from a stat result."""
+    return [st.st_mtime_ns, st.st_ino, st.st_size]
+
+
+def path_fingerprint(path: Path) -> Optional[list[int]]:
+    """Fingerprint a path, or None if it does not exist."""
+    try:
+        return stat_fingerprint(os.stat(path))
+    except OSError:
+        return None
+
+
+def library_fingerprint(library_path: Path) -> Optional[list]:
+    """
+    Fingerprint a library directory.
+
+    Args:
+        library_path: Path to the library directory
+
+    Returns:
+        [directory fingerprint, metadata.json fingerprint], or None if the
+        directory is gone
+    """
+    dir_fp = path_fingerprint(library_path)
+    if dir_fp is None:
+        return None
+    # Directory size is meaningless for change detection
+    dir_fp[2] = 0
+    return [dir_fp, path_fingerprint(library_path / "metadata.json")]
+
+
+def load_index() -> dict:
+    """Load the index file, returning an empty index if missing or invalid."""
+    try:
+        with open(get_index_file(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"version": INDEX_VERSION, "trees": {}}
+
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "trees": {}}
+    data.setdefault("trees", {})
+    return data
+
+
+def save_index(data: dict) -> None:
+    """Atomically write the index file. Failures are ignored."""
+    index_file = get_index_file()
+    tmp_file = index_file.with_name(f".{index_file.name}.{os.getpid()}.tmp")
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_file, index_file)
+    except OSError:
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
+
+
+def invalidate_index(library_path: Optional[Path] = None) -> None:
+    """
+    Invalidate the index after the addons directory was modified.
+
+    Args:
+        library_path: Library directory that changed. Only its entry and the
+            top-level listing are dropped. If None, the whole index file is
+            removed.
+    """
+    if library_path is None:
+        try:
+            get_index_file().unlink()
+        except OSError:
+            pass
+        return
+
+    data = load_index()
+    tree = data["trees"].get(str(library_path.parent))
+    if not tree:
+        return
+    tree.pop("fingerprint", None)
+    tree.get("libraries", {}).pop(library_path.name, None)
+    save_index(data)
+
+
+def get_fresh_tree(addons_dir: Path, data: Optional[dict] = None) -> Optional[dict]:
+    """
+    Get the index tree for an addons directory if it is fully up to date.
+
+    Only stats the addons directory and each library; nothing is rescanned.
+
+    Args:
+        addons_dir: Addons directory
+        data: Loaded index (default: read the index file)
+
+    Returns:
+        The index tree, or None if missing or any part of it is stale
+    """
+    if data is None:
+        data = load_index()
+    tree = data["trees"].get(str(addons_dir))
+    if not tree or "dirs" not in tree:
+        return None
+    if tree.get("fingerprint") != path_fingerprint(addons_dir):
+        return None
+
+    libraries = tree.get("libraries", {})
+    for dir_name in tree["dirs"]:
+        entry = libraries.get(dir_name)
+        if entry is None:
+            return None
+        if entry["fingerprint"] != library_fingerprint(addons_dir / dir_name):
+            return None
+
+    return tree
+
+
+def get_fresh_names(
+    addons_dirs: list[Path],
+) -> Optional[dict[str, tuple[Path, Optional[dict]]]]:
+    """
+    Resolve top-level names from the fresh index trees of several layers.
+
+    Follows scanner.merge_layers: a name belongs to the highest layer that
+    defines it (a library before a standalone script of the same layer).
+    Only stats; nothing is rescanned.
+
+    Args:
+        addons_dirs: Addons layers, highest precedence first
+
+    Returns:
+        Mapping of name to (library path, index entry) or (script path,
+        None), or None if the tree of an existing layer is missing or stale
+    """
+    data = load_index()
+    names: dict[str, tuple[Path, Optional[dict]]] = {}
+    for addons_dir in addons_dirs:
+        tree = get_fresh_tree(addons_dir, data)
+        if tree is None:
+            if path_fingerprint(addons_dir) is None:
+                # Layer does not exist
+                continue
+            return None
+
+        defined: dict[str, tuple[Path, Optional[dict]]] = {}
+        for dir_name in tree["dirs"]:
+            entry = tree["libraries"][dir_name]
+            library_id = entry["library_id"]
+            if library_id and library_id not in defined:
+                defined[library_id] = (addons_dir / dir_name, entry)
+        for name in tree["scripts"]:
+            defined.setdefault(name, (addons_dir / f"{name}.sh", None))
+        for name, value in defined.items():
+            names.setdefault(name, value)
+    return names
+
+
+def library_to_entry(library: Optional["Library"], fingerprint: list) -> dict:
+    """
+    Serialize a scanned library into an index entry.
+
+    Args:
+        library: Scanned library, or None if the directory has no scripts
+        fingerprint: Fingerprint from library_fingerprint()
+
+    Returns:
+        JSON-serializable index entry
+    """
+    if library is None:
+        return {"fingerprint": fingerprint, "library_id": None}
+
+    metadata = library.metadata
+    if metadata is None:
+        metadata_data = None
+    elif hasattr(metadata, "model_dump"):
+        metadata_data = metadata.model_dump()
+    else:
+        metadata_data = asdict(metadata)
+
+    return {
+        "fingerprint": fingerprint,
+        "library_id": library.library_id,
+        "metadata": metadata_data,
+        "commands": [cmd.name for cmd in library.commands],
+    }
+
+
+def library_from_entry(library_path: Path, entry: dict) -> Optional["Library"]:
+    """
+    Rebuild a library from an index entry without touching the filesystem.
+
+    Args:
+        library_path: Path to the library directory
+        entry: Index entry from library_to_entry()
+
+    Returns:
+        Library, or None if the entry records a directory without scripts
+    """
+    # Imported here so the completion fast path can read the index
+    # without loading the models
+    from .models import Command, Library, MetadataRecord
+
+    library_id = entry["library_id"]
+    if library_id is None:
+        return None
+
+    # Metadata was validated when the entry was written
+    metadata_data = entry.get("metadata")
+    metadata = MetadataRecord.from_dict(metadata_data) if metadata_data else None
+
+    library = Library(
+        library_id=library_id,
+        path=library_path,
+        metadata=metadata,
+    )
+    for name in entry["commands"]:
+        library.commands.append(
+            Command(
+                name=name,
+                directory=library_path,
+                library_id=library_id,
+            )
+        )
+
+    return library
@@ -0,0 +1,321 @@
+"""Atomic library installation.
+
+A library is first built in a hidden staging directory inside the addons
+directory (same filesystem, skipped by the scanner), then published with a
+single rename. Scripts are hardlinked from the content-addressed store
+(corun.store); other files are reflinked (FICLONE) where the filesystem
+supports it, optionally hardlinked, and copied otherwise. An existing
+library is swapped out atomically with ``renameat2(RENAME_EXCHANGE)`` where
+available, so readers always see either the old or the new tree, and the
+old tree is deleted by a detached background process.
+
+Staging and trash directories left behind by a crash are removed by the
+next install.
+"""
+
+import errno
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Hidden directory prefixes inside the addons directory
+STAGING_PREFIX = ".corun-staging-"
+TRASH_PREFIX = ".corun-trash-"
+
+# Leftover staging/trash directories older than this are removed (seconds)
+STALE_AGE = 3600
+
+# ioctl number of FICLONE (linux/fs.h)
+FICLONE = 0x40049409
+
+# renameat2() flag (linux/fs.h)
+RENAME_EXCHANGE = 1 << 1
+AT_FDCWD = -100
+
+# Mode given to library scripts
+SCRIPT_MODE = 0o755
+
+
+@dataclass
+class InstallStats:
+    """How files were placed into the staging directory."""
+
+    reflinked: int = 0
+    linked: int = 0
+    copied: int = 0
+    # Scripts linked from the object store, and how many were already there
+    stored: int = 0
+    deduplicated: int = 0
+
+
+def reflink(source: Path, target: Path) -> bool:
+    """
+    Clone a file with FICLONE (shared extents, copy-on-write).
+
+    Returns:
+        True on success, False if the filesystem cannot clone
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    src_fd = os.open(source, os.O_RDONLY)
+    try:
+        dst_fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        except OSError:
+            os.close(dst_fd)
+            os.unlink(target)
+            return False
+        os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(source, target)
+    return True
+
+
+def place_file(source: Path, target: Path, link: bool, stats: InstallStats) -> None:
+    """Put one file into the staging tree using the cheapest method available."""
+    if reflink(source, target):
+        stats.reflinked += 1
+        return
+    if link:
+        try:
+            os.link(source, target)
+            stats.linked += 1
+            return
+        except OSError:
+            # Cross-device, or links not supported
+            pass
+    shutil.copy2(source, target)
+    stats.copied += 1
+
+
+def stage_tree(source: Path, staging: Path, link: bool = False) -> InstallStats:
+    """
+    Build a copy of a library in the staging directory.
+
+    Top-level scripts are hardlinked from the object store (see
+    corun.store), falling back to a private executable copy if the store
+    is unusable. With `link`, other files are hardlinked to the source
+    when reflinks are unavailable (they then share the inode: editing the
+    source in place changes the installed file).
+
+    Args:
+        source: Library folder to install
+        staging: Staging directory to create
+        link: Allow hardlinks
+
+    Returns:
+        Counts of how files were placed
+    """
+    from .store import link_object
+
+    stats = InstallStats()
+    staging.mkdir()
+    pending = [(source, staging, True)]
+    while pending:
+        src_dir, dst_dir, top = pending.pop()
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                src = Path(entry.path)
+                dst = dst_dir / entry.name
+                if entry.is_dir():
+                    dst.mkdir()
+                    pending.append((src, dst, False))
+                    continue
+                if not (top and entry.name.endswith(".sh")):
+                    place_file(src, dst, link, stats)
+                    continue
+                try:
+                    stats.deduplicated += link_object(src, dst)
+                    stats.stored += 1
+                except OSError:
+                    place_file(src, dst, False, stats)
+                    dst.chmod(SCRIPT_MODE)
+        shutil.copystat(src_dir, dst_dir)
+    return stats
+
+
+def exchange(a: Path, b: Path) -> bool:
+    """
+    Atomically swap two paths with renameat2(RENAME_EXCHANGE).
+
+    Returns:
+        True if swapped, False if the platform or filesystem cannot do it
+    """
+    try:
+        import ctypes
+    except ImportError:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        return False
+    renameat2.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_uint,
+    ]
+    result = renameat2(
+        AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE
+    )
+    if result == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+        return False
+    raise OSError(err, os.strerror(err), str(a))
+
+
+def publish(staging: Path, target: Path) -> Optional[Path]:
+    """
+    Move a staged library into place.
+
+    Args:
+        staging: Complete staging directory
+        target: Library directory to create or replace
+
+    Returns:
+        Path of the replaced tree (to delete), or None if there was none
+
+    Raises:
+        OSError: If the staged library cannot be moved into place (an
+            existing library is left at `target`)
+    """
+    trash = target.parent / f"{TRASH_PREFIX}{target.name}-{uuid.uuid4().hex[:8]}"
+    if not target.exists():
+        os.rename(staging, target)
+        return None
+    if exchange(staging, target):
+        # The staging path now holds the old tree
+        try:
+            os.rename(staging, trash)
+        except OSError:
+            return staging
+    else:
+        # Two renames: the library is briefly missing, never partial
+        os.rename(target, trash)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Put the old tree back rather than leave no library
+            os.rename(trash, target)
+            raise
+    return trash
+
+
+def discard(path: Path) -> Path:
+    """
+    Move a library out of the way atomically, for deletion.
+
+    Returns:
+        Path of the trash directory
+    """
+    trash = path.parent / f"{TRASH_PREFIX}{path.name}-{uuid.uuid4().hex[:8]}"
+    os.rename(path, trash)
+    return trash
+
+
+# Deletes sys.argv[1], a directory tree or a packed library file
+REMOVE_CODE = (
+    "import os, shutil, sys; p = sys.argv[1]; "
+    "shutil.rmtree(p, ignore_errors=True) if os.path.isdir(p) else os.unlink(p)"
+)
+
+
+def remove_in_background(path: Path) -> None:
+    """Delete a library tree or archive from a detached process, without waiting."""
+    try:
+        subprocess.Popen(
+            [sys.executable, "-c", REMOVE_CODE, str(path)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def cleanup_stale(addons_dir: Path, max_age: float = STALE_AGE) -> None:
+    """Remove staging and trash directories left behind by a crash."""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(addons_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.name.startswith((STAGING_PREFIX, TRASH_PREFIX)):
+            continue
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                remove_in_background(Path(entry.path))
+        except OSError:
+            pass
+
+
+def install_tree(source: Path, target: Path, link: bool = False) -> InstallStats:
+    """
+    Install a library directory atomically.
+
+    Args:
+        source: Library folder to install
+        target: Library directory inside the addons directory
+        link: Allow hardlinks to the source (see stage_tree)
+
+    Returns:
+        Counts of how files were placed
+
+    Raises:
+        OSError: If staging or publishing fails (the existing library, if
+            any, is left untouched)
+    """
+    cleanup_stale(target.parent)
+    staging = target.parent / f"{STAGING_PREFIX}{target.name}-{uuid.uuid4().hex[:8]}"
+    try:
+        stats = stage_tree(source, staging, link)
+        old = publish(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if old is not None:
+        remove_in_background(old)
+    return stats
+
+
+def install_file(source: Path, target: Path) -> None:
+    """
+    Install a packed library archive atomically.
+
+    Args:
+        source: Archive to install
+        target: Archive path inside the addons directory
+
+    Raises:
+        OSError: If staging or publishing fails
+    """
+    cleanup_stale(target.parent)
+    staging = target.parent / f"{STAGING_PREFIX}{target.name}-{uuid.uuid4().hex[:8]}"
+    try:
+        place_file(source, staging, False, InstallStats())
+        staging.chmod(0o644)
+        old = publish(staging, target)
+    except BaseException:
+        staging.unlink(missing_ok=True)
+        raise
+    if old is not None:
+        remove_in_background(old)
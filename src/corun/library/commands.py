@@ -1,6 +1,6 @@
 """Library management commands."""
 
-import shutil
+import os
 from pathlib import Path
 from typing import Optional
 
@@ -8,27 +8,33 @@ import typer
 from rich.console import Console
 from rich.table import Table
 
+from ..builtin_commands import BUILTIN_COMMANDS, BUILTIN_HELP
+from ..registry import Registry, get_registry, invalidate_registry
 from ..scanner import (
     ensure_addons_dir,
     get_addons_dir,
-    get_library_by_id,
-    load_metadata,
-    scan_addons,
+    list_dir,
     scan_library,
+    validate_metadata,
 )
 
-app = typer.Typer(help="Manage script libraries")
+app = typer.Typer(help=BUILTIN_HELP["library"])
 console = Console()
 
 
 @app.command("list")
 def list_libraries():
     """List all installed libraries."""
-    libraries, standalone, conflicts = scan_addons()
+    registry = get_registry()
+    libraries, standalone, conflicts = (
+        registry.libraries,
+        registry.standalone,
+        registry.conflicts,
+    )
 
-    if not libraries and not standalone:
+    if not libraries and not standalone and not registry.builtin_shadowed:
         console.print("[yellow]No libraries or scripts installed.[/yellow]")
-        console.print(f"\nAddons directory: {get_addons_dir()}")
+        print_layers(registry)
         return
 
     if libraries:
@@ -64,11 +70,42 @@ def list_libraries():
             console.print(f"    [cyan]mv {cmd.script_path} {cmd.script_path.parent}/{name}_script.sh[/cyan]")
         console.print()
 
+    if registry.shadowed:
+        console.print("[bold]Shadowed by a higher layer:[/bold]\n")
+        for name, hidden, owner in registry.shadowed:
+            console.print(f"  • [dim]{name}[/dim]: {hidden} [dim](using {owner})[/dim]")
+        console.print()
+
+    if registry.builtin_shadowed:
+        console.print("[yellow bold]Shadowed by a built-in command:[/yellow bold]\n")
+        for name, hidden in registry.builtin_shadowed:
+            console.print(f"  • [yellow]{name}[/yellow]: {hidden} [dim](rename it to run it)[/dim]")
+        console.print()
+
+    print_layers(registry)
+
+
+def warn_builtin_name(library_id: str) -> None:
+    """Warn that a library named like a built-in command cannot be run."""
+    if library_id in BUILTIN_COMMANDS:
+        console.print(
+            f"[yellow]⚠️  '{library_id}' is a built-in corun command; "
+            f"this library cannot be run until it is renamed.[/yellow]"
+        )
+
+
+def print_layers(registry: Registry) -> None:
+    """Show the addons search path, highest precedence first."""
+    console.print("\nAddons layers:")
+    for layer in registry.layers:
+        missing = "" if layer.path.is_dir() else " [dim](missing)[/dim]"
+        console.print(f"  {layer.name}: {layer.path}{missing}")
+
 
 @app.command("info")
 def library_info(library_id: str = typer.Argument(..., help="Library ID")):
     """Show detailed information about a library."""
-    library = get_library_by_id(library_id)
+    library = get_registry().get_library(library_id)
 
     if not library:
         console.print(f"[red]Error: Library '{library_id}' not found.[/red]")
@@ -92,19 +129,97 @@ def library_info(library_id: str = typer.Argument(..., help="Library ID")):
     console.print(f"[bold]Path:[/bold] {library.path}")
 
 
+def install_archive(
+    source_path: Path, library_id: Optional[str], force: bool
+) -> None:
+    """Install a packed library archive (see corun.archive)."""
+    from ..archive import ARCHIVE_SUFFIX, Archive, ArchiveError
+    from ..install import discard, install_file, remove_in_background
+    from ..metadata import Metadata
+
+    try:
+        with Archive(source_path) as archive:
+            metadata_data, script_names = archive.metadata, list(archive.scripts)
+    except ArchiveError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not script_names:
+        console.print("[red]Error: No .sh files found in archive.[/red]")
+        raise typer.Exit(1)
+
+    metadata = None
+    if metadata_data is not None:
+        try:
+            metadata = Metadata(**metadata_data)
+        except (TypeError, ValueError) as e:
+            console.print(f"[red]Error: Invalid metadata.json in archive:[/red] {e}")
+            raise typer.Exit(1)
+
+    if library_id is None:
+        library_id = (
+            metadata.library_id
+            if metadata
+            else source_path.name.removesuffix(ARCHIVE_SUFFIX)
+        )
+
+    addons_dir = ensure_addons_dir()
+    target_path = addons_dir / f"{library_id}{ARCHIVE_SUFFIX}"
+    # The same library installed as a directory is replaced too
+    unpacked_path = addons_dir / library_id
+
+    if (target_path.exists() or unpacked_path.is_dir()) and not force:
+        console.print(f"[yellow]Library '{library_id}' already exists.[/yellow]")
+        if not typer.confirm("Overwrite?"):
+            raise typer.Abort()
+
+    try:
+        install_file(source_path, target_path)
+        if unpacked_path.is_dir():
+            remove_in_background(discard(unpacked_path))
+            invalidate_registry(unpacked_path)
+    except OSError as e:
+        console.print(f"[red]Error: Install failed: {e}[/red]")
+        raise typer.Exit(1)
+
+    invalidate_registry(target_path)
+
+    console.print(f"[green]✓ Installed packed library: {library_id}[/green]")
+    console.print(f"  Path: {target_path}")
+    warn_builtin_name(library_id)
+    console.print(f"  Commands: {', '.join(script_names)}")
+
+
 @app.command("install")
 def install_library(
-    source_path: Path = typer.Argument(..., help="Path to library folder"),
+    source_path: Path = typer.Argument(
+        ..., help="Path to library folder or packed .corunlib archive"
+    ),
     library_id: Optional[str] = typer.Option(
         None, "--id", "-i", help="Custom library ID"
     ),
     force: bool = typer.Option(False, "--force", "-f", help="Overwrite if exists"),
+    link: bool = typer.Option(
+        False, "--link", help="Hardlink files to the source if reflinks fail"
+    ),
 ):
-    """Install a library from a local path."""
+    """
+    Install a library from a local path.
+
+    The library is staged next to the addons and swapped in atomically, so
+    running commands never see a partial install.
+    """
+    from ..archive import ARCHIVE_SUFFIX, is_archive
+    from ..install import discard, install_tree, remove_in_background
+
     if not source_path.exists():
         console.print(f"[red]Error: Path not found: {source_path}[/red]")
         raise typer.Exit(1)
 
+    if source_path.is_file() and is_archive(source_path):
+        install_archive(source_path, library_id, force)
+        return
+
     if not source_path.is_dir():
         console.print(f"[red]Error: Not a directory: {source_path}[/red]")
         raise typer.Exit(1)
@@ -115,37 +230,214 @@ def install_library(
         console.print("[red]Error: No .sh files found in library.[/red]")
         raise typer.Exit(1)
 
+    # Validate metadata (full schema check)
+    metadata, errors = validate_metadata(source_path)
+    if errors:
+        console.print("[red]Error: Invalid metadata.json:[/red]")
+        for error in errors:
+            console.print(f"  • {error}")
+        raise typer.Exit(1)
+
     # Determine library ID
-    metadata = load_metadata(source_path)
     if library_id is None:
         library_id = metadata.library_id if metadata else source_path.name
 
     # Target path
     addons_dir = ensure_addons_dir()
     target_path = addons_dir / library_id
+    # The same library installed as a packed archive is replaced too
+    packed_path = addons_dir / f"{library_id}{ARCHIVE_SUFFIX}"
 
     # Check if exists
-    if target_path.exists() and not force:
+    if (target_path.exists() or packed_path.is_file()) and not force:
         console.print(f"[yellow]Library '{library_id}' already exists.[/yellow]")
         if not typer.confirm("Overwrite?"):
             raise typer.Abort()
-        shutil.rmtree(target_path)
 
-    # Copy library
-    shutil.copytree(source_path, target_path)
+    # Stage, then swap in (the old tree is deleted in the background)
+    try:
+        stats = install_tree(source_path, target_path, link)
+        if packed_path.is_file():
+            remove_in_background(discard(packed_path))
+            invalidate_registry(packed_path)
+    except OSError as e:
+        console.print(f"[red]Error: Install failed: {e}[/red]")
+        raise typer.Exit(1)
 
-    # Make scripts executable
-    for script in target_path.glob("*.sh"):
-        script.chmod(0o755)
+    invalidate_registry(target_path)
 
     console.print(f"[green]✓ Installed library: {library_id}[/green]")
     console.print(f"  Path: {target_path}")
+    warn_builtin_name(library_id)
 
     # Show available commands
     lib = scan_library(target_path)
     if lib:
         cmd_names = [c.name for c in lib.commands]
         console.print(f"  Commands: {', '.join(cmd_names)}")
+    if stats.stored:
+        console.print(
+            f"  Scripts: {stats.stored} linked from store "
+            f"({stats.deduplicated} already stored)"
+        )
+
+
+@app.command("pack")
+def pack_library(
+    source_path: Path = typer.Argument(..., help="Library folder to pack"),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Archive to write (default: ./<id>.corunlib)"
+    ),
+):
+    """Pack a library folder into a single .corunlib file for distribution."""
+    from ..archive import ARCHIVE_SUFFIX
+    from ..archive import pack_library as write_archive
+
+    if not source_path.is_dir():
+        console.print(f"[red]Error: Not a directory: {source_path}[/red]")
+        raise typer.Exit(1)
+
+    metadata, errors = validate_metadata(source_path)
+    if errors:
+        console.print("[red]Error: Invalid metadata.json:[/red]")
+        for error in errors:
+            console.print(f"  • {error}")
+        raise typer.Exit(1)
+
+    library_id = metadata.library_id if metadata else source_path.resolve().name
+    output = output or Path.cwd() / f"{library_id}{ARCHIVE_SUFFIX}"
+    try:
+        names = write_archive(
+            source_path, output, metadata.model_dump() if metadata else None
+        )
+    except OSError as e:
+        console.print(f"[red]Error: Cannot write archive: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not names:
+        output.unlink(missing_ok=True)
+        console.print("[red]Error: No .sh files found in library.[/red]")
+        raise typer.Exit(1)
+
+    console.print(f"[green]✓ Packed {len(names)} scripts:[/green] {output}")
+    skipped = [
+        entry.name
+        for entry in os.scandir(source_path)
+        if entry.name != "metadata.json" and not entry.name.endswith(".sh")
+    ]
+    if skipped:
+        console.print(
+            f"[yellow]Not packed (archives hold scripts only):[/yellow] "
+            f"{', '.join(sorted(skipped))}"
+        )
+
+
+@app.command("validate")
+def validate_library(
+    path: Path = typer.Argument(..., help="Library folder or installed library ID"),
+):
+    """Validate a library's metadata.json and scripts."""
+    from ..executor import has_shebang
+
+    library_path = path
+    if not library_path.is_dir():
+        library = get_registry().get_library(str(path))
+        if not library:
+            console.print(f"[red]Error: Not a directory or library ID: {path}[/red]")
+            raise typer.Exit(1)
+        library_path = library.path
+        if not library_path.is_dir():
+            console.print(
+                f"[red]Error: '{path}' is a packed library "
+                f"(validate the folder it was packed from)[/red]"
+            )
+            raise typer.Exit(1)
+
+    errors: list[str] = []
+    warnings: list[str] = []
+
+    metadata, metadata_errors = validate_metadata(library_path)
+    errors.extend(f"metadata.json: {error}" for error in metadata_errors)
+    if metadata is None and not metadata_errors:
+        warnings.append("No metadata.json (library ID defaults to folder name)")
+
+    _, script_names, _ = list_dir(library_path)
+    if not script_names:
+        errors.append("No .sh files found")
+
+    for name in script_names:
+        script = library_path / f"{name}.sh"
+        if not os.access(script, os.X_OK):
+            warnings.append(f"{script.name}: not executable (chmod +x)")
+        if not has_shebang(script):
+            warnings.append(f"{script.name}: missing shebang")
+
+    if metadata:
+        for name in metadata.commands:
+            if name not in script_names:
+                warnings.append(f"metadata.json lists missing command '{name}'")
+        for name, ttl in metadata.cache.items():
+            if name not in script_names:
+                warnings.append(f"metadata.json caches missing command '{name}'")
+            if ttl <= 0:
+                warnings.append(f"metadata.json cache TTL for '{name}' is not positive")
+
+    for error in errors:
+        console.print(f"[red]✗ {error}[/red]")
+    for warning in warnings:
+        console.print(f"[yellow]! {warning}[/yellow]")
+
+    if errors:
+        raise typer.Exit(1)
+    console.print(f"[green]✓ Library is valid: {library_path}[/green]")
+
+
+@app.command("gc")
+def gc_objects():
+    """Remove stored scripts no installed library uses any more."""
+    from ..store import gc, get_objects_dir
+
+    removed, freed = gc()
+    console.print(
+        f"[green]✓ Removed {removed} unreferenced objects[/green] "
+        f"({freed / 1024:.1f} KiB) from {get_objects_dir()}"
+    )
+
+
+@app.command("watch")
+def watch_libraries(
+    polling: bool = typer.Option(
+        False, "--polling", help="Poll instead of using inotify"
+    ),
+):
+    """Keep the command index up to date as addons change (Ctrl+C to stop)."""
+    import time
+
+    from ..watcher import start_watcher
+
+    def report(registry, changes):
+        if changes.overflow:
+            names = "all layers"
+        else:
+            names = ", ".join(sorted(changes.dirs)) or "top level"
+            names = f"{names} in {changes.addons_dir}"
+        console.print(
+            f"[green]✓ Updated[/green] {names} "
+            f"[dim]({len(registry.libraries)} libraries, "
+            f"{len(registry.standalone)} scripts)[/dim]"
+        )
+
+    get_registry()
+    watcher = start_watcher(report, polling=polling)
+    paths = ", ".join(str(path) for path in watcher.paths)
+    console.print(f"Watching [cyan]{paths}[/cyan] [dim]({watcher.backend})[/dim]")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
 
 
 @app.command("remove")
@@ -154,11 +446,18 @@ def remove_library(
     force: bool = typer.Option(False, "--force", "-f", help="Skip confirmation"),
 ):
     """Remove an installed library."""
-    library = get_library_by_id(library_id)
+    library = get_registry().get_library(library_id)
 
     if not library:
         console.print(f"[red]Error: Library '{library_id}' not found.[/red]")
         raise typer.Exit(1)
+    if library.path.parent != get_addons_dir():
+        # Project and system layers are managed outside corun
+        console.print(
+            f"[red]Error: Library '{library_id}' is not in the user addons "
+            f"directory: {library.path}[/red]"
+        )
+        raise typer.Exit(1)
 
     # Show what will be removed
     console.print(f"\n[yellow]Will remove library: {library.name}[/yellow]")
@@ -169,8 +468,11 @@ def remove_library(
     if not force and not typer.confirm("Are you sure?"):
         raise typer.Abort()
 
-    # Remove
-    shutil.rmtree(library.path)
+    # Remove: move out of the addons first, then delete in the background
+    from ..install import discard, remove_in_background
+
+    remove_in_background(discard(library.path))
+    invalidate_registry(library.path)
     console.print(f"[green]✓ Removed library: {library_id}[/green]")
 
 
@@ -288,6 +590,8 @@ echo "Arguments: $@"
     # Make executable
     example_path.chmod(0o755)
 
+    invalidate_registry(target_path)
+
     # Success message
     console.print(f"[green]✓ Created library: {library_id}[/green]")
     console.print(f"  Path: {target_path}")
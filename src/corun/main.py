@@ -1,15 +1,17 @@
 """Corun CLI - Main entry point."""
 
+import os
 import sys
+from pathlib import Path
 from typing import Optional
 
 import typer
-from rich.console import Console
 
-from . import __version__
+from . import __version__, trace
+from .builtin_commands import BUILTIN_COMMANDS, BUILTIN_HELP
+from .console import console
 from .executor import execute_script
-from .library.commands import app as library_app
-from .scanner import get_library_by_id, scan_addons
+from .registry import get_registry
 
 # Main app
 app = typer.Typer(
@@ -19,10 +21,19 @@ app = typer.Typer(
     no_args_is_help=True,
 )
 
-# Add library subcommand
-app.add_typer(library_app, name="library")
 
-console = Console()
+def register_library_app():
+    """Add the library subcommand (imported on demand, it pulls in rich)."""
+    from .library.commands import app as library_app
+
+    app.add_typer(library_app, name="library")
+
+
+def register_pipeline_app():
+    """Add the pipeline subcommand (imported on demand)."""
+    from .pipeline.commands import app as pipeline_app
+
+    app.add_typer(pipeline_app, name="pipeline")
 
 
 def version_callback(value: bool):
@@ -47,17 +58,16 @@ def main(
     pass
 
 
-@app.command(name="completion")
+# Help texts of the built-in commands are in builtin_commands.BUILTIN_HELP, shared
+# with the completion fast path
+
+
+@app.command(name="completion", help=BUILTIN_HELP["completion"])
 def completion_command(
     shell: Optional[str] = typer.Argument(
         None, help="Shell type (bash/zsh/fish). Auto-detect if not specified."
     ),
 ):
-    """
-    Show shell completion setup instructions.
-    
-    This command helps you set up tab completion for your shell.
-    """
     from .completion import show_completion_help
     
     show_completion_help(shell)
@@ -74,14 +84,10 @@ def run_command(
 
     This is a fallback command - normally dynamic commands are used.
     """
-    libraries, standalone = scan_addons()
+    registry = get_registry()
 
     # Check if target is a library
-    library = None
-    for lib in libraries:
-        if lib.library_id == target:
-            library = lib
-            break
+    library = registry.get_library(target)
 
     if library:
         # Library command
@@ -94,11 +100,7 @@ def run_command(
             return
 
         # Find command in library
-        cmd_obj = None
-        for cmd in library.commands:
-            if cmd.name == command:
-                cmd_obj = cmd
-                break
+        cmd_obj = registry.get_command(target, command)
 
         if not cmd_obj:
             console.print(
@@ -110,21 +112,27 @@ def run_command(
             raise typer.Exit(1)
 
         # Execute
-        exit_code = execute_script(cmd_obj.script_path, args)
+        exit_code = execute_script(
+            cmd_obj.script_path,
+            args,
+            library_id=library.library_id,
+            cache_ttl=library.get_cache_ttl(cmd_obj.name),
+            cache_env=library.cache_env,
+        )
         raise typer.Exit(exit_code)
 
     # Check standalone
-    for cmd in standalone:
-        if cmd.name == target:
-            # Standalone script - command becomes first arg
-            all_args = []
-            if command:
-                all_args.append(command)
-            if args:
-                all_args.extend(args)
-
-            exit_code = execute_script(cmd.script_path, all_args or None)
-            raise typer.Exit(exit_code)
+    cmd = registry.get_standalone(target)
+    if cmd:
+        # Standalone script - command becomes first arg
+        all_args = []
+        if command:
+            all_args.append(command)
+        if args:
+            all_args.extend(args)
+
+        exit_code = execute_script(cmd.script_path, all_args or None)
+        raise typer.Exit(exit_code)
 
     # Not found
     console.print(f"[red]Error: '{target}' not found[/red]")
@@ -132,6 +140,271 @@ def run_command(
     raise typer.Exit(1)
 
 
+def resolve_target(target: str, command: Optional[str]):
+    """
+    Resolve a library command or standalone script, printing errors.
+
+    Libraries take priority over standalone scripts with the same name.
+
+    Args:
+        target: Library ID or standalone script name
+        command: Command name (library) or first argument (standalone)
+
+    Returns:
+        Tuple of (Command, leading args)
+
+    Raises:
+        typer.Exit: If nothing matches
+    """
+    registry = get_registry()
+
+    library = registry.get_library(target)
+    if library:
+        cmd = registry.get_command(target, command) if command else None
+        if cmd:
+            return cmd, []
+        if command:
+            console.print(
+                f"[red]Error: Command '{command}' not found in '{target}'[/red]"
+            )
+        else:
+            console.print(f"[red]Error: Missing command for library '{target}'[/red]")
+        console.print("\nAvailable commands:")
+        for cmd in library.commands:
+            console.print(f"  • {cmd.name}")
+        raise typer.Exit(1)
+
+    cmd = registry.get_standalone(target)
+    if cmd:
+        return cmd, [command] if command else []
+
+    console.print(f"[red]Error: '{target}' not found[/red]")
+    console.print("\nRun [cyan]corun library list[/cyan] to see available commands.")
+    raise typer.Exit(1)
+
+
+@app.command(name="parallel", help=BUILTIN_HELP["parallel"])
+def parallel_command(
+    target: str = typer.Argument(..., help="Library ID or standalone script name"),
+    command: Optional[str] = typer.Argument(None, help="Command name (if library)"),
+    jobs: int = typer.Option(4, "--jobs", "-j", help="Maximum concurrent jobs"),
+    file: Optional[typer.FileText] = typer.Option(
+        None, "--file", "-f", help="Read argument sets from file instead of stdin"
+    ),
+    output: str = typer.Option(
+        "prefix", "--output", "-o", help="Output mode: prefix, buffer or log"
+    ),
+    log_dir: Optional[Path] = typer.Option(
+        None, "--log-dir", help="Directory for per-job logs (--output log)"
+    ),
+):
+    from .executor import build_command, script_exists
+    from .parallel import OUTPUT_MODES, print_summary, read_arg_sets, run_parallel
+
+    if output not in OUTPUT_MODES:
+        console.print(
+            f"[red]Error: Invalid output mode '{output}' "
+            f"(choose from {', '.join(OUTPUT_MODES)})[/red]"
+        )
+        raise typer.Exit(1)
+
+    cmd, leading_args = resolve_target(target, command)
+    if not script_exists(cmd.script_path):
+        console.print(f"[red]Error: Script not found: {cmd.script_path}[/red]")
+        raise typer.Exit(1)
+
+    try:
+        arg_sets = read_arg_sets(file or sys.stdin)
+    except ValueError as e:
+        console.print(f"[red]Error: Invalid argument set: {e}[/red]")
+        raise typer.Exit(1)
+    if not arg_sets:
+        console.print("[yellow]No argument sets given.[/yellow]")
+        raise typer.Exit(0)
+
+    # Resolve once for all jobs
+    try:
+        argv = build_command(cmd.script_path, leading_args)
+    except OSError as e:
+        console.print(f"[red]Error executing script: {e}[/red]")
+        raise typer.Exit(1)
+    results = run_parallel(argv, arg_sets, jobs, output, log_dir)
+    raise typer.Exit(print_summary(results))
+
+
+@app.command(name="chain", help=BUILTIN_HELP["chain"])
+def chain_command(
+    stages: list[str] = typer.Argument(
+        ..., help="Commands as typed after 'corun', quoted, in pipe order"
+    ),
+    log_file: Optional[Path] = typer.Option(
+        None, "--log", "-l", help="Also write the final output to this file"
+    ),
+    pipefail: bool = typer.Option(
+        False, "--pipefail", help="Fail if any stage fails, not only the last"
+    ),
+):
+    import shlex
+
+    from .chain import parse_stages, run_chain
+    from .executor import build_command, script_exists
+
+    try:
+        stage_words = parse_stages(stages)
+    except ValueError as e:
+        console.print(f"[red]Error: Invalid stage: {e}[/red]")
+        raise typer.Exit(1)
+
+    registry = get_registry()
+    commands = []
+    for words in stage_words:
+        resolved = registry.resolve(words)
+        if resolved is None:
+            console.print(f"[red]Error: '{shlex.join(words)}' not found[/red]")
+            console.print("\nRun [cyan]corun library list[/cyan] to see available commands.")
+            raise typer.Exit(1)
+        cmd, args = resolved
+        if not script_exists(cmd.script_path):
+            console.print(f"[red]Error: Script not found: {cmd.script_path}[/red]")
+            raise typer.Exit(1)
+        try:
+            commands.append(build_command(cmd.script_path, args))
+        except OSError as e:
+            console.print(f"[red]Error executing script: {e}[/red]")
+            raise typer.Exit(1)
+
+    try:
+        exit_code = run_chain(commands, log_file, pipefail)
+    except OSError as e:
+        console.print(f"[red]Error executing chain: {e}[/red]")
+        raise typer.Exit(1)
+    raise typer.Exit(exit_code)
+
+
+@app.command(name="stats", help=BUILTIN_HELP["stats"])
+def stats_command(
+    name: Optional[str] = typer.Argument(
+        None, help="Only show this library ID or command"
+    ),
+    days: Optional[float] = typer.Option(
+        None, "--days", "-d", help="Only include runs from the last N days"
+    ),
+):
+    import sqlite3
+    import time
+
+    from rich.table import Table
+
+    from .history import get_history_file, get_stats, is_enabled
+
+    since = time.time() - days * 86400 if days is not None else None
+    try:
+        stats = get_stats(name, since)
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[red]Error: Cannot use {get_history_file()}: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not stats:
+        console.print("[yellow]No runs recorded.[/yellow]")
+        if not is_enabled():
+            console.print(
+                "\nSet [cyan]CORUN_HISTORY=1[/cyan] to record script runs."
+            )
+        return
+
+    table = Table(title=f"Run history ({get_history_file()})")
+    table.add_column("Command", style="cyan")
+    table.add_column("Runs", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("p99", justify="right")
+    table.add_column("Failures", justify="right")
+    table.add_column("Max RSS", justify="right")
+
+    for s in stats:
+        failure_style = "red" if s.failures else "green"
+        table.add_row(
+            s.label,
+            str(s.runs),
+            f"{s.p50:.3f}s",
+            f"{s.p95:.3f}s",
+            f"{s.p99:.3f}s",
+            f"[{failure_style}]{s.failure_rate:.1%}[/{failure_style}]",
+            f"{s.max_rss / 1024:.1f} MiB",
+        )
+
+    console.print(table)
+
+
+@app.command(name="search", help=BUILTIN_HELP["search"])
+def search_command(
+    query: list[str] = typer.Argument(
+        ..., help="Words to find in command names, descriptions and script headers"
+    ),
+    limit: int = typer.Option(20, "--limit", "-n", help="Maximum number of results"),
+    reindex: bool = typer.Option(
+        False, "--reindex", help="Rebuild the search index from scratch"
+    ),
+):
+    import sqlite3
+
+    from rich.markup import escape
+
+    from .search import get_search_file, search
+
+    if limit < 1:
+        console.print("[red]Error: --limit must be at least 1[/red]")
+        raise typer.Exit(1)
+
+    query_text = " ".join(query)
+    try:
+        results, fuzzy = search(query_text, limit, reindex)
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[red]Error: Cannot use {get_search_file()}: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not results:
+        console.print(f"[yellow]No commands match '{escape(query_text)}'.[/yellow]")
+        raise typer.Exit(1)
+
+    if fuzzy:
+        console.print(
+            f"[dim]No exact match for '{escape(query_text)}', closest:[/dim]"
+        )
+    for result in results:
+        summary = f"  [dim]{escape(result.summary)}[/dim]" if result.summary else ""
+        console.print(f"  • [cyan]{escape(result.label)}[/cyan]{summary}")
+
+
+@app.command(name="shell", help=BUILTIN_HELP["shell"])
+def shell_command(
+    watch: bool = typer.Option(
+        True, "--watch/--no-watch", help="Reload libraries when addons change"
+    ),
+):
+    from .shell import run_shell
+
+    run_shell(watch)
+
+
+@app.command(name="serve", help=BUILTIN_HELP["serve"])
+def serve_command(
+    socket_file: Optional[Path] = typer.Option(
+        None, "--socket", help="Socket path (default: ~/.corun/daemon.sock)"
+    ),
+    watch: bool = typer.Option(
+        True, "--watch/--no-watch", help="Reload libraries when addons change"
+    ),
+):
+    from .daemon import serve
+
+    try:
+        serve(socket_file, watch)
+    except OSError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+
 def show_conflict_warning(conflicts: dict):
     """Display startup warning about conflicts."""
     if not conflicts:
@@ -143,6 +416,32 @@ def show_conflict_warning(conflicts: dict):
     console.print("[dim]   Run 'corun library list' for details.[/dim]\n")
 
 
+def show_builtin_warning(builtin_shadowed: list, name: Optional[str] = None):
+    """
+    Warn (on stderr) about libraries and scripts hidden by built-in commands.
+
+    Args:
+        builtin_shadowed: Registry.builtin_shadowed entries
+        name: Only warn about this name (the built-in being run)
+    """
+    hidden = [
+        (shadowed_name, path)
+        for shadowed_name, path in builtin_shadowed
+        if name is None or shadowed_name == name
+    ]
+    if not hidden:
+        return
+
+    from rich.console import Console
+
+    err = Console(stderr=True)
+    for shadowed_name, path in hidden:
+        err.print(
+            f"[yellow]⚠️  '{shadowed_name}' is a built-in command; "
+            f"[dim]{path}[/dim] is ignored. Rename it to run it.[/yellow]"
+        )
+
+
 def make_conflict_command(name: str, library, standalone_cmd):
     """Create interactive command for conflicting names."""
     
@@ -188,72 +487,173 @@ def make_conflict_command(name: str, library, standalone_cmd):
     return conflict_func
 
 
-def register_dynamic_commands():
-    """Register dynamic commands from scanned libraries."""
-    libraries, standalone, conflicts = scan_addons()
+def register_library(library):
+    """Register a library as a sub-app with one command per script."""
+    lib_app = typer.Typer(
+        help=library.description,
+        no_args_is_help=True,
+    )
+
+    # Add commands
+    for cmd in library.commands:
+
+        def make_command(script_path, cache_ttl):
+            """Create command function with closure."""
+
+            def command_func(
+                args: Optional[list[str]] = typer.Argument(
+                    None, help="Arguments to pass to the script"
+                ),
+            ):
+                exit_code = execute_script(
+                    script_path,
+                    args,
+                    library_id=library.library_id,
+                    cache_ttl=cache_ttl,
+                    cache_env=library.cache_env,
+                )
+                raise typer.Exit(exit_code)
+
+            return command_func
+
+        lib_app.command(name=cmd.name)(
+            make_command(cmd.script_path, library.get_cache_ttl(cmd.name))
+        )
+
+    app.add_typer(lib_app, name=library.library_id)
+
+
+def register_standalone(cmd, conflicts: dict):
+    """Register a standalone script (or its interactive conflict handler)."""
+    if cmd.name in conflicts:
+        # Register interactive conflict handler
+        lib, standalone_cmd = conflicts[cmd.name]
+        app.command(name=cmd.name)(make_conflict_command(cmd.name, lib, standalone_cmd))
+        return
+
+    def make_standalone(script_path):
+        """Create standalone command with closure."""
+
+        def standalone_func(
+            args: Optional[list[str]] = typer.Argument(
+                None, help="Arguments to pass to the script"
+            ),
+        ):
+            exit_code = execute_script(script_path, args)
+            raise typer.Exit(exit_code)
+
+        return standalone_func
+
+    app.command(name=cmd.name)(make_standalone(cmd.script_path))
+
+
+def register_dynamic_commands(only: Optional[str] = None):
+    """
+    Register dynamic commands from scanned libraries.
+
+    Args:
+        only: If given, register just the library or standalone script with
+            this name instead of building the whole command tree
+    """
+    registry = get_registry()
+    conflicts = registry.conflicts
     
-    # Show conflict warnings at startup
-    show_conflict_warning(conflicts)
+    # Show conflict warnings at startup (never into completion output)
+    if not os.environ.get("_CORUN_COMPLETE"):
+        show_conflict_warning(conflicts)
+        if only is None:
+            show_builtin_warning(registry.builtin_shadowed)
+
+    if only is not None:
+        libraries = [registry.get_library(only)]
+        standalone = [registry.get_standalone(only)]
+    else:
+        libraries = registry.libraries
+        standalone = registry.standalone
 
     # Register library commands (skip those with conflicts - they get interactive handler)
     for library in libraries:
+        if library is None:
+            continue
         if library.library_id in conflicts:
             # Skip - will be handled by interactive conflict handler below
             continue
-            
-        # Create a sub-app for the library
-        lib_app = typer.Typer(
-            help=library.description,
-            no_args_is_help=True,
-        )
-
-        # Add commands
-        for cmd in library.commands:
+        register_library(library)
 
-            def make_command(script_path):
-                """Create command function with closure."""
+    # Register standalone commands (those with conflicts get interactive handler)
+    for cmd in standalone:
+        if cmd is None:
+            continue
+        register_standalone(cmd, conflicts)
 
-                def command_func(
-                    args: Optional[list[str]] = typer.Argument(
-                        None, help="Arguments to pass to the script"
-                    ),
-                ):
-                    exit_code = execute_script(script_path, args)
-                    raise typer.Exit(exit_code)
 
-                return command_func
 
-            lib_app.command(name=cmd.name)(make_command(cmd.script_path))
 
-        app.add_typer(lib_app, name=library.library_id)
+def get_lazy_target(argv: list[str]) -> Optional[str]:
+    """
+    Pick the single command to register for this invocation.
 
-    # Register standalone commands (those with conflicts get interactive handler)
-    for cmd in standalone:
-        if cmd.name in conflicts:
-            # Register interactive conflict handler
-            lib, standalone_cmd = conflicts[cmd.name]
-            app.command(name=cmd.name)(make_conflict_command(cmd.name, lib, standalone_cmd))
-            continue
+    Args:
+        argv: Command line arguments (without program name)
 
-        def make_standalone(script_path):
-            """Create standalone command with closure."""
+    Returns:
+        Name of the invoked library/script, or None if the full command tree
+        is needed (no args, global options like --help, shell completion)
+    """
+    if os.environ.get("_CORUN_COMPLETE"):
+        return None
+    if not argv or argv[0].startswith("-"):
+        return None
+    return argv[0]
 
-            def standalone_func(
-                args: Optional[list[str]] = typer.Argument(
-                    None, help="Arguments to pass to the script"
-                ),
-            ):
-                exit_code = execute_script(script_path, args)
-                raise typer.Exit(exit_code)
 
-            return standalone_func
+def pop_global_flag(argv: list[str], flag: str) -> bool:
+    """
+    Remove a corun flag given before the command name.
 
-        app.command(name=cmd.name)(make_standalone(cmd.script_path))
+    The same flag after the command name belongs to the script and is kept.
 
+    Args:
+        argv: sys.argv, modified in place
+        flag: Flag to remove
 
-# Register dynamic commands on import
-register_dynamic_commands()
+    Returns:
+        True if the flag was given
+    """
+    found = False
+    index = 1
+    while index < len(argv) and argv[index].startswith("-"):
+        if argv[index] == flag:
+            del argv[index]
+            found = True
+        else:
+            index += 1
+    return found
+
+
+def cli():
+    """Console entry point: register only what argv needs, then run the app."""
+    if pop_global_flag(sys.argv, "--no-cache"):
+        from .cache import disable_cache
+
+        disable_cache()
+
+    target = get_lazy_target(sys.argv[1:])
+    if target is None or target == "library":
+        register_library_app()
+    if target is None or target == "pipeline":
+        register_pipeline_app()
+    if target in BUILTIN_COMMANDS:
+        show_builtin_warning(get_registry().builtin_shadowed, target)
+    with trace.span("register"):
+        if target is None:
+            register_dynamic_commands()
+        elif target not in BUILTIN_COMMANDS:
+            register_dynamic_commands(only=target)
+    # Ended by execute_script() once Typer has dispatched to the script
+    trace.begin("resolve")
+    app()
 
 
 if __name__ == "__main__":
-    app()
+    cli()
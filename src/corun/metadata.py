@@ -0,0 +1,21 @@
+"""Metadata schema for metadata.json."""
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class Metadata(BaseModel):
+    """Library metadata from metadata.json."""
+
+    name: str
+    version: str
+    description: str
+    library_id: str
+    author: Optional[str] = None
+    shells: list[str] = Field(default_factory=list)
+    commands: list[str] = Field(default_factory=list)
+    # Result cache: command name -> TTL in seconds
+    cache: dict[str, float] = Field(default_factory=dict)
+    # Environment variables that are part of the cache key
+    cache_env: list[str] = Field(default_factory=list)
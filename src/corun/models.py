@@ -2,44 +2,196 @@
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from pydantic import BaseModel, Field
+if TYPE_CHECKING:
+    from .metadata import Metadata
 
 
-class Metadata(BaseModel):
-    """Library metadata from metadata.json."""
+def __getattr__(name: str):
+    """Lazily expose Metadata so importing the models does not load pydantic."""
+    if name == "Metadata":
+        from .metadata import Metadata
+
+        return Metadata
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Required metadata.json fields
+METADATA_REQUIRED_FIELDS = ("name", "version", "description", "library_id")
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class MetadataRecord:
+    """
+    Lightweight library metadata.
+
+    Mirrors Metadata's fields without depending on pydantic; used on the
+    scan and index hot paths. Full validation with Metadata is kept for
+    `library install` and `library validate`. Compared and hashed by
+    identity, since `cache` is a dict.
+    """
 
     name: str
     version: str
     description: str
     library_id: str
     author: Optional[str] = None
-    shells: list[str] = Field(default_factory=list)
-    commands: list[str] = Field(default_factory=list)
+    shells: tuple[str, ...] = ()
+    commands: tuple[str, ...] = ()
+    cache: dict[str, float] = field(default_factory=dict)
+    cache_env: tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: object) -> Optional["MetadataRecord"]:
+        """
+        Build a record from parsed metadata.json.
+
+        Plain JSON types are checked here without pydantic. Anything else
+        (e.g. a TTL given as "30") goes through the Metadata schema, so a
+        library has metadata here exactly when `library validate` accepts
+        it, with the same coerced values.
+
+        Args:
+            data: Parsed JSON
+
+        Returns:
+            MetadataRecord, or None if the Metadata schema rejects the data
+            (unknown fields are ignored)
+        """
+        if not isinstance(data, dict):
+            return None
+        record = cls._from_json_types(data)
+        if record is None:
+            record = cls._from_schema(data)
+        return record
+
+    @classmethod
+    def _from_json_types(cls, data: dict) -> Optional["MetadataRecord"]:
+        """Build a record if every field already has its plain JSON type."""
+        for key in METADATA_REQUIRED_FIELDS:
+            if not isinstance(data.get(key), str):
+                return None
+
+        author = data.get("author")
+        if author is not None and not isinstance(author, str):
+            return None
+
+        lists = []
+        for key in ("shells", "commands", "cache_env"):
+            value = data.get(key, ())
+            if not isinstance(value, (list, tuple)) or not all(
+                isinstance(item, str) for item in value
+            ):
+                return None
+            lists.append(tuple(value))
+        shells, commands, cache_env = lists
+
+        cache = data.get("cache", {})
+        if not isinstance(cache, dict) or not all(
+            isinstance(ttl, (int, float)) and not isinstance(ttl, bool)
+            for ttl in cache.values()
+        ):
+            return None
+
+        return cls(
+            data["name"],
+            data["version"],
+            data["description"],
+            data["library_id"],
+            author,
+            shells,
+            commands,
+            {command: float(ttl) for command, ttl in cache.items()},
+            cache_env,
+        )
+
+    @classmethod
+    def _from_schema(cls, data: dict) -> Optional["MetadataRecord"]:
+        """Build a record from values coerced by the Metadata schema."""
+        from pydantic import ValidationError
+
+        from .metadata import Metadata
+
+        try:
+            metadata = Metadata(**data)
+        except (TypeError, ValidationError):
+            return None
+        return cls(
+            metadata.name,
+            metadata.version,
+            metadata.description,
+            metadata.library_id,
+            metadata.author,
+            tuple(metadata.shells),
+            tuple(metadata.commands),
+            dict(metadata.cache),
+            tuple(metadata.cache_env),
+        )
 
 
-@dataclass
 class Command:
-    """A single command (shell script)."""
+    """
+    A single command (shell script).
 
-    name: str
-    script_path: Path
-    library_id: Optional[str] = None
+    Slotted to keep large indexes compact. The script path can be given
+    directly or derived on first access from the directory it lives in, so
+    commands restored from the index don't each build a Path up front.
+    """
+
+    __slots__ = ("name", "library_id", "_script_path", "_directory")
+
+    def __init__(
+        self,
+        name: str,
+        script_path: Optional[Path] = None,
+        library_id: Optional[str] = None,
+        directory: Optional[Path] = None,
+    ):
+        if script_path is None and directory is None:
+            raise TypeError("Command needs a script_path or a directory")
+        self.name = name
+        self.library_id = library_id
+        self._script_path = script_path
+        self._directory = directory
+
+    @property
+    def script_path(self) -> Path:
+        """Path to the script."""
+        if self._script_path is None:
+            self._script_path = self._directory / f"{self.name}.sh"
+        return self._script_path
 
     @property
     def is_standalone(self) -> bool:
         """Check if this is a standalone command."""
         return self.library_id is None
 
+    def __repr__(self) -> str:
+        return (
+            f"Command(name={self.name!r}, script_path={self.script_path!r}, "
+            f"library_id={self.library_id!r})"
+        )
 
-@dataclass
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Command):
+            return NotImplemented
+        return (self.name, self.library_id, self.script_path) == (
+            other.name,
+            other.library_id,
+            other.script_path,
+        )
+
+    __hash__ = None
+
+
+@dataclass(slots=True)
 class Library:
     """A library containing multiple commands."""
 
     library_id: str
     path: Path
-    metadata: Optional[Metadata] = None
+    metadata: Optional[Union["Metadata", MetadataRecord]] = None
     commands: list[Command] = field(default_factory=list)
 
     @property
@@ -62,3 +214,28 @@ class Library:
         if self.metadata:
             return self.metadata.description
         return "No description"
+
+    def get_cache_ttl(self, command: str) -> Optional[float]:
+        """Get the result cache TTL declared for a command, if any."""
+        if self.metadata:
+            ttl = self.metadata.cache.get(command)
+            if ttl and ttl > 0:
+                return ttl
+        return None
+
+    @property
+    def cache_env(self) -> list[str]:
+        """Get the environment variables that are part of the cache key."""
+        if self.metadata:
+            return list(self.metadata.cache_env)
+        return []
+
+
+@dataclass(slots=True)
+class Layer:
+    """Libraries and standalone scripts of one addons directory (search path entry)."""
+
+    name: str
+    path: Path
+    libraries: list[Library] = field(default_factory=list)
+    standalone: list[Command] = field(default_factory=list)
@@ -0,0 +1,87 @@
+"""Run one script across many argument sets with a bounded worker pool."""
+
+import shlex
+import sys
+from pathlib import Path
+from typing import IO, Optional
+
+from .async_executor import OUTPUT_MODES, OUTPUT_PREFIX, Job, JobResult, run_jobs
+
+
+def read_arg_sets(stream: IO[str]) -> list[list[str]]:
+    """
+    Read argument sets, one per line.
+
+    Lines are split with shell quoting rules; blank lines and lines starting
+    with # are skipped.
+
+    Args:
+        stream: Text stream to read from
+
+    Returns:
+        List of argument lists
+
+    Raises:
+        ValueError: If a line is badly quoted (the message names the line)
+    """
+    arg_sets = []
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            arg_sets.append(shlex.split(line))
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+    return arg_sets
+
+
+def run_parallel(
+    cmd: list[str],
+    arg_sets: list[list[str]],
+    jobs: int,
+    output_mode: str = OUTPUT_PREFIX,
+    log_dir: Optional[Path] = None,
+) -> list[JobResult]:
+    """
+    Run a command once per argument set, at most `jobs` at a time.
+
+    Args:
+        cmd: Resolved command line, built once for all jobs
+        arg_sets: Argument lists, one per job
+        jobs: Maximum number of concurrent processes
+        output_mode: Output mode (see corun.async_executor)
+        log_dir: Log directory for the "log" output mode
+
+    Returns:
+        Results in the same order as arg_sets
+    """
+    job_list = [
+        Job(label=shlex.join(args) or "(no args)", argv=cmd + args)
+        for args in arg_sets
+    ]
+    return run_jobs(job_list, jobs, output_mode, log_dir)
+
+
+def print_summary(results: list[JobResult]) -> int:
+    """
+    Print an aggregated summary to stderr.
+
+    Args:
+        results: Results from run_parallel()
+
+    Returns:
+        0 if every job succeeded, 1 otherwise
+    """
+    failed = [r for r in results if r.exit_code != 0]
+    total_time = max((r.duration for r in results), default=0.0)
+
+    print(
+        f"\n{len(results)} jobs, {len(results) - len(failed)} succeeded, "
+        f"{len(failed)} failed (longest {total_time:.2f}s)",
+        file=sys.stderr,
+    )
+    for r in failed:
+        print(f"  exit {r.exit_code:3}  {r.label}", file=sys.stderr)
+
+    return 1 if failed else 0
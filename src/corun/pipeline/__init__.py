@@ -0,0 +1 @@
+"""Pipeline subcommand package."""
@@ -0,0 +1,164 @@
+"""Pipeline commands."""
+
+import shlex
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+
+from ..builtin_commands import BUILTIN_HELP
+from ..registry import Registry, get_registry
+from .spec import PIPELINE_SUFFIXES, POLICIES, Pipeline, PipelineError, load_pipeline
+
+app = typer.Typer(help=BUILTIN_HELP["pipeline"])
+console = Console()
+
+# Pipeline files inside a library directory: <name>.pipeline.toml|json
+PIPELINE_MARKER = ".pipeline"
+
+
+def find_pipeline(spec: str, registry: Registry) -> Path:
+    """
+    Locate a pipeline file.
+
+    Args:
+        spec: Path to a pipeline file, or ``<library_id>/<name>`` for
+            ``<name>.pipeline.toml|json`` inside a library
+
+    Returns:
+        Path of the pipeline file
+
+    Raises:
+        PipelineError: If no such pipeline exists
+    """
+    path = Path(spec)
+    if path.is_file():
+        return path
+
+    library_id, _, name = spec.partition("/")
+    library = registry.get_library(library_id)
+    if library is None or not name:
+        raise PipelineError(f"Pipeline not found: {spec}")
+    for suffix in PIPELINE_SUFFIXES:
+        candidate = library.path / f"{name}{PIPELINE_MARKER}{suffix}"
+        if candidate.is_file():
+            return candidate
+    raise PipelineError(f"Pipeline '{name}' not found in library '{library_id}'")
+
+
+def resolve_steps(pipeline: Pipeline, registry: Registry) -> dict[str, list[str]]:
+    """
+    Resolve every step's ``run`` to the argv that executes it.
+
+    Returns:
+        Mapping of step name to argv
+
+    Raises:
+        PipelineError: If a step does not name a known, runnable command
+    """
+    from ..executor import build_command, script_exists
+
+    commands = {}
+    for step in pipeline.steps.values():
+        resolved = registry.resolve(step.run)
+        if resolved is None:
+            raise PipelineError(
+                f"Step '{step.name}': command not found: {shlex.join(step.run)}"
+            )
+        cmd, args = resolved
+        if not script_exists(cmd.script_path):
+            raise PipelineError(
+                f"Step '{step.name}': script not found: {cmd.script_path}"
+            )
+        try:
+            commands[step.name] = build_command(cmd.script_path, args)
+        except OSError as e:
+            raise PipelineError(f"Step '{step.name}': {e}")
+    return commands
+
+
+def print_plan(pipeline: Pipeline, commands: dict[str, list[str]]) -> None:
+    """Show the chains in start order with their needs."""
+    from .spec import topological_chains
+
+    console.print(
+        f"\n[bold]{pipeline.name}[/bold] "
+        f"(policy: {pipeline.policy}, jobs: {pipeline.jobs})\n"
+    )
+    for chain in topological_chains(pipeline) or []:
+        needs = ", ".join(chain[0].needs)
+        console.print(
+            " [dim]|[/dim] ".join(f"[cyan]{step.name}[/cyan]" for step in chain)
+            + (f"  [dim]after {needs}[/dim]" if needs else "")
+        )
+        for step in chain:
+            console.print(f"    [dim]{shlex.join(commands[step.name])}[/dim]")
+    console.print()
+
+
+@app.command("run")
+def run_command(
+    spec: str = typer.Argument(
+        ..., help="Pipeline file, or <library_id>/<name> for a library pipeline"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Maximum concurrent steps (overrides the file)"
+    ),
+    policy: Optional[str] = typer.Option(
+        None, "--policy", "-p", help="On failure: fail-fast or continue"
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Show the resolved steps without running them"
+    ),
+):
+    """
+    Run a pipeline: independent steps run concurrently, piped steps together.
+
+    Prints a timing report per step to stderr when done.
+    """
+    if policy is not None and policy not in POLICIES:
+        console.print(
+            f"[red]Error: Invalid policy '{policy}' "
+            f"(choose from {', '.join(POLICIES)})[/red]"
+        )
+        raise typer.Exit(1)
+    if jobs is not None and jobs < 1:
+        console.print("[red]Error: --jobs must be at least 1[/red]")
+        raise typer.Exit(1)
+
+    registry = get_registry()
+    try:
+        pipeline = load_pipeline(find_pipeline(spec, registry))
+        commands = resolve_steps(pipeline, registry)
+    except PipelineError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if jobs is not None:
+        pipeline.jobs = jobs
+    if policy is not None:
+        pipeline.policy = policy
+
+    if dry_run:
+        print_plan(pipeline, commands)
+        return
+
+    from .runner import print_report, run_pipeline
+
+    results = run_pipeline(pipeline, commands)
+    raise typer.Exit(print_report(results))
+
+
+@app.command("list")
+def list_pipelines():
+    """List pipelines shipped in libraries."""
+    found = False
+    for library in get_registry().libraries:
+        for suffix in PIPELINE_SUFFIXES:
+            for path in sorted(library.path.glob(f"*{PIPELINE_MARKER}{suffix}")):
+                name = path.name.removesuffix(suffix).removesuffix(PIPELINE_MARKER)
+                console.print(f"  • [cyan]{library.library_id}/{name}[/cyan]")
+                found = True
+    if not found:
+        console.print("[yellow]No library pipelines found.[/yellow]")
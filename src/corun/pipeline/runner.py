@@ -0,0 +1,279 @@
+"""Run a pipeline DAG with a bounded worker pool.
+
+Each pipe chain (a step plus the steps reading its stdout) is one unit of
+work: it waits for its ``needs``, takes a worker slot, and its processes
+are started together, connected with OS pipes so data flows between them
+without passing through corun. stderr of every step, and stdout of the
+last step of each chain, are multiplexed on the event loop and printed
+with the step name as prefix (see corun.async_executor).
+
+Each step runs in its own process group, so that cancelling it also stops
+whatever the script is waiting on. SIGINT/SIGTERM/SIGHUP received by corun
+are forwarded to every running step and nothing new is started.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from ..async_executor import Job, OutputSink, PrefixSink, pump
+from ..executor import exit_code_from_returncode
+from .spec import POLICY_FAIL_FAST, Pipeline, Step
+
+# Step status values
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+STATUS_CANCELLED = "cancelled"
+
+# Width of the timeline bar in the report
+BAR_WIDTH = 30
+
+
+@dataclass
+class StepResult:
+    """Outcome and timing of one step."""
+
+    name: str
+    status: str
+    exit_code: Optional[int] = None
+    # Seconds since the pipeline started
+    start: float = 0.0
+    duration: float = 0.0
+
+
+class PipelineRunner:
+    """Schedule the chains of a pipeline as their needs complete."""
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        commands: dict[str, list[str]],
+        jobs: int,
+        policy: str,
+        sink: Optional[OutputSink] = None,
+    ):
+        """
+        Args:
+            pipeline: Validated pipeline
+            commands: Resolved argv for each step name
+            jobs: Maximum number of chains running at once
+            policy: POLICY_FAIL_FAST or POLICY_CONTINUE
+            sink: Output sink (default: lines prefixed with the step name)
+        """
+        self.pipeline = pipeline
+        self.commands = commands
+        self.jobs = max(1, jobs)
+        self.policy = policy
+        self.sink = sink or PrefixSink()
+        self.results: dict[str, StepResult] = {}
+        self.origin = 0.0
+        self.aborted = False
+
+    async def run(self) -> list[StepResult]:
+        """Run every chain and return results in pipeline file order."""
+        self.origin = time.monotonic()
+        self.semaphore = asyncio.Semaphore(self.jobs)
+        self.done = {name: asyncio.Event() for name in self.pipeline.steps}
+        self.running: set[asyncio.subprocess.Process] = set()
+
+        loop = asyncio.get_running_loop()
+        signums = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP)
+        for signum in signums:
+            loop.add_signal_handler(signum, self.abort, signum)
+        try:
+            await asyncio.gather(
+                *(self.run_chain(chain) for chain in self.pipeline.chains())
+            )
+        finally:
+            for signum in signums:
+                loop.remove_signal_handler(signum)
+        return [self.results[name] for name in self.pipeline.steps]
+
+    def finish(self, step: Step, result: StepResult) -> None:
+        """Record a step's result and wake up the chains waiting for it."""
+        self.results[step.name] = result
+        self.done[step.name].set()
+        if result.status == STATUS_FAILED and self.policy == POLICY_FAIL_FAST:
+            self.abort()
+
+    def abort(self, signum: int = signal.SIGTERM) -> None:
+        """Stop running steps and skip everything not started yet."""
+        self.aborted = True
+        for process in self.running:
+            if process.returncode is None:
+                try:
+                    os.killpg(process.pid, signum)
+                except ProcessLookupError:
+                    pass
+
+    def skip(self, chain: list[Step]) -> None:
+        """Mark a whole chain as skipped."""
+        for step in chain:
+            self.finish(step, StepResult(step.name, STATUS_SKIPPED))
+
+    async def run_chain(self, chain: list[Step]) -> None:
+        """Wait for the chain's needs, then run it in a worker slot."""
+        needs = chain[0].needs
+        for need in needs:
+            await self.done[need].wait()
+        if self.aborted or any(
+            self.results[need].status != STATUS_OK for need in needs
+        ):
+            self.skip(chain)
+            return
+
+        async with self.semaphore:
+            if self.aborted:
+                self.skip(chain)
+                return
+            await self.spawn_chain(chain)
+
+    async def spawn_chain(self, chain: list[Step]) -> None:
+        """Start all processes of a chain connected by pipes and wait for them."""
+        processes: list[tuple[int, Step, asyncio.subprocess.Process, float]] = []
+        pumps = []
+        stdin_fd: Optional[int] = None
+
+        for position, step in enumerate(chain):
+            index = list(self.pipeline.steps).index(step.name)
+            job = Job(step.name, self.commands[step.name])
+            last = position == len(chain) - 1
+            read_fd = write_fd = None
+            if not last:
+                read_fd, write_fd = os.pipe()
+
+            start = time.monotonic()
+            self.sink.start(index, job)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *job.argv,
+                    stdin=asyncio.subprocess.DEVNULL if stdin_fd is None else stdin_fd,
+                    stdout=asyncio.subprocess.PIPE if last else write_fd,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+            except OSError as e:
+                self.sink.line(
+                    index, job, sys.stderr.buffer, f"Error executing script: {e}\n".encode()
+                )
+                result = StepResult(step.name, STATUS_FAILED, 1, start - self.origin)
+                self.sink.finish(index, job, result)
+                self.finish(step, result)
+                if read_fd is not None:
+                    os.close(read_fd)
+                # Later steps never start; earlier ones see a closed pipe
+                for rest in chain[position + 1 :]:
+                    self.finish(rest, StepResult(rest.name, STATUS_SKIPPED))
+                break
+            finally:
+                # The children hold their own copies now
+                if stdin_fd is not None:
+                    os.close(stdin_fd)
+                    stdin_fd = None
+                if write_fd is not None:
+                    os.close(write_fd)
+
+            self.running.add(process)
+            processes.append((index, step, process, start))
+            stdin_fd = read_fd
+            pumps.append(pump(process.stderr, index, job, sys.stderr.buffer, self.sink))
+            if last:
+                pumps.append(pump(process.stdout, index, job, sys.stdout.buffer, self.sink))
+
+        await asyncio.gather(*pumps)
+        await asyncio.gather(*(self.wait_step(*entry) for entry in processes))
+
+    async def wait_step(
+        self,
+        index: int,
+        step: Step,
+        process: asyncio.subprocess.Process,
+        start: float,
+    ) -> None:
+        """Wait for one process and record its result."""
+        returncode = await process.wait()
+        self.running.discard(process)
+        exit_code = exit_code_from_returncode(returncode)
+        if exit_code == 0:
+            status = STATUS_OK
+        elif self.aborted:
+            status = STATUS_CANCELLED
+        else:
+            status = STATUS_FAILED
+        result = StepResult(
+            step.name, status, exit_code, start - self.origin, time.monotonic() - start
+        )
+        self.sink.finish(index, Job(step.name, self.commands[step.name]), result)
+        self.finish(step, result)
+
+
+def run_pipeline(
+    pipeline: Pipeline,
+    commands: dict[str, list[str]],
+    jobs: Optional[int] = None,
+    policy: Optional[str] = None,
+) -> list[StepResult]:
+    """
+    Run a pipeline.
+
+    Args:
+        pipeline: Validated pipeline
+        commands: Resolved argv for each step name
+        jobs: Maximum concurrent chains (default: the pipeline's ``jobs``)
+        policy: Failure policy (default: the pipeline's ``policy``)
+
+    Returns:
+        Results in pipeline file order
+    """
+    runner = PipelineRunner(
+        pipeline,
+        commands,
+        jobs or pipeline.jobs,
+        policy or pipeline.policy,
+    )
+    return asyncio.run(runner.run())
+
+
+def print_report(results: list[StepResult]) -> int:
+    """
+    Print per-step timing to stderr, with a timeline bar for each step.
+
+    Args:
+        results: Results from run_pipeline()
+
+    Returns:
+        0 if every step succeeded, 1 otherwise
+    """
+    total = max((r.start + r.duration for r in results), default=0.0)
+    width = max((len(r.name) for r in results), default=4)
+    scale = BAR_WIDTH / total if total > 0 else 0.0
+
+    print(file=sys.stderr)
+    for r in results:
+        exit_code = "-" if r.exit_code is None else str(r.exit_code)
+        if r.status in (STATUS_OK, STATUS_FAILED, STATUS_CANCELLED):
+            offset = int(r.start * scale)
+            length = max(1, int(r.duration * scale))
+            bar = " " * offset + "#" * min(length, BAR_WIDTH - offset)
+            timing = f"{r.start:7.2f}s +{r.duration:7.2f}s"
+        else:
+            bar = ""
+            timing = " " * 18
+        print(
+            f"  {r.name:<{width}}  {r.status:<9} {exit_code:>4}  {timing}  "
+            f"|{bar:<{BAR_WIDTH}}|",
+            file=sys.stderr,
+        )
+
+    failed = [r for r in results if r.status != STATUS_OK]
+    print(
+        f"\n{len(results)} steps, {len(results) - len(failed)} succeeded, "
+        f"{len(failed)} failed or skipped (total {total:.2f}s)",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
@@ -0,0 +1,257 @@
+"""Pipeline file format.
+
+A pipeline is a JSON or TOML file describing a DAG of corun commands::
+
+    name = "nightly"
+    policy = "fail-fast"        # or "continue"
+    jobs = 4                    # concurrent steps
+
+    [steps.check-disk]
+    run = "sys_info disk"
+
+    [steps.check-net]
+    run = "net ping 8.8.8.8"
+
+    [steps.backup]
+    run = "db backup --full"
+    needs = ["check-disk", "check-net"]
+
+    [steps.compress]
+    run = "gzip_stream"
+    stdin = "backup"            # backup's stdout is piped into this step
+
+``run`` is a command line as typed after ``corun`` (a string split with
+shell quoting, or a list). A step with ``stdin`` starts together with the
+step it reads from and inherits that step's ``needs``.
+"""
+
+import json
+import shlex
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+POLICY_FAIL_FAST = "fail-fast"
+POLICY_CONTINUE = "continue"
+POLICIES = (POLICY_FAIL_FAST, POLICY_CONTINUE)
+
+# Default number of concurrent steps
+DEFAULT_JOBS = 4
+
+# Pipeline file suffixes, in lookup order
+PIPELINE_SUFFIXES = (".toml", ".json")
+
+
+class PipelineError(Exception):
+    """Invalid pipeline file."""
+
+
+@dataclass
+class Step:
+    """One node of the pipeline."""
+
+    name: str
+    run: list[str]
+    needs: list[str] = field(default_factory=list)
+    stdin: Optional[str] = None
+
+
+@dataclass
+class Pipeline:
+    """A validated pipeline."""
+
+    name: str
+    steps: dict[str, Step]
+    policy: str = POLICY_FAIL_FAST
+    jobs: int = DEFAULT_JOBS
+
+    def consumer_of(self, name: str) -> Optional[Step]:
+        """Get the step reading this step's stdout, if any."""
+        for step in self.steps.values():
+            if step.stdin == name:
+                return step
+        return None
+
+    def chains(self) -> list[list[Step]]:
+        """
+        Group steps into pipe chains (a step without pipes is its own chain).
+
+        Returns:
+            Chains in file order, each from producer to final consumer
+        """
+        chains = []
+        for step in self.steps.values():
+            if step.stdin is not None:
+                continue
+            chain = [step]
+            consumer = self.consumer_of(step.name)
+            while consumer is not None:
+                chain.append(consumer)
+                consumer = self.consumer_of(consumer.name)
+            chains.append(chain)
+        return chains
+
+
+def parse_run(name: str, value: object) -> list[str]:
+    """Parse a step's run value into words."""
+    if isinstance(value, str):
+        try:
+            words = shlex.split(value)
+        except ValueError as e:
+            raise PipelineError(f"Step '{name}': invalid run: {e}")
+    elif isinstance(value, list) and all(isinstance(word, str) for word in value):
+        words = list(value)
+    else:
+        raise PipelineError(f"Step '{name}': run must be a string or list of strings")
+    if not words:
+        raise PipelineError(f"Step '{name}': run is empty")
+    return words
+
+
+def parse_pipeline(data: object, default_name: str) -> Pipeline:
+    """
+    Build and validate a pipeline from parsed JSON/TOML.
+
+    Args:
+        data: Parsed file content
+        default_name: Name used if the file has none
+
+    Returns:
+        Pipeline
+
+    Raises:
+        PipelineError: If the pipeline is invalid
+    """
+    if not isinstance(data, dict):
+        raise PipelineError("Pipeline must be an object/table")
+
+    policy = data.get("policy", POLICY_FAIL_FAST)
+    if policy not in POLICIES:
+        raise PipelineError(f"policy must be one of: {', '.join(POLICIES)}")
+
+    jobs = data.get("jobs", DEFAULT_JOBS)
+    if not isinstance(jobs, int) or isinstance(jobs, bool) or jobs < 1:
+        raise PipelineError("jobs must be a positive integer")
+
+    raw_steps = data.get("steps")
+    if not isinstance(raw_steps, dict) or not raw_steps:
+        raise PipelineError("steps must be a non-empty object/table")
+
+    steps: dict[str, Step] = {}
+    for name, raw in raw_steps.items():
+        if not isinstance(raw, dict):
+            raise PipelineError(f"Step '{name}' must be an object/table")
+        needs = raw.get("needs", [])
+        if not isinstance(needs, list) or not all(isinstance(n, str) for n in needs):
+            raise PipelineError(f"Step '{name}': needs must be a list of step names")
+        stdin = raw.get("stdin")
+        if stdin is not None and not isinstance(stdin, str):
+            raise PipelineError(f"Step '{name}': stdin must be a step name")
+        steps[name] = Step(name, parse_run(name, raw.get("run")), list(needs), stdin)
+
+    pipeline = Pipeline(str(data.get("name", default_name)), steps, policy, jobs)
+    validate_graph(pipeline)
+    return pipeline
+
+
+def validate_graph(pipeline: Pipeline) -> None:
+    """
+    Check references, pipes and cycles.
+
+    Raises:
+        PipelineError: If the graph is invalid
+    """
+    steps = pipeline.steps
+    consumers: dict[str, str] = {}
+
+    for step in steps.values():
+        for need in step.needs:
+            if need not in steps:
+                raise PipelineError(f"Step '{step.name}' needs unknown step '{need}'")
+        if step.stdin is None:
+            continue
+        if step.stdin not in steps:
+            raise PipelineError(
+                f"Step '{step.name}' reads stdin from unknown step '{step.stdin}'"
+            )
+        if step.needs:
+            raise PipelineError(
+                f"Step '{step.name}' reads stdin from '{step.stdin}' and starts with "
+                f"it, so it cannot have its own needs"
+            )
+        if step.stdin in consumers:
+            raise PipelineError(
+                f"Steps '{consumers[step.stdin]}' and '{step.name}' both read "
+                f"stdin from '{step.stdin}'"
+            )
+        consumers[step.stdin] = step.name
+
+    # Pipes must not loop back
+    for step in steps.values():
+        seen = {step.name}
+        current = step
+        while current.stdin is not None:
+            if current.stdin in seen:
+                raise PipelineError(f"Pipe cycle through step '{step.name}'")
+            seen.add(current.stdin)
+            current = steps[current.stdin]
+
+    # Dependencies between chains must form a DAG
+    order = topological_chains(pipeline)
+    if order is None:
+        raise PipelineError("Dependency cycle between steps")
+
+
+def topological_chains(pipeline: Pipeline) -> Optional[list[list[Step]]]:
+    """
+    Order chains so that every chain comes after the steps it needs.
+
+    Returns:
+        Chains in a valid start order, or None if there is a cycle
+    """
+    chains = pipeline.chains()
+    done: set[str] = set()
+    ordered = []
+    remaining = list(chains)
+    while remaining:
+        ready = [c for c in remaining if set(c[0].needs) <= done]
+        if not ready:
+            return None
+        for chain in ready:
+            ordered.append(chain)
+            done.update(step.name for step in chain)
+            remaining.remove(chain)
+    return ordered
+
+
+def load_pipeline(path: Path) -> Pipeline:
+    """
+    Load a pipeline file (.toml or .json).
+
+    Raises:
+        PipelineError: If the file cannot be read or is invalid
+    """
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        raise PipelineError(f"Cannot read {path}: {e}")
+
+    if path.suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            raise PipelineError("TOML pipelines need Python 3.11+ (use JSON)")
+        try:
+            data = tomllib.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, tomllib.TOMLDecodeError) as e:
+            raise PipelineError(f"Invalid TOML in {path}: {e}")
+    else:
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise PipelineError(f"Invalid JSON in {path}: {e}")
+
+    name = path.name
+    for suffix in PIPELINE_SUFFIXES:
+        name = name.removesuffix(suffix)
+    return parse_pipeline(data, name.removesuffix(".pipeline"))
@@ -0,0 +1,185 @@
+"""Process-level registry of scanned libraries and standalone scripts.
+
+The addons layers are scanned at most once per process; every consumer
+(command registration, library subcommands, resolution) looks things up
+here in O(1) instead of rescanning and searching lists. Per-layer results
+are kept so a change in one layer is merged again without rescanning the
+others.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from . import trace
+from .builtin_commands import BUILTIN_COMMANDS
+from .models import Command, Layer, Library
+from .scanner import get_addons_dir, merge_layers, scan_layers, update_layer
+
+
+@dataclass
+class Registry:
+    """Scan result with lookup indexes."""
+
+    libraries: list[Library]
+    standalone: list[Command]
+    conflicts: dict[str, tuple[Library, Command]]
+    # Search path layers, highest precedence first
+    layers: list[Layer] = field(default_factory=list)
+    # Entries hidden by a higher layer: (name, hidden path, path that wins)
+    shadowed: list[tuple[str, Path, Path]] = field(default_factory=list)
+    # Entries hidden by a built-in command: (name, hidden path)
+    builtin_shadowed: list[tuple[str, Path]] = field(default_factory=list)
+    libraries_by_id: dict[str, Library] = field(default_factory=dict)
+    standalone_by_name: dict[str, Command] = field(default_factory=dict)
+    commands_by_name: dict[tuple[str, str], Command] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for library in self.libraries:
+            # First library wins if two directories share a library_id
+            # (merge_layers already drops the others)
+            self.libraries_by_id.setdefault(library.library_id, library)
+        for library in self.libraries_by_id.values():
+            for cmd in library.commands:
+                self.commands_by_name[(library.library_id, cmd.name)] = cmd
+        for cmd in self.standalone:
+            self.standalone_by_name[cmd.name] = cmd
+
+    def get_library(self, library_id: str) -> Optional[Library]:
+        """Get a library by its ID."""
+        return self.libraries_by_id.get(library_id)
+
+    def get_command(self, library_id: str, name: str) -> Optional[Command]:
+        """Get a library command by library ID and command name."""
+        return self.commands_by_name.get((library_id, name))
+
+    def get_standalone(self, name: str) -> Optional[Command]:
+        """Get a standalone script by name."""
+        return self.standalone_by_name.get(name)
+
+    def resolve(self, words: list[str]) -> Optional[tuple[Command, list[str]]]:
+        """
+        Resolve ``<library> <command> [args...]`` or ``<script> [args...]``.
+
+        Libraries take priority over standalone scripts with the same name.
+
+        Args:
+            words: Command line words
+
+        Returns:
+            Tuple of (command, script args), or None if nothing matches
+        """
+        if not words:
+            return None
+        target, rest = words[0], words[1:]
+        if target in self.libraries_by_id:
+            if not rest:
+                return None
+            cmd = self.get_command(target, rest[0])
+            return (cmd, rest[1:]) if cmd else None
+        cmd = self.get_standalone(target)
+        return (cmd, rest) if cmd else None
+
+
+_registry: Optional[Registry] = None
+
+
+def merge_registry(layers: list[Layer]) -> Registry:
+    """
+    Build a registry from layer scan results.
+
+    Libraries and standalone scripts named like a built-in command are left
+    out (the built-in always wins) and recorded in builtin_shadowed.
+    """
+    libraries, standalone, conflicts, shadowed = merge_layers(layers)
+
+    builtin_shadowed = [
+        (library.library_id, library.path)
+        for library in libraries
+        if library.library_id in BUILTIN_COMMANDS
+    ]
+    builtin_shadowed += [
+        (cmd.name, cmd.script_path)
+        for cmd in standalone
+        if cmd.name in BUILTIN_COMMANDS
+    ]
+    if builtin_shadowed:
+        libraries = [
+            library
+            for library in libraries
+            if library.library_id not in BUILTIN_COMMANDS
+        ]
+        standalone = [cmd for cmd in standalone if cmd.name not in BUILTIN_COMMANDS]
+        conflicts = {
+            name: pair
+            for name, pair in conflicts.items()
+            if name not in BUILTIN_COMMANDS
+        }
+
+    return Registry(
+        libraries, standalone, conflicts, layers, shadowed, builtin_shadowed
+    )
+
+
+def get_registry() -> Registry:
+    """Get the registry, scanning the addons layers on first use."""
+    global _registry
+    if _registry is None:
+        with trace.span("scan"):
+            layers = scan_layers()
+        _registry = merge_registry(layers)
+    return _registry
+
+
+def invalidate_registry(library_path: Optional[Path] = None) -> None:
+    """
+    Drop the registry after the addons directory was modified.
+
+    Also invalidates the persistent index for the library that changed.
+
+    Args:
+        library_path: Library directory that was installed, removed or
+            created. If None, the whole index is invalidated.
+    """
+    from .index import invalidate_index
+
+    global _registry
+    _registry = None
+    invalidate_index(library_path)
+
+
+def update_registry(
+    changed_dirs: set[str], listing_changed: bool, addons_dir: Optional[Path] = None
+) -> Registry:
+    """
+    Apply known addons changes to the registry without a full rescan.
+
+    Only the changed layer is updated; the layers are then merged again.
+
+    Args:
+        changed_dirs: Library directory names that changed
+        listing_changed: Whether the addons directory listing changed
+        addons_dir: Layer that changed (default: the user layer)
+
+    Returns:
+        The updated registry
+    """
+    global _registry
+    if _registry is None:
+        return get_registry()
+    addons_dir = addons_dir or get_addons_dir()
+    layers = [
+        update_layer(layer, changed_dirs, listing_changed)
+        if layer.path == addons_dir
+        else layer
+        for layer in _registry.layers
+    ]
+    _registry = merge_registry(layers)
+    return _registry
+
+
+def reload_registry() -> Registry:
+    """Rebuild the registry, revalidating the index against the filesystem."""
+    global _registry
+    _registry = None
+    return get_registry()
@@ -1,16 +1,61 @@
-"""Scanner for ~/.corun/addons/ directory."""
+"""Scanner for addons directories.
+
+Addons are looked up in layers, highest precedence first:
+
+1. project: ``.corun/addons`` in the working directory or its nearest
+   parent that has one, if owned by the current user (or root)
+2. user: ``~/.corun/addons`` (where ``corun library install`` writes)
+3. system: ``/opt/corun/addons``
+
+``CORUN_PATH`` (colon-separated directories) replaces that list. Each
+layer is scanned and indexed on its own; the results are merged by name,
+so a change in one layer only rescans that layer.
+"""
 
 import json
+import os
+import stat
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from pydantic import ValidationError
+from . import index
+from .archive import ARCHIVE_SUFFIX, is_archive
+from .models import Command, Layer, Library, MetadataRecord
 
-from .models import Command, Library, Metadata
+if TYPE_CHECKING:
+    from .metadata import Metadata
 
-# Default addons directory
+# Default addons directory (user layer)
 ADDONS_DIR = Path.home() / ".corun" / "addons"
 
+# System-wide layer
+SYSTEM_ADDONS_DIR = Path("/opt/corun/addons")
+
+# Project layer, relative to the project root
+PROJECT_ADDONS = Path(".corun") / "addons"
+
+# Search path override: directories separated by os.pathsep
+SEARCH_PATH_ENV = "CORUN_PATH"
+
+# Layer names
+LAYER_PROJECT = "project"
+LAYER_USER = "user"
+LAYER_SYSTEM = "system"
+LAYER_PATH = "path"
+
+# Library scan modes (CORUN_SCAN_MODE)
+SCAN_SERIAL = "serial"
+SCAN_THREADS = "threads"
+SCAN_AUTO = "auto"
+SCAN_MODES = (SCAN_SERIAL, SCAN_THREADS, SCAN_AUTO)
+
+# Default worker count (CORUN_SCAN_WORKERS)
+SCAN_WORKERS = 16
+
+# Auto mode switches to threads past this duration (CORUN_SCAN_THRESHOLD_MS)
+SCAN_THRESHOLD_MS = 100
+
 
 def get_addons_dir() -> Path:
     """Get the addons directory path."""
@@ -24,33 +69,254 @@ def ensure_addons_dir() -> Path:
     return addons_dir
 
 
-def load_metadata(library_path: Path) -> Optional[Metadata]:
-    """Load metadata.json from a library directory."""
+def is_trusted(st: os.stat_result) -> bool:
+    """Check that a file is owned by the current user or root."""
+    return st.st_uid in (os.getuid(), 0)
+
+
+def find_project_addons(cwd: Optional[Path] = None) -> Optional[Path]:
+    """
+    Find the project layer: ``.corun/addons`` in cwd or its nearest parent.
+
+    Its scripts run as the current user, so like git's safe.directory check
+    the search never trusts a tree someone else controls:
+
+    - the walk stops at $HOME (``~/.corun/addons`` is the user layer, not a
+      project) and at a filesystem boundary, so e.g. a ``/tmp/.corun`` or
+      a directory on another mount is never picked up from below
+    - the nearest ``.corun`` and its ``addons`` must be owned by the current
+      user or root; otherwise there is no project layer at all
+
+    Args:
+        cwd: Directory to start from (default: the working directory)
+
+    Returns:
+        Project addons directory, or None if there is none
+    """
+    if cwd is None:
+        try:
+            cwd = Path(os.getcwd())
+        except OSError:
+            # Working directory was removed
+            return None
+    user_dir = get_addons_dir()
+    try:
+        home = os.stat(Path.home())
+        home_id = (home.st_dev, home.st_ino)
+    except (OSError, RuntimeError):
+        home_id = None
+
+    device = None
+    for directory in (cwd, *cwd.parents):
+        candidate = directory / PROJECT_ADDONS
+        if candidate == user_dir:
+            return None
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return None
+        if (st.st_dev, st.st_ino) == home_id:
+            return None
+        if device is None:
+            device = st.st_dev
+        elif st.st_dev != device:
+            return None
+
+        try:
+            addons = os.stat(candidate)
+        except OSError:
+            continue
+        if not stat.S_ISDIR(addons.st_mode):
+            continue
+        try:
+            dot_corun = os.stat(candidate.parent)
+        except OSError:
+            return None
+        if is_trusted(dot_corun) and is_trusted(addons):
+            return candidate
+        return None
+    return None
+
+
+def get_search_paths(
+    cwd: Optional[Path] = None, env: Optional[dict[str, str]] = None
+) -> list[tuple[str, Path]]:
+    """
+    Get the addons layers, highest precedence first.
+
+    Args:
+        cwd: Directory to look for a project layer from (default: the
+            working directory)
+        env: Environment to read CORUN_PATH from (default: os.environ)
+
+    Returns:
+        List of (layer name, addons directory)
+    """
+    user_dir = get_addons_dir()
+    override = (os.environ if env is None else env).get(SEARCH_PATH_ENV)
+    if override:
+        paths = [Path(part).expanduser() for part in override.split(os.pathsep) if part]
+        return [
+            (LAYER_USER if path == user_dir else LAYER_PATH, path) for path in paths
+        ]
+
+    layers = []
+    project_dir = find_project_addons(cwd)
+    if project_dir is not None:
+        layers.append((LAYER_PROJECT, project_dir))
+    layers.append((LAYER_USER, user_dir))
+    layers.append((LAYER_SYSTEM, SYSTEM_ADDONS_DIR))
+    return layers
+
+
+def list_dir(path: Path) -> tuple[list[str], list[str], bool]:
+    """
+    List a directory in a single os.scandir pass.
+
+    Entry types come from the cached DirEntry data (d_type), so no extra
+    stat calls are made for regular files and directories.
+
+    Args:
+        path: Directory to list
+
+    Returns:
+        Tuple of (library names, .sh script stems, has metadata.json).
+        Library names are subdirectories and packed library archives;
+        hidden entries are skipped.
+
+    Raises:
+        OSError: If the directory cannot be listed
+    """
+    dir_names: list[str] = []
+    script_names: list[str] = []
+    has_metadata = False
+
+    with os.scandir(path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.endswith(".sh") and entry.is_file():
+                script_names.append(name[:-3])
+            elif name == "metadata.json":
+                has_metadata = True
+            elif not name.startswith(".") and (
+                entry.is_dir()
+                or (name.endswith(ARCHIVE_SUFFIX) and entry.is_file())
+            ):
+                dir_names.append(name)
+
+    return dir_names, script_names, has_metadata
+
+
+def load_metadata(library_path: Path) -> Optional[MetadataRecord]:
+    """
+    Load metadata.json from a library directory.
+
+    Plain JSON types are checked without pydantic; other values fall back
+    to the schema (see MetadataRecord.from_dict), so the result agrees with
+    validate_metadata().
+    """
     metadata_file = library_path / "metadata.json"
 
-    if not metadata_file.exists():
+    try:
+        with open(metadata_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
         return None
 
+    return MetadataRecord.from_dict(data)
+
+
+def validate_metadata(library_path: Path) -> tuple[Optional["Metadata"], list[str]]:
+    """
+    Fully validate metadata.json with the pydantic schema.
+
+    Args:
+        library_path: Library directory
+
+    Returns:
+        Tuple of (metadata or None, list of error messages). Both are empty
+        if there is no metadata.json.
+    """
+    from pydantic import ValidationError
+
+    from .metadata import Metadata
+
+    metadata_file = library_path / "metadata.json"
+
     try:
         with open(metadata_file, "r", encoding="utf-8") as f:
             data = json.load(f)
-        return Metadata(**data)
-    except (json.JSONDecodeError, ValidationError):
+    except FileNotFoundError:
+        return None, []
+    except OSError as e:
+        return None, [f"Cannot read {metadata_file}: {e}"]
+    except ValueError as e:
+        return None, [f"Invalid JSON in {metadata_file}: {e}"]
+
+    try:
+        return Metadata(**data), []
+    except TypeError:
+        return None, ["metadata.json must contain a JSON object"]
+    except ValidationError as e:
+        errors = [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        ]
+        return None, errors
+
+
+def scan_archive(archive_path: Path) -> Optional[Library]:
+    """Scan a packed library archive (one mmap, no per-script stats)."""
+    from .archive import Archive, ArchiveError
+
+    try:
+        with Archive(archive_path) as archive:
+            metadata_data, script_names = archive.metadata, list(archive.scripts)
+    except ArchiveError:
+        return None
+
+    if not script_names:
         return None
 
+    metadata = MetadataRecord.from_dict(metadata_data) if metadata_data else None
+    library_id = (
+        metadata.library_id
+        if metadata
+        else archive_path.name.removesuffix(ARCHIVE_SUFFIX)
+    )
+    library = Library(
+        library_id=library_id,
+        path=archive_path,
+        metadata=metadata,
+    )
+    for name in script_names:
+        library.commands.append(
+            Command(
+                name=name,
+                directory=archive_path,
+                library_id=library_id,
+            )
+        )
+    return library
+
 
 def scan_library(library_path: Path) -> Optional[Library]:
-    """Scan a single library directory."""
-    if not library_path.is_dir():
+    """Scan a single library directory or packed archive."""
+    if is_archive(library_path):
+        return scan_archive(library_path)
+
+    try:
+        _, script_names, has_metadata = list_dir(library_path)
+    except OSError:
+        # Missing or not a directory
         return None
 
-    # Find all .sh files
-    scripts = list(library_path.glob("*.sh"))
-    if not scripts:
+    # Need at least one .sh file
+    if not script_names:
         return None
 
     # Load metadata
-    metadata = load_metadata(library_path)
+    metadata = load_metadata(library_path) if has_metadata else None
 
     # Create library
     library_id = metadata.library_id if metadata else library_path.name
@@ -61,10 +327,10 @@ def scan_library(library_path: Path) -> Optional[Library]:
     )
 
     # Add commands
-    for script in scripts:
+    for name in script_names:
         cmd = Command(
-            name=script.stem,
-            script_path=script,
+            name=name,
+            directory=library_path,
             library_id=library_id,
         )
         library.commands.append(cmd)
@@ -74,19 +340,16 @@ def scan_library(library_path: Path) -> Optional[Library]:
 
 def scan_standalone_scripts(addons_dir: Path) -> list[Command]:
     """Scan for standalone .sh scripts in addons directory."""
-    scripts = []
-
-    for item in addons_dir.iterdir():
-        if item.is_file() and item.suffix == ".sh":
-            scripts.append(
-                Command(
-                    name=item.stem,
-                    script_path=item,
-                    library_id=None,
-                )
-            )
+    _, script_names, _ = list_dir(addons_dir)
 
-    return scripts
+    return [
+        Command(
+            name=name,
+            directory=addons_dir,
+            library_id=None,
+        )
+        for name in script_names
+    ]
 
 
 def detect_conflicts(
@@ -98,6 +361,9 @@ def detect_conflicts(
     A conflict occurs when a standalone script has the same name as a library_id.
     For example: tools.sh (standalone) conflicts with tools/ (library).
 
+    Across layers a name belongs to the highest layer that defines it, so
+    this is applied to each layer's visible entries (see merge_layers).
+
     Args:
         libraries: List of scanned libraries
         standalone: List of standalone commands
@@ -115,38 +381,384 @@ def detect_conflicts(
     return conflicts
 
 
-def scan_addons() -> tuple[list[Library], list[Command], dict[str, tuple[Library, Command]]]:
+def merge_layers(
+    layers: list[Layer],
+) -> tuple[
+    list[Library],
+    list[Command],
+    dict[str, tuple[Library, Command]],
+    list[tuple[str, Path, Path]],
+]:
     """
-    Scan the addons directory for libraries and standalone scripts.
+    Merge layer scan results into one name -> script resolution.
+
+    A top-level name (library ID or standalone script) resolves in the
+    highest layer that defines it, whether as a library or a script; the
+    same name in lower layers is shadowed. A library and a standalone
+    script with the same name in that one layer are a conflict.
+
+    Args:
+        layers: Layer scan results, highest precedence first
 
     Returns:
-        Tuple of (libraries, standalone_commands, conflicts)
+        Tuple of (libraries, standalone_commands, conflicts, shadowed).
+        Shadowed entries are (name, hidden path, path that wins).
     """
-    addons_dir = ensure_addons_dir()
-
     libraries: list[Library] = []
     standalone: list[Command] = []
+    conflicts: dict[str, tuple[Library, Command]] = {}
+    shadowed: list[tuple[str, Path, Path]] = []
+    # Name -> path of the entry it resolves to, from higher layers
+    owners: dict[str, Path] = {}
+
+    for layer in layers:
+        visible_libraries: list[Library] = []
+        defined: dict[str, Path] = {}
+        for library in layer.libraries:
+            name = library.library_id
+            owner = owners.get(name) or defined.get(name)
+            if owner is not None:
+                # Also the second of two directories sharing a library_id
+                shadowed.append((name, library.path, owner))
+                continue
+            defined[name] = library.path
+            visible_libraries.append(library)
+
+        visible_standalone: list[Command] = []
+        for cmd in layer.standalone:
+            owner = owners.get(cmd.name)
+            if owner is not None:
+                shadowed.append((cmd.name, cmd.script_path, owner))
+                continue
+            defined.setdefault(cmd.name, cmd.script_path)
+            visible_standalone.append(cmd)
+
+        conflicts.update(detect_conflicts(visible_libraries, visible_standalone))
+        libraries.extend(visible_libraries)
+        standalone.extend(visible_standalone)
+        owners.update(defined)
+
+    return libraries, standalone, conflicts, shadowed
+
+
+def get_scan_mode() -> str:
+    """Get the library scan mode from CORUN_SCAN_MODE (serial/threads/auto)."""
+    mode = os.environ.get("CORUN_SCAN_MODE", SCAN_AUTO).lower()
+    return mode if mode in SCAN_MODES else SCAN_AUTO
+
+
+def get_env_number(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment."""
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def map_libraries(func, paths: list[Path], threaded: bool, deadline: Optional[float]):
+    """
+    Apply func to each path, serially or in a bounded thread pool.
+
+    Results keep the order of paths.
+
+    Args:
+        func: Function taking a library path
+        paths: Library paths
+        threaded: Start in the thread pool right away
+        deadline: time.monotonic() value after which the remaining paths
+            move to the thread pool (auto mode), or None
+
+    Returns:
+        Tuple of (results, whether the thread pool was used)
+    """
+    results = []
+    if not threaded:
+        for i, path in enumerate(paths):
+            if deadline is not None and time.monotonic() > deadline:
+                paths = paths[i:]
+                threaded = True
+                break
+            results.append(func(path))
+        else:
+            return results, False
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = get_env_number("CORUN_SCAN_WORKERS", SCAN_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results.extend(pool.map(func, paths))
+    return results, True
+
+
+def scan_libraries(
+    addons_dir: Path,
+    dir_names: list[str],
+    cached_libraries: dict[str, dict],
+    was_slow: bool = False,
+) -> tuple[list[tuple[Optional[dict], Optional[Library]]], bool]:
+    """
+    Refresh every library directory, reusing fresh index entries.
+
+    On slow (network) filesystems each library costs several round-trips;
+    the filesystem work (fingerprint stats, rescans of changed libraries)
+    can run in a thread pool to overlap that latency. In auto mode it starts
+    serially and moves the remaining work to the pool once it has taken
+    longer than the threshold, or starts threaded right away if the previous
+    scan was slow. Rebuilding libraries from the index is CPU-bound and
+    always runs serially.
+
+    Args:
+        addons_dir: Addons directory
+        dir_names: Library directory names, in listing order
+        cached_libraries: Index entries by directory name
+        was_slow: Whether the previous scan's filesystem work was slow
+
+    Returns:
+        Tuple of (index entry, library) per directory in dir_names order,
+        and whether this scan's filesystem work was slow. The entry is None
+        if the directory disappeared, and a new object if it was rescanned.
+    """
+    mode = get_scan_mode()
+    threshold = get_env_number("CORUN_SCAN_THRESHOLD_MS", SCAN_THRESHOLD_MS) / 1000
+    paths = [addons_dir / name for name in dir_names]
+
+    start = time.monotonic()
+    threaded = mode == SCAN_THREADS or (mode == SCAN_AUTO and was_slow)
+    deadline = start + threshold if mode == SCAN_AUTO else None
+
+    # Fingerprints: a couple of stats per library
+    fingerprints, threaded = map_libraries(
+        index.library_fingerprint, paths, threaded, deadline
+    )
+
+    # Rescan libraries whose fingerprint changed
+    stale = [
+        i
+        for i, (name, fingerprint) in enumerate(zip(dir_names, fingerprints))
+        if fingerprint is not None
+        and (
+            name not in cached_libraries
+            or cached_libraries[name]["fingerprint"] != fingerprint
+        )
+    ]
+    scanned, _ = map_libraries(
+        scan_library, [paths[i] for i in stale], threaded, deadline
+    )
+    rescanned = dict(zip(stale, scanned))
+
+    slow = time.monotonic() - start > threshold
+
+    results: list[tuple[Optional[dict], Optional[Library]]] = []
+    for i, (name, fingerprint) in enumerate(zip(dir_names, fingerprints)):
+        if fingerprint is None:
+            results.append((None, None))
+        elif i in rescanned:
+            library = rescanned[i]
+            results.append((index.library_to_entry(library, fingerprint), library))
+        else:
+            entry = cached_libraries[name]
+            results.append((entry, index.library_from_entry(paths[i], entry)))
+
+    return results, slow
+
 
-    # Scan directories as libraries
-    for item in addons_dir.iterdir():
-        if item.is_dir() and not item.name.startswith("."):
-            library = scan_library(item)
-            if library:
-                libraries.append(library)
+def scan_tree(addons_dir: Path) -> tuple[list[Library], list[Command]]:
+    """
+    Scan one addons directory for libraries and standalone scripts.
+
+    Uses the persistent index: the top-level listing is reused while the
+    addons directory is unchanged, and only libraries whose fingerprint
+    changed are rescanned.
+
+    Args:
+        addons_dir: Addons directory
+
+    Returns:
+        Tuple of (libraries, standalone_commands); both empty if the
+        directory does not exist
+    """
+    data = index.load_index()
+    tree_key = str(addons_dir)
+    tree = data["trees"].get(tree_key) or {}
+    cached_libraries = tree.get("libraries", {})
+    dirty = False
+
+    # Top-level listing: library directories and standalone script names
+    addons_fp = index.path_fingerprint(addons_dir)
+    if addons_fp is None:
+        if tree_key in data["trees"]:
+            del data["trees"][tree_key]
+            index.save_index(data)
+        return [], []
+    if tree.get("fingerprint") == addons_fp and "dirs" in tree:
+        dir_names = tree["dirs"]
+        script_names = tree["scripts"]
+    else:
+        try:
+            dir_names, script_names, _ = list_dir(addons_dir)
+        except OSError:
+            # Not a directory, or not readable
+            return [], []
+        dirty = True
+
+    libraries: list[Library] = []
+    library_entries: dict[str, dict] = {}
+
+    # Scan directories as libraries, reusing index entries that are fresh
+    was_slow = tree.get("slow", False)
+    results, slow = scan_libraries(addons_dir, dir_names, cached_libraries, was_slow)
+    if slow != was_slow:
+        dirty = True
+
+    for dir_name, (entry, library) in zip(dir_names, results):
+        if entry is None:
+            # Directory disappeared since the listing
+            dirty = True
+            continue
+        if entry is not cached_libraries.get(dir_name):
+            dirty = True
+
+        library_entries[dir_name] = entry
+        if library:
+            libraries.append(library)
+
+    if len(library_entries) != len(cached_libraries):
+        dirty = True
+
+    # Standalone scripts
+    standalone = [
+        Command(
+            name=name,
+            directory=addons_dir,
+            library_id=None,
+        )
+        for name in script_names
+    ]
 
-    # Scan standalone scripts
-    standalone = scan_standalone_scripts(addons_dir)
+    if dirty:
+        data["trees"][tree_key] = {
+            "fingerprint": addons_fp,
+            "dirs": dir_names,
+            "scripts": script_names,
+            "libraries": library_entries,
+            "slow": slow,
+        }
+        index.save_index(data)
 
-    # Detect conflicts
-    conflicts = detect_conflicts(libraries, standalone)
+    return libraries, standalone
 
+
+def scan_layer(name: str, addons_dir: Path) -> Layer:
+    """Scan one search path layer (the user layer is created if missing)."""
+    if addons_dir == get_addons_dir():
+        ensure_addons_dir()
+    libraries, standalone = scan_tree(addons_dir)
+    return Layer(name, addons_dir, libraries, standalone)
+
+
+def scan_layers(cwd: Optional[Path] = None) -> list[Layer]:
+    """
+    Scan every search path layer.
+
+    Args:
+        cwd: Directory to look for a project layer from (default: the
+            working directory)
+
+    Returns:
+        Layer scan results, highest precedence first
+    """
+    return [scan_layer(name, path) for name, path in get_search_paths(cwd)]
+
+
+def scan_addons() -> tuple[list[Library], list[Command], dict[str, tuple[Library, Command]]]:
+    """
+    Scan all addons layers for libraries and standalone scripts.
+
+    Returns:
+        Tuple of (libraries, standalone_commands, conflicts), merged
+        across layers (see merge_layers)
+    """
+    libraries, standalone, conflicts, _ = merge_layers(scan_layers())
     return libraries, standalone, conflicts
 
 
+def update_layer(layer: Layer, changed_dirs: set[str], listing_changed: bool) -> Layer:
+    """
+    Incrementally update a previous layer scan after known changes.
+
+    Used by the watcher: only the named library directories are rescanned,
+    and the top level is listed again only if it changed. The index is
+    updated to match.
+
+    Args:
+        layer: Layer from the previous scan
+        changed_dirs: Library directory names that changed
+        listing_changed: Whether entries were added to or removed from the
+            addons directory itself
+
+    Returns:
+        The updated layer
+    """
+    addons_dir = layer.path
+
+    data = index.load_index()
+    tree_key = str(addons_dir)
+    tree = data["trees"].get(tree_key)
+    if not tree or "dirs" not in tree:
+        # Nothing to update incrementally
+        return scan_layer(layer.name, addons_dir)
+
+    by_dir = {library.path.name: library for library in layer.libraries}
+    library_entries = tree.setdefault("libraries", {})
+    changed = set(changed_dirs)
+
+    if listing_changed:
+        try:
+            dir_names, script_names, _ = list_dir(addons_dir)
+        except OSError:
+            # The layer itself went away
+            return scan_layer(layer.name, addons_dir)
+        tree["fingerprint"] = index.path_fingerprint(addons_dir)
+        # New directories need a first scan; removed ones are dropped below
+        changed.update(name for name in dir_names if name not in library_entries)
+        tree["dirs"] = dir_names
+        tree["scripts"] = script_names
+    else:
+        dir_names = tree["dirs"]
+        script_names = tree["scripts"]
+
+    for name in changed:
+        library_path = addons_dir / name
+        fingerprint = index.library_fingerprint(library_path)
+        if fingerprint is None:
+            library_entries.pop(name, None)
+            by_dir.pop(name, None)
+            continue
+        library = scan_library(library_path)
+        library_entries[name] = index.library_to_entry(library, fingerprint)
+        by_dir[name] = library
+
+    for name in set(library_entries) - set(dir_names):
+        del library_entries[name]
+
+    index.save_index(data)
+
+    libraries = [by_dir[name] for name in dir_names if by_dir.get(name)]
+
+    # Standalone scripts: keep existing commands, add new ones
+    standalone_by_name = {cmd.name: cmd for cmd in layer.standalone}
+    standalone = [
+        standalone_by_name.get(name)
+        or Command(name=name, directory=addons_dir, library_id=None)
+        for name in script_names
+    ]
+
+    return Layer(layer.name, addons_dir, libraries, standalone)
+
+
 def get_library_by_id(library_id: str) -> Optional[Library]:
-    """Get a library by its ID."""
-    libraries, _, _ = scan_addons()
-    for lib in libraries:
-        if lib.library_id == library_id:
-            return lib
-    return None
+    """Get a library by its ID (from the process-level registry)."""
+    from .registry import get_registry
+
+    return get_registry().get_library(library_id)
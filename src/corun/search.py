@@ -0,0 +1,460 @@
+"""Command search index (``corun search``), stored in SQLite.
+
+One row per command holds its library ID, name, library description and
+the leading comment block of its script. The rows are indexed by an FTS5
+table with the trigram tokenizer, so any substring of three or more
+characters is an index lookup, ranked with bm25 (names weigh more than
+descriptions, descriptions more than script headers).
+
+The index lives in ``~/.corun/search.db`` and is brought up to date before
+each query: every visible library and standalone script is a source with a
+fingerprint (the persistent scan index's fingerprint for libraries, a stat
+for standalone scripts), and only sources whose fingerprint changed are
+re-read. While the scan index is fresh this needs no registry scan.
+
+Where SQLite lacks FTS5 trigrams, or every query word is shorter than a
+trigram, matching falls back to LIKE over the rows.
+"""
+
+import json
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .registry import Registry
+
+# Default database file
+SEARCH_FILE = Path.home() / ".corun" / "search.db"
+
+# Bump when the schema changes; older databases are rebuilt
+SCHEMA_VERSION = 1
+
+# Script bytes read for the header comment block
+HEADER_BYTES = 4096
+
+# Header comment lines kept per script
+HEADER_LINES = 20
+
+# bm25 weights for (library_id, command, description, header)
+RANK_WEIGHTS = (10.0, 10.0, 3.0, 1.0)
+
+# Shortest word the trigram index can look up
+TRIGRAM = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    library_id TEXT,
+    command TEXT NOT NULL,
+    description TEXT NOT NULL,
+    header TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commands_source ON commands(source);
+"""
+
+# External-content FTS table kept in step with `commands` by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS commands_fts USING fts5(
+    library_id, command, description, header,
+    content='commands', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS commands_ai AFTER INSERT ON commands BEGIN
+    INSERT INTO commands_fts(rowid, library_id, command, description, header)
+    VALUES (new.id, new.library_id, new.command, new.description, new.header);
+END;
+CREATE TRIGGER IF NOT EXISTS commands_ad AFTER DELETE ON commands BEGIN
+    INSERT INTO commands_fts(
+        commands_fts, rowid, library_id, command, description, header
+    )
+    VALUES (
+        'delete', old.id, old.library_id, old.command, old.description,
+        old.header
+    );
+END;
+"""
+
+
+@dataclass
+class SearchResult:
+    """One matching command."""
+
+    library_id: Optional[str]
+    command: str
+    description: str
+    header: str
+
+    @property
+    def label(self) -> str:
+        """Command line that runs it: '<library_id> <command>' or the script name."""
+        if self.library_id:
+            return f"{self.library_id} {self.command}"
+        return self.command
+
+    @property
+    def summary(self) -> str:
+        """First header line, else the library description."""
+        return self.header.split("\n", 1)[0] or self.description
+
+
+def get_search_file() -> Path:
+    """Get the search database path."""
+    return SEARCH_FILE
+
+
+def connect(path: Path) -> tuple[sqlite3.Connection, bool]:
+    """
+    Open the database, creating (or rebuilding) the schema if needed.
+
+    Returns:
+        Tuple of (connection, whether the FTS5 trigram index is available)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=1.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.executescript(
+            "DROP TABLE IF EXISTS commands_fts;"
+            "DROP TABLE IF EXISTS commands;"
+            "DROP TABLE IF EXISTS sources;"
+        )
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    conn.executescript(SCHEMA)
+
+    try:
+        conn.executescript(FTS_SCHEMA)
+        has_fts = True
+    except sqlite3.OperationalError:
+        # No FTS5, or SQLite older than 3.34 (no trigram tokenizer)
+        has_fts = False
+    return conn, has_fts
+
+
+def read_header(content: bytes) -> str:
+    """
+    Extract the leading comment block of a script.
+
+    The shebang and blank lines before the block are skipped; the block
+    ends at the first line that is not a comment.
+    """
+    lines = []
+    text = content[:HEADER_BYTES].decode("utf-8", "replace")
+    for position, line in enumerate(text.splitlines()):
+        line = line.strip()
+        if position == 0 and line.startswith("#!"):
+            continue
+        if not line.startswith("#"):
+            if line or lines:
+                break
+            continue
+        comment = line.lstrip("#").strip()
+        if comment or lines:
+            lines.append(comment)
+        if len(lines) >= HEADER_LINES:
+            break
+    return "\n".join(lines).strip()
+
+
+def script_header(script_path: Path) -> str:
+    """Read a script's header comment block ('' if unreadable)."""
+    from .archive import is_packed
+    from .executor import read_script_content
+
+    try:
+        if is_packed(script_path):
+            content = read_script_content(script_path)
+        else:
+            with open(script_path, "rb") as f:
+                content = f.read(HEADER_BYTES)
+    except OSError:
+        return ""
+    return read_header(content)
+
+
+# A search source: (fingerprint, library_id, description, command names).
+# Keyed by the library path, or the script path of a standalone script
+# (library_id None).
+Source = tuple[str, Optional[str], str, list[str]]
+
+
+def sources_from_index(addons_dirs: list[Path]) -> Optional[dict[str, Source]]:
+    """
+    Build sources from the persistent scan index, without a registry.
+
+    Library fingerprints are the index's own, just validated by
+    get_fresh_names; standalone scripts cost one stat each.
+
+    Returns:
+        Mapping of source path to source, or None if the index is stale
+    """
+    from . import index
+    from .builtin_commands import BUILTIN_COMMANDS
+
+    names = index.get_fresh_names(addons_dirs)
+    if names is None:
+        return None
+
+    sources: dict[str, Source] = {}
+    for name, (path, entry) in names.items():
+        if name in BUILTIN_COMMANDS:
+            # Cannot be run (see Registry.builtin_shadowed)
+            continue
+        if entry is None:
+            fingerprint = json.dumps(index.path_fingerprint(path))
+            sources[str(path)] = (fingerprint, None, "", [name])
+            continue
+        metadata = entry.get("metadata")
+        sources[str(path)] = (
+            json.dumps(entry["fingerprint"]),
+            name,
+            metadata["description"] if metadata else "",
+            entry["commands"],
+        )
+    return sources
+
+
+def sources_from_registry(registry: "Registry") -> dict[str, Source]:
+    """Build sources from the registry (when the index cannot be written)."""
+    from . import index
+
+    sources: dict[str, Source] = {}
+    for library in registry.libraries:
+        sources[str(library.path)] = (
+            json.dumps(index.library_fingerprint(library.path)),
+            library.library_id,
+            library.description if library.metadata else "",
+            [cmd.name for cmd in library.commands],
+        )
+    for cmd in registry.standalone:
+        sources[str(cmd.script_path)] = (
+            json.dumps(index.path_fingerprint(cmd.script_path)),
+            None,
+            "",
+            [cmd.name],
+        )
+    return sources
+
+
+def collect_sources() -> dict[str, Source]:
+    """
+    Fingerprint every visible library and standalone script.
+
+    A stale index is refreshed by a registry scan first.
+
+    Returns:
+        Mapping of source path to source
+    """
+    from .registry import get_registry
+    from .scanner import get_search_paths
+
+    addons_dirs = [path for _, path in get_search_paths()]
+    sources = sources_from_index(addons_dirs)
+    if sources is None:
+        registry = get_registry()
+        sources = sources_from_index(addons_dirs)
+        if sources is None:
+            sources = sources_from_registry(registry)
+    return sources
+
+
+def sync_index(conn: sqlite3.Connection, sources: dict[str, Source]) -> int:
+    """
+    Bring the search index up to date with the addons layers.
+
+    Only sources that are new, removed or whose fingerprint changed are
+    touched.
+
+    Returns:
+        Number of sources (re)indexed or removed
+    """
+    indexed = dict(conn.execute("SELECT path, fingerprint FROM sources"))
+
+    removed = [path for path in indexed if path not in sources]
+    changed = [
+        path
+        for path, (fingerprint, *_) in sources.items()
+        if indexed.get(path) != fingerprint
+    ]
+    if not removed and not changed:
+        return 0
+
+    with conn:
+        for path in removed + changed:
+            conn.execute("DELETE FROM commands WHERE source = ?", (path,))
+        conn.executemany(
+            "DELETE FROM sources WHERE path = ?", [(path,) for path in removed]
+        )
+        for path in changed:
+            fingerprint, library_id, description, commands = sources[path]
+            source = Path(path)
+            conn.executemany(
+                "INSERT INTO commands"
+                " (source, library_id, command, description, header)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        path,
+                        library_id,
+                        name,
+                        description,
+                        script_header(
+                            source / f"{name}.sh" if library_id else source
+                        ),
+                    )
+                    for name in commands
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sources (path, fingerprint) VALUES (?, ?)",
+                (path, fingerprint),
+            )
+    return len(removed) + len(changed)
+
+
+def quote(term: str) -> str:
+    """Quote a term as an FTS5 string."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def like_pattern(word: str) -> str:
+    """Build a LIKE pattern matching a word anywhere."""
+    return "%" + re.sub(r"([%_\\])", r"\\\1", word) + "%"
+
+
+def like_conditions(words: list[str], table: str) -> tuple[list[str], list[str]]:
+    """
+    Build SQL conditions requiring each word in some field of a row.
+
+    Returns:
+        Tuple of (conditions, parameters)
+    """
+    fields = ("library_id", "command", "description", "header")
+    conditions = []
+    params: list[str] = []
+    for word in words:
+        conditions.append(
+            "("
+            + " OR ".join(f"{table}{field} LIKE ? ESCAPE '\\'" for field in fields)
+            + ")"
+        )
+        params.extend([like_pattern(word)] * len(fields))
+    return conditions, params
+
+
+def fts_query(words: list[str], fuzzy: bool) -> str:
+    """
+    Build an FTS5 MATCH expression.
+
+    Exact: every word must appear as a substring. Fuzzy: any trigram of
+    the words may appear, so bm25 ranks by how many of them match (this
+    tolerates typos).
+    """
+    if not fuzzy:
+        return " AND ".join(quote(word) for word in words)
+    trigrams = {
+        word[i : i + TRIGRAM]
+        for word in words
+        for i in range(len(word) - TRIGRAM + 1)
+    }
+    return " OR ".join(quote(trigram) for trigram in sorted(trigrams))
+
+
+def run_fts(
+    conn: sqlite3.Connection, words: list[str], fuzzy: bool, limit: int
+) -> list[tuple]:
+    """
+    Query the FTS index, best matches first.
+
+    Words shorter than a trigram cannot be looked up; they filter the rows
+    the other words found.
+    """
+    long_words = [word for word in words if len(word) >= TRIGRAM]
+    conditions, params = like_conditions(
+        [word for word in words if len(word) < TRIGRAM], "c."
+    )
+    weights = ", ".join(str(weight) for weight in RANK_WEIGHTS)
+    name = " ".join(words)
+    return conn.execute(
+        "SELECT c.library_id, c.command, c.description, c.header"
+        " FROM commands_fts JOIN commands AS c ON c.id = commands_fts.rowid"
+        " WHERE commands_fts MATCH ?"
+        + "".join(f" AND {condition}" for condition in conditions)
+        # Exact names first, then bm25 (lower is better)
+        + " ORDER BY (c.command = ? OR c.library_id = ?) DESC,"
+        f" bm25(commands_fts, {weights}), c.library_id, c.command"
+        " LIMIT ?",
+        (fts_query(long_words, fuzzy), *params, name, name, limit),
+    ).fetchall()
+
+
+def run_like(conn: sqlite3.Connection, words: list[str], limit: int) -> list[tuple]:
+    """Query with LIKE (short words only, or no FTS5), ranked by field."""
+    conditions, params = like_conditions(words, "")
+    name = " ".join(words)
+    return conn.execute(
+        "SELECT library_id, command, description, header FROM commands"
+        f" WHERE {' AND '.join(conditions)}"
+        " ORDER BY (command = ? OR library_id = ?) DESC,"
+        " (command LIKE ? ESCAPE '\\' OR library_id LIKE ? ESCAPE '\\') DESC,"
+        " library_id, command"
+        " LIMIT ?",
+        (*params, name, name, like_pattern(name), like_pattern(name), limit),
+    ).fetchall()
+
+
+def query_index(
+    conn: sqlite3.Connection, words: list[str], has_fts: bool, limit: int
+) -> tuple[list[tuple], bool]:
+    """
+    Find the best matching rows for lower-case query words.
+
+    Returns:
+        Tuple of (rows, whether they are fuzzy matches because nothing
+        matched exactly)
+    """
+    if not has_fts or max(len(word) for word in words) < TRIGRAM:
+        return run_like(conn, words, limit), False
+    rows = run_fts(conn, words, False, limit)
+    if rows:
+        return rows, False
+    rows = run_fts(conn, words, True, limit)
+    return rows, bool(rows)
+
+
+def search(
+    query: str, limit: int = 20, rebuild: bool = False
+) -> tuple[list[SearchResult], bool]:
+    """
+    Search commands by name, library, description and script header.
+
+    Args:
+        query: Words that must all match (case-insensitive substrings)
+        limit: Maximum number of results
+        rebuild: Drop the index and rebuild it from scratch
+
+    Returns:
+        Tuple of (results, whether they are fuzzy matches because nothing
+        matched exactly)
+    """
+    words = query.lower().split()
+    conn, has_fts = connect(get_search_file())
+    try:
+        if rebuild:
+            with conn:
+                conn.execute("DELETE FROM commands")
+                conn.execute("DELETE FROM sources")
+        sync_index(conn, collect_sources())
+        rows, fuzzy = query_index(conn, words, has_fts, limit) if words else ([], False)
+    finally:
+        conn.close()
+
+    return [SearchResult(*row) for row in rows], fuzzy
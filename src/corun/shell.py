@@ -0,0 +1,257 @@
+"""Interactive corun shell (``corun shell``).
+
+Keeps the registry loaded between commands, so running a script costs only
+the process spawn. The registry is kept current by the addons watcher.
+Lines are ``<library> <command> [args...]`` or ``<script> [args...]``, as
+on the command line; arguments (options included) go to the script
+unchanged. Other corun commands (``library install``, ``stats``...) are run
+through a corun subprocess; the registry is reloaded after ``library``
+commands. Libraries and scripts named like a built-in or shell command
+(``list``, ``reload``...) are hidden and reported.
+"""
+
+import cmd
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+from .builtin_commands import BUILTIN_COMMANDS, BUILTIN_HELP
+from .console import console
+from .executor import execute_script
+from .registry import Registry, get_registry, reload_registry
+
+# Readline history file
+HISTORY_FILE = Path.home() / ".corun" / "shell_history"
+
+# Lines kept in the history file
+HISTORY_LENGTH = 1000
+
+INTRO = (
+    "corun shell - type a command as you would after 'corun', "
+    "'help' for help, Ctrl+D to exit."
+)
+
+
+class CorunShell(cmd.Cmd):
+    """Read-eval loop over the in-memory registry."""
+
+    prompt = "corun> "
+    intro = INTRO
+    # Library IDs and script names may contain these
+    identchars = cmd.Cmd.identchars + "-."
+
+    def shell_commands(self) -> list[str]:
+        """Names handled by the shell itself (do_* methods)."""
+        return [name[3:] for name in self.get_names() if name.startswith("do_")]
+
+    def warn_shadowed(self, registry: Registry) -> None:
+        """Warn (on stderr) about libraries and scripts that cannot be run here."""
+        from rich.console import Console
+
+        shell_commands = set(self.shell_commands())
+        hidden = [
+            (f"'{name}' is a built-in command", path)
+            for name, path in registry.builtin_shadowed
+        ]
+        hidden += [
+            (f"'{library.library_id}' is a shell command", library.path)
+            for library in registry.libraries
+            if library.library_id in shell_commands
+        ]
+        hidden += [
+            (f"'{command.name}' is a shell command", command.script_path)
+            for command in registry.standalone
+            if command.name in shell_commands
+        ]
+
+        err = Console(stderr=True)
+        for reason, path in hidden:
+            err.print(
+                f"[yellow]⚠️  {reason}; [dim]{path}[/dim] is ignored. "
+                f"Rename it to run it.[/yellow]"
+            )
+
+    def emptyline(self) -> bool:
+        """Do nothing on an empty line (instead of repeating the last one)."""
+        return False
+
+    def default(self, line: str) -> bool:
+        """Run a library command, standalone script or corun command."""
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            console.print(f"[red]Error: {e}[/red]")
+            return False
+        if not words:
+            return False
+
+        if words[0] in BUILTIN_COMMANDS:
+            subprocess.run([sys.executable, "-m", "corun", *words])
+            if words[0] == "library":
+                # Installs and removals must show up without the watcher
+                self.warn_shadowed(reload_registry())
+            return False
+
+        registry = get_registry()
+        target, rest = words[0], words[1:]
+
+        library = registry.get_library(target)
+        if library is not None:
+            if not rest:
+                self.print_library(library)
+                return False
+            command = registry.get_command(target, rest[0])
+            if command is None:
+                console.print(
+                    f"[red]Error: Command '{rest[0]}' not found in '{target}'[/red]"
+                )
+                self.print_library(library)
+                return False
+            execute_script(
+                command.script_path,
+                rest[1:],
+                handoff=False,
+                library_id=library.library_id,
+                cache_ttl=library.get_cache_ttl(command.name),
+                cache_env=library.cache_env,
+            )
+            return False
+
+        command = registry.get_standalone(target)
+        if command is not None:
+            execute_script(command.script_path, rest, handoff=False)
+            return False
+
+        console.print(f"[red]Error: '{target}' not found[/red] (try 'list')")
+        return False
+
+    def print_library(self, library) -> None:
+        """Show a library's commands."""
+        console.print(f"\n[bold]{library.name}[/bold] - {library.description}\n")
+        console.print("[bold]Available commands:[/bold]")
+        for command in library.commands:
+            console.print(f"  • {command.name}")
+        console.print()
+
+    def do_list(self, arg: str) -> bool:
+        """List libraries and standalone scripts."""
+        registry = get_registry()
+        for library in registry.libraries:
+            names = ", ".join(command.name for command in library.commands)
+            console.print(f"  • [cyan]{library.library_id}[/cyan]: [green]{names}[/green]")
+        for command in registry.standalone:
+            console.print(f"  • [cyan]{command.name}[/cyan]")
+        return False
+
+    def do_reload(self, arg: str) -> bool:
+        """Rescan the addons directory."""
+        registry = reload_registry()
+        console.print(
+            f"[green]✓ Reloaded[/green] ({len(registry.libraries)} libraries, "
+            f"{len(registry.standalone)} scripts)"
+        )
+        self.warn_shadowed(registry)
+        return False
+
+    def do_exit(self, arg: str) -> bool:
+        """Exit the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg: str) -> bool:
+        """Exit on Ctrl+D."""
+        print()
+        return True
+
+    def get_names(self) -> list[str]:
+        """Hide do_EOF from help and completion."""
+        return [name for name in super().get_names() if name != "do_EOF"]
+
+    def help_commands(self) -> None:
+        """Help topic: how lines are run."""
+        console.print(__doc__)
+
+    def completenames(self, text: str, *ignored) -> list[str]:
+        """Complete the first word: libraries, scripts and shell commands."""
+        registry = get_registry()
+        names = set(super().completenames(text, *ignored))
+        names.update(library.library_id for library in registry.libraries)
+        names.update(command.name for command in registry.standalone)
+        names.update(name for name, help_text in BUILTIN_HELP.items() if help_text)
+        return sorted(name for name in names if name.startswith(text))
+
+    def completedefault(self, text: str, line: str, begidx: int, endidx: int) -> list[str]:
+        """Complete a library's command names as the second word."""
+        words = line[:begidx].split()
+        if len(words) != 1:
+            return []
+        library = get_registry().get_library(words[0])
+        if library is None:
+            return []
+        return [
+            command.name
+            for command in library.commands
+            if command.name.startswith(text)
+        ]
+
+
+def load_history() -> Optional[ModuleType]:
+    """Enable readline history, returning the module (None if unavailable)."""
+    try:
+        import readline
+    except ImportError:
+        return None
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+    readline.set_history_length(HISTORY_LENGTH)
+    # Complete on spaces only, so IDs with '-' stay one word
+    readline.set_completer_delims(" \t\n")
+    return readline
+
+
+def save_history(readline: ModuleType) -> None:
+    """Write the readline history file."""
+    try:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        readline.write_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+
+
+def run_shell(watch: bool = True) -> None:
+    """
+    Run the interactive shell until exit or Ctrl+D.
+
+    Args:
+        watch: Keep the registry up to date with the addons watcher
+    """
+    registry = get_registry()
+    watcher = None
+    if watch:
+        from .watcher import start_watcher
+
+        watcher = start_watcher()
+
+    readline = load_history()
+    shell = CorunShell()
+    shell.warn_shadowed(registry)
+    try:
+        while True:
+            try:
+                shell.cmdloop()
+                break
+            except KeyboardInterrupt:
+                # Ctrl+C at the prompt drops the current line
+                print()
+                shell.intro = ""
+    finally:
+        if readline is not None:
+            save_history(readline)
+        if watcher:
+            watcher.stop()
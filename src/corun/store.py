@@ -0,0 +1,159 @@
+"""Content-addressed script store (~/.corun/objects).
+
+Installed library scripts are hardlinks to objects named by the SHA-256 of
+their content, so byte-identical scripts across libraries share one inode
+(one copy on disk and in the page cache). Objects are read-only (0555),
+but that only guards against accidental writes: the owner can still chmod
+and edit an installed script, and the edit then shows up in every library
+sharing the object. An existing object is therefore hashed again before it
+is reused, and replaced if its content no longer matches its name.
+
+An object whose link count drops to 1 is referenced only by the store and
+is reclaimed by ``corun library gc``.
+"""
+
+import hashlib
+import os
+import time
+import uuid
+from pathlib import Path
+
+# Object directory
+OBJECTS_DIR = Path.home() / ".corun" / "objects"
+
+# Mode of stored objects (shared by every library linking them)
+OBJECT_MODE = 0o555
+
+# Prefix of objects being written
+TEMP_PREFIX = ".tmp-"
+
+# Temp files older than this are abandoned (seconds)
+TEMP_MAX_AGE = 3600
+
+# Bytes hashed per read
+READ_SIZE = 1024 * 1024
+
+
+def get_objects_dir() -> Path:
+    """Get the object store directory."""
+    return OBJECTS_DIR
+
+
+def hash_file(path: Path) -> str:
+    """Get the hex SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def object_path(digest: str) -> Path:
+    """Get the path of an object (fanned out by the first two hex digits)."""
+    return get_objects_dir() / digest[:2] / digest[2:]
+
+
+def add_object(source: Path) -> tuple[Path, bool]:
+    """
+    Add a file to the store unless an identical object exists.
+
+    An existing object is only reused if its content still hashes to its
+    name. A modified one is replaced by a fresh object; libraries already
+    linking the modified inode keep it.
+
+    Args:
+        source: File to store
+
+    Returns:
+        Tuple of (object path, True if the object already existed)
+    """
+    digest = hash_file(source)
+    path = object_path(digest)
+    try:
+        if hash_file(path) == digest:
+            return path, True
+    except FileNotFoundError:
+        pass
+
+    write_object(source, path)
+    return path, False
+
+
+def write_object(source: Path, path: Path) -> None:
+    """
+    Copy a file to an object path, replacing any existing object atomically.
+
+    Args:
+        source: File to store
+        path: Object path from object_path()
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.parent / f"{TEMP_PREFIX}{uuid.uuid4().hex}"
+    try:
+        with open(source, "rb") as src, open(temp, "xb") as dst:
+            while chunk := src.read(READ_SIZE):
+                dst.write(chunk)
+        temp.chmod(OBJECT_MODE)
+        # Publish atomically; a concurrent writer stored the same bytes
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+def link_object(source: Path, target: Path) -> bool:
+    """
+    Materialize a file as a hardlink to its store object.
+
+    Args:
+        source: File whose content to link
+        target: Path to create
+
+    Returns:
+        True if the object already existed (deduplicated)
+
+    Raises:
+        OSError: If the store is unusable or on another filesystem
+    """
+    path, existed = add_object(source)
+    os.link(path, target)
+    return existed
+
+
+def gc() -> tuple[int, int]:
+    """
+    Remove objects no library links to, and abandoned temp files.
+
+    Returns:
+        Tuple of (files removed, bytes freed)
+    """
+    removed = freed = 0
+    temp_cutoff = time.time() - TEMP_MAX_AGE
+    try:
+        fanouts = list(os.scandir(get_objects_dir()))
+    except FileNotFoundError:
+        return 0, 0
+
+    for fanout in fanouts:
+        if not fanout.is_dir(follow_symlinks=False):
+            continue
+        with os.scandir(fanout.path) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    if entry.name.startswith(TEMP_PREFIX):
+                        if st.st_mtime > temp_cutoff:
+                            continue
+                    elif st.st_nlink > 1:
+                        continue
+                    os.unlink(entry.path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += st.st_size
+        try:
+            os.rmdir(fanout.path)
+        except OSError:
+            # Not empty
+            pass
+    return removed, freed
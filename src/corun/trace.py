@@ -0,0 +1,227 @@
+"""Phase timing instrumentation for the run path.
+
+Enabled with ``--profile`` before the command name or the CORUN_TRACE
+environment variable:
+
+- ``CORUN_TRACE=1`` (or ``--profile``): print a table of phase timings to
+  stderr when corun exits
+- ``CORUN_TRACE=<file>.json`` (or ``--profile=<file>.json``): write a Chrome
+  trace-event file, viewable in chrome://tracing or Perfetto
+
+Phases: ``import``, ``scan``, ``register``, ``resolve``, ``check`` (script
+exists, is executable, has a shebang), ``spawn`` and ``runtime``. Times are
+measured from the moment this module is imported, so interpreter startup
+itself is not included.
+
+When disabled, ``span()`` returns a shared no-op context manager and
+``begin()``/``end()`` return immediately.
+"""
+
+import os
+import sys
+import time
+
+TRACE_ENV = "CORUN_TRACE"
+PROFILE_FLAG = "--profile"
+
+# Output targets
+OUTPUT_TABLE = "table"
+
+_origin = time.perf_counter()
+_output: str | None = None
+_events: list[tuple[str, float, float, int]] = []
+_open: dict[str, float] = {}
+_reported = False
+_get_ident = None
+
+
+class _NullSpan:
+    """Shared no-op context manager used while tracing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def is_enabled() -> bool:
+    """Check whether tracing is on."""
+    return _output is not None
+
+
+def configure(argv: list[str]) -> None:
+    """
+    Enable tracing from CORUN_TRACE or a --profile option.
+
+    --profile is only recognised before the command name, so scripts can
+    still receive an option with that name. It is removed from argv.
+
+    Args:
+        argv: sys.argv, modified in place
+    """
+    output = None
+    value = os.environ.get(TRACE_ENV, "")
+    if value and value != "0":
+        output = OUTPUT_TABLE if value == "1" else value
+
+    index = 1
+    while index < len(argv) and argv[index].startswith("-"):
+        if argv[index] == PROFILE_FLAG:
+            output = OUTPUT_TABLE
+        elif argv[index].startswith(PROFILE_FLAG + "="):
+            output = argv[index].split("=", 1)[1] or OUTPUT_TABLE
+        else:
+            index += 1
+            continue
+        del argv[index]
+
+    if output is not None:
+        enable(output)
+
+
+def enable(output: str = OUTPUT_TABLE) -> None:
+    """
+    Turn tracing on; the report is emitted at exit.
+
+    Args:
+        output: OUTPUT_TABLE or a path for a Chrome trace-event JSON file
+    """
+    # Imported here to keep the disabled path free of extra imports
+    import atexit
+    import threading
+
+    global _output, _get_ident
+    if _output is None:
+        atexit.register(report)
+    _get_ident = threading.get_ident
+    _output = output
+
+
+def begin(name: str) -> None:
+    """Start a phase that is ended elsewhere with end()."""
+    if _output is None:
+        return
+    _open[name] = time.perf_counter()
+
+
+def end(name: str) -> None:
+    """End a phase started with begin(). Does nothing if it is not open."""
+    if _output is None:
+        return
+    start = _open.pop(name, None)
+    if start is not None:
+        _events.append((name, start, time.perf_counter(), _get_ident()))
+
+
+class _Span:
+    """Context manager recording one phase."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _events.append(
+            (self.name, self.start, time.perf_counter(), _get_ident())
+        )
+        return False
+
+
+def span(name: str):
+    """
+    Time a block as a phase.
+
+    Args:
+        name: Phase name
+
+    Returns:
+        A context manager (a shared no-op one when tracing is off)
+    """
+    if _output is None:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def format_table(events: list[tuple[str, float, float, int]], total: float) -> str:
+    """
+    Format phases as a table, nested phases indented under their parent.
+
+    Args:
+        events: Recorded (name, start, end, thread) events
+        total: Total time since tracing started, in seconds
+
+    Returns:
+        Table text
+    """
+    rows = []
+    stack: list[float] = []
+    for name, start, stop, _ in sorted(events, key=lambda e: (e[1], -e[2])):
+        while stack and start >= stack[-1]:
+            stack.pop()
+        rows.append(("  " * len(stack) + name, (stop - start) * 1000))
+        stack.append(stop)
+    rows.append(("total", total * 1000))
+
+    width = max(len(label) for label, _ in rows)
+    lines = [f"{'phase':<{width}}  {'ms':>9}"]
+    lines += [f"{label:<{width}}  {ms:9.2f}" for label, ms in rows]
+    return "\n".join(lines)
+
+
+def chrome_trace(events: list[tuple[str, float, float, int]]) -> dict:
+    """Build a Chrome trace-event document from recorded events."""
+    pid = os.getpid()
+    return {
+        "traceEvents": [
+            {
+                "name": name,
+                "cat": "corun",
+                "ph": "X",
+                "ts": round((start - _origin) * 1e6, 1),
+                "dur": round((stop - start) * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, stop, tid in events
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def report() -> None:
+    """
+    Emit the trace once: a table on stderr or a Chrome trace file.
+
+    Called at exit, and explicitly before the process image is replaced by
+    exec handoff. Phases still open are left out.
+    """
+    global _reported
+    if _output is None or _reported:
+        return
+    _reported = True
+
+    total = time.perf_counter() - _origin
+    if _output == OUTPUT_TABLE:
+        sys.stdout.flush()
+        print(format_table(_events, total), file=sys.stderr)
+        sys.stderr.flush()
+        return
+
+    import json
+
+    try:
+        with open(_output, "w", encoding="utf-8") as f:
+            json.dump(chrome_trace(_events), f)
+    except OSError as e:
+        print(f"Warning: could not write trace file {_output}: {e}", file=sys.stderr)
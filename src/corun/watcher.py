@@ -0,0 +1,418 @@
+"""Watch the addons layers and keep the registry and index up to date.
+
+For long-lived corun processes. Each layer (project, user, system) has its
+own change source: inotify (Linux, through ctypes) or, where inotify is
+unavailable, polling fingerprints.
+Bursts of events - such as ``shutil.copytree`` during ``library install`` -
+are debounced, then applied incrementally: only the library directories
+that changed are rescanned (see ``registry.update_registry``).
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import index
+from .archive import ARCHIVE_SUFFIX
+from .scanner import list_dir
+
+# Quiet period before pending changes are applied (seconds)
+DEBOUNCE = 0.2
+
+# Apply pending changes at the latest after this long, even under a
+# continuous stream of events (seconds)
+DEBOUNCE_MAX = 2.0
+
+# Polling fallback interval (seconds)
+POLL_INTERVAL = 1.0
+
+# How often the watcher thread checks for stop() (seconds)
+STOP_CHECK = 0.5
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# Entries added to / removed from a directory
+IN_ENTRY_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+
+TOP_LEVEL_MASK = (
+    IN_ENTRY_EVENTS | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+LIBRARY_MASK = IN_ENTRY_EVENTS | IN_CLOSE_WRITE | IN_MODIFY | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class Changes:
+    """Changes collected since the last update, for one layer."""
+
+    addons_dir: Optional[Path] = None
+    dirs: set[str] = field(default_factory=set)
+    listing: bool = False
+    overflow: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.dirs or self.listing or self.overflow)
+
+    def merge(self, other: "Changes") -> None:
+        """Add another batch of changes to this one."""
+        self.dirs |= other.dirs
+        self.listing = self.listing or other.listing
+        self.overflow = self.overflow or other.overflow
+
+
+def is_relevant(name: str) -> bool:
+    """Check whether a file inside a library affects the scan result."""
+    return name.endswith(".sh") or name == "metadata.json"
+
+
+class InotifySource:
+    """Change source backed by inotify."""
+
+    def __init__(self, addons_dir: Path):
+        import ctypes
+
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self.addons_dir = addons_dir
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Watch descriptor -> library directory name (None for the top level)
+        self.watches: dict[int, Optional[str]] = {}
+        try:
+            self.add_watch(None)
+            dir_names, _, _ = list_dir(addons_dir)
+        except OSError:
+            os.close(self.fd)
+            raise
+        for name in dir_names:
+            self.add_watch(name)
+
+    def add_watch(self, name: Optional[str]) -> None:
+        """Watch the addons directory (name=None) or one library directory."""
+        import ctypes
+
+        path = self.addons_dir if name is None else self.addons_dir / name
+        mask = TOP_LEVEL_MASK if name is None else LIBRARY_MASK
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            if name is None:
+                raise OSError(ctypes.get_errno(), f"Cannot watch {path}")
+            # Library removed before it could be watched
+            return
+        self.watches[wd] = name
+
+    def read(self, timeout: float) -> Changes:
+        """Wait up to `timeout` seconds and return the changes seen."""
+        changes = Changes(self.addons_dir)
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changes
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return changes
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            self.handle_event(wd, mask, name, changes)
+        return changes
+
+    def handle_event(self, wd: int, mask: int, name: str, changes: Changes) -> None:
+        """Translate one inotify event into changes."""
+        if mask & IN_Q_OVERFLOW:
+            changes.overflow = True
+            return
+        if wd not in self.watches:
+            return
+        library = self.watches[wd]
+
+        if mask & IN_IGNORED:
+            # Watch removed (directory deleted or moved away)
+            del self.watches[wd]
+            return
+
+        if library is None:
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changes.overflow = True
+            elif mask & IN_ISDIR:
+                if name.startswith("."):
+                    return
+                changes.listing = True
+                changes.dirs.add(name)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_watch(name)
+            elif name.endswith(".sh"):
+                changes.listing = True
+            elif name.endswith(ARCHIVE_SUFFIX) and not name.startswith("."):
+                # Packed libraries are replaced whole (rename)
+                changes.listing = True
+                changes.dirs.add(name)
+        elif is_relevant(name):
+            changes.dirs.add(library)
+
+    def close(self) -> None:
+        """Release the inotify descriptor."""
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Change source that compares fingerprints at a fixed interval."""
+
+    def __init__(self, addons_dir: Path, interval: float = POLL_INTERVAL):
+        self.addons_dir = addons_dir
+        self.interval = interval
+        self.next_poll = time.monotonic() + interval
+        self.listing_fp, self.fingerprints = self.snapshot()
+
+    def snapshot(self) -> tuple[Optional[list[int]], dict[str, Optional[list]]]:
+        """Fingerprint the addons directory and each library."""
+        listing_fp = index.path_fingerprint(self.addons_dir)
+        try:
+            dir_names, _, _ = list_dir(self.addons_dir)
+        except OSError:
+            dir_names = []
+        return listing_fp, {
+            name: index.library_fingerprint(self.addons_dir / name)
+            for name in dir_names
+        }
+
+    def read(self, timeout: float) -> Changes:
+        """Wait up to `timeout` seconds and return the changes seen."""
+        changes = Changes(self.addons_dir)
+        delay = self.next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return changes
+        time.sleep(max(0.0, delay))
+        self.next_poll = time.monotonic() + self.interval
+
+        listing_fp, fingerprints = self.snapshot()
+        if listing_fp != self.listing_fp:
+            changes.listing = True
+        for name in fingerprints.keys() | self.fingerprints.keys():
+            if fingerprints.get(name) != self.fingerprints.get(name):
+                changes.dirs.add(name)
+        self.listing_fp, self.fingerprints = listing_fp, fingerprints
+        return changes
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+def create_source(addons_dir: Path, polling: bool = False):
+    """
+    Create a change source, preferring inotify.
+
+    Args:
+        addons_dir: Directory to watch
+        polling: Force the polling fallback
+
+    Returns:
+        InotifySource or PollingSource
+    """
+    if not polling:
+        try:
+            return InotifySource(addons_dir)
+        except (OSError, AttributeError):
+            # Not Linux, or inotify limits reached
+            pass
+    return PollingSource(addons_dir)
+
+
+def read_sources(sources: list, timeout: float) -> list[Changes]:
+    """
+    Wait up to `timeout` seconds for any of several sources.
+
+    Args:
+        sources: InotifySource/PollingSource objects
+        timeout: Longest wait (seconds)
+
+    Returns:
+        The changes seen, one Changes per source
+    """
+    fds = [source.fd for source in sources if isinstance(source, InotifySource)]
+    polls = [
+        source.next_poll for source in sources if isinstance(source, PollingSource)
+    ]
+    if polls:
+        timeout = max(0.0, min(timeout, min(polls) - time.monotonic()))
+    if fds:
+        select.select(fds, [], [], timeout)
+    else:
+        time.sleep(timeout)
+    return [source.read(0) for source in sources]
+
+
+class Watcher:
+    """Background thread applying changes in every addons layer to the registry."""
+
+    def __init__(
+        self,
+        on_change: Optional[Callable] = None,
+        debounce: float = DEBOUNCE,
+        polling: bool = False,
+    ):
+        """
+        Args:
+            on_change: Called with (registry, changes) after each update
+            debounce: Quiet period before changes are applied (seconds)
+            polling: Force the polling fallback instead of inotify
+        """
+        from .registry import get_registry
+
+        self.on_change = on_change
+        self.debounce = debounce
+        self.sources = []
+        try:
+            for layer in get_registry().layers:
+                self.sources.append(create_source(layer.path, polling))
+        except BaseException:
+            self.close()
+            raise
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="corun-watcher", daemon=True
+        )
+
+    @property
+    def paths(self) -> list[Path]:
+        """Addons directories being watched, highest precedence first."""
+        return [source.addons_dir for source in self.sources]
+
+    @property
+    def backend(self) -> str:
+        """Name of the change source(s) in use."""
+        names = {
+            "inotify" if isinstance(source, InotifySource) else "polling"
+            for source in self.sources
+        }
+        return "+".join(sorted(names))
+
+    def start(self) -> "Watcher":
+        """Start watching in the background."""
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the watcher thread and release its resources."""
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.close()
+
+    def close(self) -> None:
+        """Release the change sources."""
+        for source in self.sources:
+            source.close()
+        self.sources = []
+
+    def run(self) -> None:
+        """Collect changes, then apply them once writes have settled."""
+        pending: dict[Path, Changes] = {}
+        first_change = last_change = 0.0
+
+        while not self.stopped.is_set():
+            timeout = self.debounce if pending else STOP_CHECK
+            batches = read_sources(self.sources, timeout)
+            now = time.monotonic()
+
+            for changes in batches:
+                if not changes:
+                    continue
+                if not pending:
+                    first_change = now
+                pending.setdefault(changes.addons_dir, Changes(changes.addons_dir))
+                pending[changes.addons_dir].merge(changes)
+                last_change = now
+
+            if pending and (
+                now - last_change >= self.debounce
+                or now - first_change >= DEBOUNCE_MAX
+            ):
+                self.apply_safely(list(pending.values()))
+                pending = {}
+
+    def apply_safely(self, batches: list[Changes]) -> None:
+        """
+        Apply changes; if that fails, log the error and rebuild the registry.
+
+        An exception must not end the thread, or the registry would silently
+        stop following the addons directories.
+        """
+        from .registry import reload_registry
+
+        try:
+            self.apply(batches)
+        except Exception as e:
+            print(f"corun watcher: update failed ({e}), rescanning", file=sys.stderr)
+            try:
+                registry = reload_registry()
+                if self.on_change:
+                    self.on_change(registry, Changes(overflow=True))
+            except Exception as e:
+                print(f"corun watcher: rescan failed: {e}", file=sys.stderr)
+
+    def apply(self, batches: list[Changes]) -> None:
+        """Update the registry (and index) with batches of changes, one per layer."""
+        from .registry import reload_registry, update_registry
+
+        if any(changes.overflow for changes in batches):
+            registry = reload_registry()
+            if self.on_change:
+                self.on_change(registry, Changes(overflow=True))
+            return
+        for changes in batches:
+            registry = update_registry(
+                changes.dirs, changes.listing, addons_dir=changes.addons_dir
+            )
+            if self.on_change:
+                self.on_change(registry, changes)
+
+
+def start_watcher(
+    on_change: Optional[Callable] = None,
+    debounce: float = DEBOUNCE,
+    polling: bool = False,
+) -> Watcher:
+    """
+    Watch every addons layer in a background thread.
+
+    Args:
+        on_change: Called with (registry, changes) after each update
+        debounce: Quiet period before changes are applied (seconds)
+        polling: Force the polling fallback instead of inotify
+
+    Returns:
+        The running Watcher; call stop() when done
+    """
+    return Watcher(on_change, debounce, polling).start()
@@ -0,0 +1,82 @@
+"""Shared fixtures: every test gets its own HOME and addons tree."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch) -> Path:
+    """
+    Isolate corun from the real ~/.corun.
+
+    HOME points to a temporary directory, the module-level paths derived
+    from it are redirected there, the system layer is disabled and the
+    cached registry is dropped.
+    """
+    from corun import cache, history, index, registry, scanner, search, store
+
+    home = tmp_path / "home"
+    corun_dir = home / ".corun"
+    (corun_dir / "addons").mkdir(parents=True)
+
+    monkeypatch.setenv("HOME", str(home))
+    for name in (
+        "CORUN_PATH",
+        "CORUN_SOCKET",
+        "CORUN_HISTORY",
+        "CORUN_NO_CACHE",
+        "CORUN_EXEC",
+        "CORUN_TRACE",
+    ):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("CORUN_DAEMON", "0")
+    monkeypatch.chdir(tmp_path)
+
+    monkeypatch.setattr(scanner, "ADDONS_DIR", corun_dir / "addons")
+    monkeypatch.setattr(scanner, "SYSTEM_ADDONS_DIR", tmp_path / "system")
+    monkeypatch.setattr(index, "INDEX_FILE", corun_dir / "index.json")
+    monkeypatch.setattr(store, "OBJECTS_DIR", corun_dir / "objects")
+    monkeypatch.setattr(search, "SEARCH_FILE", corun_dir / "search.db")
+    monkeypatch.setattr(cache, "CACHE_DIR", corun_dir / "cache")
+    monkeypatch.setattr(history, "HISTORY_FILE", corun_dir / "history.db")
+    monkeypatch.setattr(registry, "_registry", None)
+    return home
+
+
+@pytest.fixture
+def addons_dir(home) -> Path:
+    """The user layer inside the isolated HOME."""
+    return home / ".corun" / "addons"
+
+
+def write_script(path: Path, body: str = "exit 0\n") -> Path:
+    """Write an executable shell script."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"#!/bin/sh\n{body}")
+    path.chmod(0o755)
+    return path
+
+
+def make_library(
+    addons_dir: Path, library_id: str, commands: tuple[str, ...] = ("cmd",)
+) -> Path:
+    """Create a library with metadata.json and one script per command."""
+    library_dir = addons_dir / library_id
+    library_dir.mkdir(parents=True)
+    (library_dir / "metadata.json").write_text(
+        json.dumps(
+            {
+                "name": library_id.title(),
+                "version": "1.0.0",
+                "description": f"{library_id} library",
+                "library_id": library_id,
+            }
+        )
+    )
+    for name in commands:
+        write_script(library_dir / f"{name}.sh", f"echo {library_id} {name}\n")
+    return library_dir
@@ -0,0 +1,180 @@
+"""Packed .corunlib archives: pack, scan and run from a memfd."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun import archive, executor, scanner
+from corun.pipeline.commands import resolve_steps
+from corun.pipeline.spec import PipelineError, parse_pipeline
+from corun.registry import get_registry
+
+from .conftest import SRC_DIR, make_library, write_script
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "memfd_create"), reason="packed libraries need memfd_create"
+)
+
+
+@pytest.fixture
+def library_dir(tmp_path):
+    """A library with two scripts and a file that is not packed."""
+    library_dir = make_library(tmp_path / "src", "tools", ("greet",))
+    write_script(library_dir / "fail.sh", 'echo "failing with $1"\nexit "$1"\n')
+    (library_dir / "README.md").write_text("not packed")
+    return library_dir
+
+
+@pytest.fixture
+def packed(library_dir, addons_dir):
+    """The library packed into the user layer."""
+    metadata = json.loads((library_dir / "metadata.json").read_text())
+    output = addons_dir / f"tools{archive.ARCHIVE_SUFFIX}"
+    archive.pack_library(library_dir, output, metadata)
+    return output
+
+
+def test_pack_round_trip(library_dir, packed):
+    with archive.Archive(packed) as opened:
+        assert opened.metadata["library_id"] == "tools"
+        assert sorted(opened.scripts) == ["fail", "greet"]
+        for name in opened.scripts:
+            assert opened.read(name) == (library_dir / f"{name}.sh").read_bytes()
+
+
+def test_pack_returns_script_names_only(library_dir, tmp_path):
+    names = archive.pack_library(library_dir, tmp_path / "out.corunlib", None)
+
+    assert names == ["fail", "greet"]
+    assert not list(tmp_path.glob(".out.corunlib.*.tmp"))
+
+
+@pytest.mark.parametrize(
+    "content", [b"", b"NOTCORUN", archive.MAGIC + b"\x05\x00\x00\x00{bad}"]
+)
+def test_invalid_archive_is_rejected(tmp_path, content):
+    path = tmp_path / f"broken{archive.ARCHIVE_SUFFIX}"
+    path.write_bytes(content)
+
+    with pytest.raises(archive.ArchiveError):
+        archive.Archive(path)
+    assert scanner.scan_archive(path) is None
+
+
+def test_scan_lists_archive_as_library(packed, addons_dir):
+    libraries, _ = scanner.scan_tree(addons_dir)
+
+    assert [library.library_id for library in libraries] == ["tools"]
+    commands = {command.name: command for command in libraries[0].commands}
+    assert sorted(commands) == ["fail", "greet"]
+    assert commands["greet"].script_path == packed / "greet.sh"
+    assert archive.is_packed(commands["greet"].script_path)
+
+
+def test_packed_script_runs_from_memfd(packed):
+    cmd = executor.build_command(packed / "fail.sh", ["3"])
+
+    assert cmd[0].startswith(f"/proc/{os.getpid()}/fd/")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    assert result.returncode == 3
+    assert result.stdout == "failing with 3\n"
+    # Nothing was unpacked next to the archive
+    assert sorted(p.name for p in packed.parent.iterdir()) == [packed.name]
+
+
+def test_memfd_is_sealed(packed):
+    path = archive.exec_path(packed / "greet.sh")
+
+    with pytest.raises(OSError):
+        with open(path, "ab") as f:
+            f.write(b"echo injected\n")
+
+
+def test_cli_pack_install_and_run(home, library_dir, tmp_path):
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+
+    def corun(*argv):
+        return subprocess.run(
+            [sys.executable, "-m", "corun", *argv],
+            cwd=tmp_path,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        )
+
+    output = tmp_path / f"tools{archive.ARCHIVE_SUFFIX}"
+    assert corun("library", "pack", str(library_dir), "-o", str(output)).returncode == 0
+    assert corun("library", "install", str(output)).returncode == 0
+
+    result = corun("tools", "greet")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "tools greet\n"
+    assert corun("tools", "fail", "5").returncode == 5
+
+
+def write_truncated(path):
+    """An archive whose header lists a script beyond the end of the file."""
+    header = json.dumps(
+        {"metadata": {"library_id": "tools"}, "scripts": {"greet": [0, 4096]}}
+    ).encode()
+    path.write_bytes(
+        archive.MAGIC + archive.HEADER_SIZE.pack(len(header)) + header + b"#!/bin/sh\n"
+    )
+    return path
+
+
+@pytest.mark.parametrize("entry", [[0, 4096], "bad", [1]])
+def test_corrupt_entry_is_an_archive_error(tmp_path, entry):
+    path = write_truncated(tmp_path / f"tools{archive.ARCHIVE_SUFFIX}")
+    with archive.Archive(path) as opened:
+        opened.scripts["greet"] = entry
+
+        with pytest.raises(archive.ArchiveError):
+            opened.read("greet")
+
+
+def test_build_command_reports_corrupt_archive(tmp_path):
+    path = write_truncated(tmp_path / f"tools{archive.ARCHIVE_SUFFIX}")
+
+    with pytest.raises(OSError, match="Truncated archive"):
+        executor.build_command(path / "greet.sh")
+    with pytest.raises(OSError, match="missing"):
+        executor.build_command(path / "missing.sh")
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["tools", "greet"],
+        ["chain", "tools greet"],
+        ["parallel", "tools", "greet"],
+    ],
+)
+def test_cli_reports_corrupt_archive(home, addons_dir, tmp_path, argv):
+    write_truncated(addons_dir / f"tools{archive.ARCHIVE_SUFFIX}")
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+
+    result = subprocess.run(
+        [sys.executable, "-m", "corun", *argv],
+        cwd=tmp_path,
+        env=env,
+        input="arg\n",
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    assert "Truncated archive" in result.stdout + result.stderr
+    assert "Traceback" not in result.stderr
+
+
+def test_pipeline_reports_corrupt_archive(home, addons_dir):
+    write_truncated(addons_dir / f"tools{archive.ARCHIVE_SUFFIX}")
+    pipeline = parse_pipeline({"steps": {"hello": {"run": "tools greet"}}}, "p")
+
+    with pytest.raises(PipelineError, match="Step 'hello': .*Truncated archive"):
+        resolve_steps(pipeline, get_registry())
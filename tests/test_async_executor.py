@@ -0,0 +1,87 @@
+"""Concurrent jobs: line splitting, long lines and closed output."""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+from corun import async_executor
+from corun.async_executor import Job, OutputSink, run_jobs_async
+
+from .conftest import SRC_DIR, write_script
+
+
+class RecordingSink(OutputSink):
+    """Keep every line handed over, per stream."""
+
+    def __init__(self):
+        self.lines: list[tuple[str, bytes]] = []
+
+    def line(self, index, job, stream, data):
+        name = "out" if stream is sys.stdout.buffer else "err"
+        self.lines.append((name, data))
+
+
+def run(argv: list[str]) -> RecordingSink:
+    """Run one job and record its output."""
+    sink = RecordingSink()
+    asyncio.run(run_jobs_async([Job("job", argv)], 1, sink))
+    return sink
+
+
+def test_lines_are_split_across_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(async_executor, "READ_SIZE", 3)
+    script = write_script(tmp_path / "job.sh", "printf 'one\\ntwo\\n\\nlast'\necho err >&2\n")
+
+    sink = run([str(script)])
+
+    assert [data for name, data in sink.lines if name == "out"] == [
+        b"one\n",
+        b"two\n",
+        b"\n",
+        b"last\n",
+    ]
+    assert ("err", b"err\n") in sink.lines
+
+
+def test_long_line_is_handed_over_in_pieces(tmp_path, monkeypatch):
+    monkeypatch.setattr(async_executor, "MAX_LINE", 1000)
+    script = write_script(
+        tmp_path / "job.sh", f"{sys.executable} -c \"print('x' * 2500, end='')\"\n"
+    )
+
+    sink = run([str(script)])
+
+    assert [len(data) for _, data in sink.lines] == [1001, 1001, 501]
+
+
+def test_base_sink_ignores_output(tmp_path):
+    script = write_script(tmp_path / "job.sh", "echo ignored\n")
+
+    results = asyncio.run(run_jobs_async([Job("job", [str(script)])], 1, OutputSink()))
+
+    assert results[0].exit_code == 0
+
+
+def test_closed_stdout_is_not_an_error(home, addons_dir, tmp_path):
+    write_script(addons_dir / "lines.sh", 'seq 1 20000 | sed "s/^/$1 /"\n')
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+
+    for mode in ("prefix", "buffer"):
+        process = subprocess.Popen(
+            [sys.executable, "-m", "corun", "parallel", "lines", "-o", mode],
+            cwd=tmp_path,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        process.stdin.write(b"a\nb\nc\n")
+        process.stdin.close()
+        assert process.stdout.readline()
+        process.stdout.close()
+        stderr = process.stderr.read().decode()
+        process.wait()
+
+        assert "Traceback" not in stderr
+        assert "3 jobs, 3 succeeded" in stderr
@@ -0,0 +1,82 @@
+"""Result cache: hits, misses and output cut short by the reader."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun import cache
+
+from .conftest import SRC_DIR, make_library, write_script
+
+
+@pytest.fixture
+def cached_library(addons_dir):
+    """A library whose commands are cached for a minute."""
+    library_dir = make_library(addons_dir, "gen")
+    metadata = json.loads((library_dir / "metadata.json").read_text())
+    metadata["cache"] = {"lines": 60, "stamp": 60}
+    (library_dir / "metadata.json").write_text(json.dumps(metadata))
+    write_script(library_dir / "lines.sh", "seq 1 200000\n")
+    write_script(library_dir / "stamp.sh", 'echo "$$"\n')
+    return library_dir
+
+
+def corun(home, *argv, **kwargs):
+    """Start corun in a subprocess with the isolated HOME."""
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+    return subprocess.Popen(
+        [sys.executable, "-m", "corun", *argv],
+        cwd=home,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **kwargs,
+    )
+
+
+def entries(home) -> list[str]:
+    """Cache entries written so far."""
+    cache_dir = home / ".corun" / "cache"
+    return [p.name for p in cache_dir.iterdir()] if cache_dir.exists() else []
+
+
+def test_second_run_is_served_from_cache(home, cached_library):
+    first = corun(home, "gen", "stamp").communicate()[0]
+    second = corun(home, "gen", "stamp").communicate()[0]
+
+    assert first == second
+    assert len(entries(home)) == 1
+
+
+def test_arguments_are_part_of_the_key(home, cached_library):
+    corun(home, "gen", "stamp", "a").communicate()
+    corun(home, "gen", "stamp", "b").communicate()
+
+    assert len(entries(home)) == 2
+
+
+def test_closed_stdout_is_not_cached(home, cached_library):
+    process = corun(home, "gen", "lines")
+    assert process.stdout.readline() == b"1\n"
+    process.stdout.close()
+    stderr = process.stderr.read()
+    process.wait()
+
+    assert b"Traceback" not in stderr
+    assert entries(home) == []
+
+    output = corun(home, "gen", "lines").communicate()[0]
+    assert output.splitlines()[-1] == b"200000"
+    assert len(entries(home)) == 1
+
+
+def test_lookup_respects_ttl(home):
+    cache.store("key", 0, b"out")
+
+    assert cache.lookup("key", 60) == (0, b"out")
+    os.utime(cache.get_cache_dir() / "key", (0, 0))
+    assert cache.lookup("key", 60) is None
@@ -0,0 +1,213 @@
+"""corun chain: piping, the log tee and exit codes."""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from corun import chain
+from corun.chain import parse_stages, run_chain, tee_to_log
+
+from .conftest import SRC_DIR, make_library, write_script
+
+# Enough for many tee iterations with the small chunk size below
+DATA = bytes(range(256)) * 1000
+
+
+@pytest.fixture(autouse=True)
+def stdin(monkeypatch):
+    """The first stage inherits stdin, which must not be the terminal."""
+    with open(os.devnull) as devnull:
+        monkeypatch.setattr(sys, "stdin", devnull)
+        yield
+
+
+def sh(script: str) -> list[str]:
+    """A chain stage running a shell snippet."""
+    return ["sh", "-c", script]
+
+
+@pytest.mark.parametrize(
+    "stages, expected",
+    [
+        (["net ping"], [["net", "ping"]]),
+        (
+            ["hello 'big world'", "db backup -v"],
+            [["hello", "big world"], ["db", "backup", "-v"]],
+        ),
+    ],
+)
+def test_parse_stages(stages, expected):
+    assert parse_stages(stages) == expected
+
+
+@pytest.mark.parametrize("stage", ["", "   ", "hello 'open"])
+def test_parse_stages_rejects(stage):
+    with pytest.raises(ValueError):
+        parse_stages(["hello", stage])
+
+
+def test_stages_are_piped_in_order(capfd):
+    code = run_chain([sh("printf 'b\\na\\n'"), ["sort"], ["tr", "a-z", "A-Z"]])
+
+    assert code == 0
+    assert capfd.readouterr().out == "A\nB\n"
+
+
+def test_log_gets_the_final_output(tmp_path, capfd):
+    log_file = tmp_path / "chain.log"
+
+    code = run_chain([sh("printf 'one\\ntwo\\n'"), ["sort", "-r"]], log_file)
+
+    assert code == 0
+    assert capfd.readouterr().out == "two\none\n"
+    assert log_file.read_text() == "two\none\n"
+
+
+@pytest.mark.parametrize("pipefail, expected", [(False, 0), (True, 5)])
+def test_failing_middle_stage(capfd, pipefail, expected):
+    stages = [sh("exit 3"), sh("cat >/dev/null; exit 5"), sh("cat; echo done")]
+
+    assert run_chain(stages, pipefail=pipefail) == expected
+    assert capfd.readouterr().out == "done\n"
+
+
+def test_pipefail_reports_the_last_stage(capfd):
+    assert run_chain([sh("exit 3"), sh("cat; exit 4")], pipefail=True) == 4
+
+
+def test_signal_exit_code(capfd):
+    assert run_chain([sh("printf x"), sh("kill -TERM $$")]) == 128 + 15
+
+
+def test_missing_executable_is_an_error(tmp_path):
+    log_file = tmp_path / "chain.log"
+
+    with pytest.raises(OSError):
+        run_chain([sh("printf x"), [str(tmp_path / "missing")]], log_file)
+
+
+def fail(*args):
+    raise OSError("not supported")
+
+
+def fail_after_first(real):
+    """Wrap a call so that it works once and then fails."""
+    calls = []
+
+    def call(*args):
+        if calls:
+            raise OSError("not supported")
+        calls.append(args)
+        return real(*args)
+
+    return call
+
+
+@pytest.fixture(params=["splice", "no-splice", "splice-stops", "no-sendfile", "append"])
+def tee(request, tmp_path, monkeypatch):
+    """
+    Run tee_to_log over DATA on each copy path.
+
+    Returns a function that tees and returns (log contents, output contents,
+    whether the buffered fallback ran).
+    """
+    monkeypatch.setattr(chain, "SPLICE_SIZE", 4096)
+    fallback = []
+    copy_buffered = chain.copy_buffered
+    monkeypatch.setattr(
+        chain,
+        "copy_buffered",
+        lambda *args: fallback.append(args) or copy_buffered(*args),
+    )
+    flags = os.O_WRONLY | os.O_CREAT
+    if request.param == "splice":
+        if not hasattr(os, "splice"):
+            pytest.skip("no splice on this platform")
+    elif request.param == "no-splice":
+        monkeypatch.delattr(os, "splice", raising=False)
+    elif request.param == "splice-stops":
+        if not hasattr(os, "splice"):
+            pytest.skip("no splice on this platform")
+        monkeypatch.setattr(os, "splice", fail_after_first(os.splice))
+    elif request.param == "no-sendfile":
+        monkeypatch.setattr(os, "sendfile", fail)
+    elif request.param == "append":
+        # sendfile cannot write to an O_APPEND descriptor
+        flags |= os.O_APPEND
+
+    def run() -> tuple[bytes, bytes, bool]:
+        read_fd, write_fd = os.pipe()
+        log_fd = os.open(tmp_path / "log", os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+        out_fd = os.open(tmp_path / "out", flags)
+
+        def feed():
+            with os.fdopen(write_fd, "wb") as writer:
+                writer.write(DATA)
+
+        writer = threading.Thread(target=feed)
+        writer.start()
+        try:
+            tee_to_log(read_fd, log_fd, out_fd)
+        finally:
+            writer.join()
+            for fd in (read_fd, log_fd, out_fd):
+                os.close(fd)
+        log = (tmp_path / "log").read_bytes()
+        return log, (tmp_path / "out").read_bytes(), bool(fallback)
+
+    return run
+
+
+def test_tee_copies_everything_once(request, tee):
+    log, out, fallback = tee()
+
+    assert log == DATA
+    assert out == DATA
+    assert fallback == (request.node.callspec.params["tee"] != "splice")
+
+
+def test_tee_reports_a_closed_output(tmp_path):
+    read_fd, write_fd = os.pipe()
+    out_read, out_write = os.pipe()
+    log_fd = os.open(tmp_path / "log", os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+    os.write(write_fd, b"data\n")
+    os.close(write_fd)
+    os.close(out_read)
+    try:
+        with pytest.raises(BrokenPipeError):
+            tee_to_log(read_fd, log_fd, out_write)
+    finally:
+        for fd in (read_fd, out_write, log_fd):
+            os.close(fd)
+
+
+def test_cli_chains_scripts_and_libraries(home, addons_dir, tmp_path):
+    write_script(addons_dir / "numbers.sh", "printf '3\\n1\\n2\\n'\n")
+    text = make_library(addons_dir, "text", ())
+    write_script(text / "sort.sh", 'sort "$@"\n')
+    write_script(text / "fail.sh", "cat >/dev/null; exit 6\n")
+    log_file = tmp_path / "chain.log"
+
+    def corun(*args):
+        return subprocess.run(
+            [sys.executable, "-m", "corun", "chain", *args],
+            cwd=home,
+            env=dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR)),
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        )
+
+    result = corun("numbers", "text sort -r", "--log", str(log_file))
+    assert (result.returncode, result.stdout) == (0, "3\n2\n1\n"), result.stderr
+    assert log_file.read_text() == "3\n2\n1\n"
+
+    result = corun("numbers", "text fail", "text sort", "--pipefail")
+    assert (result.returncode, result.stdout) == (6, "")
+
+    result = corun("numbers", "nothing")
+    assert result.returncode == 1
+    assert "'nothing' not found" in result.stdout
@@ -0,0 +1,141 @@
+"""Shell completion: the index fast path answers exactly as Typer does."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun import completion
+from corun.builtin_commands import BUILTIN_COMMANDS, BUILTIN_HELP
+
+from .conftest import SRC_DIR, make_library, write_script
+
+# Runs the full Typer CLI, bypassing the fast path in corun.__main__
+TYPER_CODE = "import sys; sys.argv = ['corun']; from corun.main import cli; cli()"
+
+
+@pytest.fixture
+def tree(addons_dir):
+    """Libraries with and without metadata, a script and a shadowed name."""
+    net = make_library(addons_dir, "net", ("ping", "dns"))
+    (net / "metadata.json").write_text(
+        '{"name": "Net", "version": "1", "library_id": "net",'
+        ' "description": "Network tools: ping, DNS lookups and more"}'
+    )
+    write_script(addons_dir / "db" / "backup.sh")
+    write_script(addons_dir / "hello.sh")
+    write_script(addons_dir / "stats.sh")
+    return addons_dir
+
+
+def completion_env(shell: str, words: str, action: str = "get-args") -> dict:
+    """Environment of a completion request for `words` (after `corun`)."""
+    line = f"corun {words}"
+    if shell == "bash":
+        parts = line.split(" ")
+        return {
+            "_CORUN_COMPLETE": "complete_bash",
+            "COMP_WORDS": line,
+            "COMP_CWORD": str(len(parts) - 1),
+        }
+    env = {"_CORUN_COMPLETE": f"complete_{shell}", "_TYPER_COMPLETE_ARGS": line}
+    if shell == "fish":
+        env["_TYPER_COMPLETE_FISH_ACTION"] = action
+    return env
+
+
+def typer_complete(home, request_env: dict) -> tuple[int, str]:
+    """Answer a completion request with the full Typer CLI."""
+    result = subprocess.run(
+        [sys.executable, "-c", TYPER_CODE],
+        cwd=home,
+        env=dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR), **request_env),
+        capture_output=True,
+        text=True,
+    )
+    return result.returncode, result.stdout
+
+
+def fast_complete(monkeypatch, capsys, request_env: dict) -> tuple[int, str]:
+    """Answer a completion request with the fast path; it must not fall back."""
+    for name, value in request_env.items():
+        monkeypatch.setenv(name, value)
+    code = 0
+    try:
+        assert completion.fast_complete(), "fast path fell back to Typer"
+    except SystemExit as e:
+        code = e.code
+    return code, capsys.readouterr().out
+
+
+def normalize(shell: str, output: str) -> set[str]:
+    """Completion entries, unordered (every shell sorts them itself)."""
+    output = output.strip()
+    if shell == "zsh" and output.startswith("_arguments"):
+        output = output[len("_arguments '*: :((") : -len("))'")]
+    return set(output.splitlines())
+
+
+@pytest.mark.parametrize("shell", ["bash", "zsh", "fish"])
+@pytest.mark.parametrize("words", ["", "s", "ne", "net ", "net d", "db ", "nothing"])
+def test_fast_path_matches_typer(home, tree, monkeypatch, capsys, shell, words):
+    request_env = completion_env(shell, words)
+    # Also writes the index the fast path reads
+    expected_code, expected = typer_complete(home, request_env)
+
+    code, output = fast_complete(monkeypatch, capsys, request_env)
+
+    assert code == expected_code
+    assert normalize(shell, output) == normalize(shell, expected)
+
+
+@pytest.mark.parametrize("words", ["", "net ", "nothing"])
+def test_fish_is_args_matches_typer(home, tree, monkeypatch, capsys, words):
+    request_env = completion_env("fish", words, action="is-args")
+    expected_code, _ = typer_complete(home, request_env)
+
+    code, _ = fast_complete(monkeypatch, capsys, request_env)
+
+    assert code == expected_code
+
+
+def test_stale_index_falls_back(home, tree, monkeypatch):
+    for name, value in completion_env("bash", "").items():
+        monkeypatch.setenv(name, value)
+
+    # No index written yet
+    assert not completion.fast_complete()
+
+
+@pytest.mark.parametrize("words", ["--", "library ", "net ping "])
+def test_requests_for_the_cli_fall_back(home, tree, monkeypatch, capsys, words):
+    typer_complete(home, completion_env("bash", ""))
+    for name, value in completion_env("bash", words).items():
+        monkeypatch.setenv(name, value)
+
+    assert not completion.fast_complete()
+
+
+def test_builtin_names_come_from_one_table():
+    assert BUILTIN_COMMANDS == set(BUILTIN_HELP)
+    assert BUILTIN_HELP["run"] is None
+
+
+@pytest.mark.parametrize(
+    "text, short",
+    [
+        ("Short.", "Short."),
+        ("First sentence. Second one.", "First sentence."),
+        ("Summary\n\nDetails that are not shown.", "Summary"),
+        ("Network tools: ping, DNS lookups and more", "Network tools: ping, DNS lookups and more"),
+        (
+            "Search commands by name, library, description and script header comments.",
+            "Search commands by name, library,...",
+        ),
+        ("x" * 60, "..."),
+        ("", ""),
+    ],
+)
+def test_make_short_help(text, short):
+    assert completion.make_short_help(text) == short
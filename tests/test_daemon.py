@@ -0,0 +1,123 @@
+"""corun serve: scripts run with the caller's umask; terminals stay local."""
+
+import os
+import pty
+import resource
+import subprocess
+import sys
+import time
+
+import pytest
+
+from .conftest import SRC_DIR, write_script
+
+# The probe script uses GNU stat
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="Linux only")
+
+
+@pytest.fixture
+def env(home, addons_dir, tmp_path):
+    """Environment for clients of a test daemon, with a script that reports."""
+    write_script(
+        addons_dir / "probe.sh",
+        f'touch "{tmp_path}/made"; stat -c %a "{tmp_path}/made"; rm "{tmp_path}/made"\n'
+        'echo "$PPID"\n',
+    )
+    return dict(
+        os.environ,
+        HOME=str(home),
+        PYTHONPATH=str(SRC_DIR),
+        CORUN_SOCKET=str(tmp_path / "daemon.sock"),
+        CORUN_DAEMON="1",
+    )
+
+
+@pytest.fixture
+def daemon(env, home, tmp_path):
+    """A running daemon; yields its pid."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "corun", "serve", "--no-watch"],
+        cwd=home,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while not (tmp_path / "daemon.sock").exists():
+        assert process.poll() is None, "daemon exited"
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+    yield process.pid
+    process.terminate()
+    process.wait()
+
+
+def probe(env, home, umask=0o022, stdin=subprocess.DEVNULL, limit_files=None):
+    """Run probe.sh through the client; return (file mode, parent pid)."""
+
+    def setup():
+        os.umask(umask)
+        if limit_files is not None:
+            _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (limit_files, hard))
+
+    result = subprocess.run(
+        [sys.executable, "-m", "corun", "probe"],
+        cwd=home,
+        env=env,
+        stdin=stdin,
+        capture_output=True,
+        text=True,
+        preexec_fn=setup,
+    )
+    assert result.returncode == 0, result.stderr
+    mode, parent = result.stdout.split()
+    return mode, int(parent)
+
+
+def test_daemon_uses_the_callers_umask(daemon, env, home):
+    assert probe(env, home, umask=0o022) == ("644", daemon)
+    assert probe(env, home, umask=0o077) == ("600", daemon)
+
+
+def test_terminal_runs_stay_local(daemon, env, home):
+    primary, secondary = pty.openpty()
+    try:
+        _, parent = probe(env, home, stdin=secondary)
+    finally:
+        os.close(primary)
+        os.close(secondary)
+
+    assert parent != daemon
+
+
+def test_other_resource_limits_stay_local(daemon, env, home):
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    _, parent = probe(env, home, limit_files=min(soft, 256) - 1)
+
+    assert parent != daemon
+
+
+def test_traced_runs_stay_local(daemon, env, home):
+    _, parent = probe(dict(env, CORUN_TRACE="1"), home)
+
+    assert parent != daemon
+
+
+@pytest.mark.parametrize(
+    "argv, served",
+    [(["stats"], False), (["library", "list"], False), (["--version"], False), (["probe"], True)],
+)
+def test_only_script_runs_ask_the_daemon(monkeypatch, argv, served):
+    from corun import __main__, client, main
+
+    asked = []
+    monkeypatch.setattr(client, "run_via_daemon", lambda args: asked.append(args))
+    monkeypatch.setattr(main, "cli", lambda: None)
+    monkeypatch.setattr(sys, "argv", ["corun", *argv])
+
+    __main__.main()
+
+    assert asked == ([argv] if served else [])
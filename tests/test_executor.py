@@ -0,0 +1,90 @@
+"""Running scripts: exit codes and run history."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun import executor, history
+
+from .conftest import SRC_DIR, write_script
+
+
+@pytest.fixture(autouse=True)
+def stdin(monkeypatch):
+    """Scripts inherit stdin, which must be a real file."""
+    with open(os.devnull) as devnull:
+        monkeypatch.setattr(sys, "stdin", devnull)
+        yield
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    """A script using ~200 MB, a trivial one and a failing one."""
+    return {
+        "big": write_script(
+            tmp_path / "big.sh", f'exec {sys.executable} -c "x = bytearray(200 << 20)"\n'
+        ),
+        "small": write_script(tmp_path / "small.sh"),
+        "fail": write_script(tmp_path / "fail.sh", "exit 7\n"),
+    }
+
+
+def test_exit_code_is_returned(home, scripts):
+    assert executor.execute_script(scripts["small"], handoff=False) == 0
+    assert executor.execute_script(scripts["fail"], handoff=False) == 7
+
+
+def test_missing_script(home, tmp_path, capsys):
+    assert executor.execute_script(tmp_path / "missing.sh", handoff=False) == 1
+    assert "Script not found" in capsys.readouterr().err
+
+
+def test_history_records_each_runs_own_peak_rss(home, scripts, monkeypatch):
+    monkeypatch.setenv(history.HISTORY_ENV, "1")
+
+    for name in ("big", "small", "fail"):
+        executor.execute_script(scripts[name], ["arg"], handoff=False, library_id="lib")
+
+    stats = {s.command: s for s in history.get_stats()}
+    assert stats["big"].max_rss > 200 << 10
+    # Not the maximum over every child run so far. Both include the memory
+    # inherited from this process before exec, so only the gap is known.
+    assert stats["big"].max_rss - stats["small"].max_rss > 100 << 10
+    assert (stats["fail"].runs, stats["fail"].failures) == (1, 1)
+    assert stats["small"].label == "lib small"
+
+
+def test_history_is_not_imported_when_disabled(home, scripts):
+    code = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from corun.executor import execute_script\n"
+        f"execute_script(Path({str(scripts['small'])!r}), handoff=False)\n"
+        "print('corun.history' in sys.modules)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    env.pop(history.HISTORY_ENV, None)
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True
+    )
+
+    assert result.stdout.strip() == "False", result.stderr
+
+
+def test_stats_reports_an_unreadable_history(home):
+    history.HISTORY_FILE.write_bytes(b"not a database" * 100)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "corun", "stats"],
+        cwd=home,
+        env=dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR)),
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    assert "Cannot use" in result.stdout
+    assert "Traceback" not in result.stderr
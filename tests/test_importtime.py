@@ -0,0 +1,93 @@
+"""The script run path must stay free of the heavy modules, and fast to import."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import SRC_DIR, make_library, write_script
+
+# Modules that must not be imported when running a script
+FORBIDDEN_MODULES = ("rich", "pydantic", "corun.library.commands", "corun.metadata")
+
+# Largest import time of the run path, as a multiple of BASELINE
+MAX_RATIO = 1.3
+
+# Baseline: the dependency the run path cannot avoid
+BASELINE = "import typer"
+
+# Runs per target; the fastest one is compared
+RUNS = 10
+
+
+def importtime(argv: list[str], cwd) -> tuple[int, set[str]]:
+    """
+    Run the interpreter with -X importtime.
+
+    Returns:
+        Tuple of (total microseconds of top-level imports, imported modules)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=cwd,
+        env=dict(os.environ, PYTHONPATH=str(SRC_DIR)),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3:
+            continue
+        if not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        modules.add(name.strip())
+        # Only top-level imports: nested ones are part of their parent
+        if not name.startswith("  "):
+            total_us += int(parts[1])
+    return total_us, modules
+
+
+@pytest.fixture
+def tree(home, addons_dir):
+    """One library and one script, with the index already built."""
+    make_library(addons_dir, "lib")
+    write_script(addons_dir / "hello.sh")
+    # First run builds the index, later ones are the steady state
+    importtime(["-m", "corun", "hello"], home)
+    return home
+
+
+@pytest.mark.parametrize("argv", [["hello"], ["lib", "cmd"]])
+def test_run_path_skips_heavy_modules(tree, argv):
+    _, modules = importtime(["-m", "corun", *argv], tree)
+
+    assert "corun.executor" in modules
+    forbidden = sorted(
+        m
+        for m in modules
+        if any(m == f or m.startswith(f + ".") for f in FORBIDDEN_MODULES)
+    )
+    assert forbidden == []
+
+
+@pytest.mark.parametrize("argv", [["hello"], ["lib", "cmd"]])
+def test_run_path_import_time_budget(tree, argv):
+    # Interleaved, so both sides see the same machine load
+    baseline, run_path = [], []
+    for _ in range(RUNS):
+        baseline.append(importtime(["-c", BASELINE], tree)[0])
+        run_path.append(importtime(["-m", "corun", *argv], tree)[0])
+
+    ratio = min(run_path) / min(baseline)
+
+    assert ratio <= MAX_RATIO, (
+        f"corun {' '.join(argv)} imports in {min(run_path) / 1000:.1f} ms, "
+        f"x{ratio:.2f} {BASELINE!r} (budget x{MAX_RATIO:g})"
+    )
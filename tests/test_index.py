@@ -0,0 +1,164 @@
+"""Persistent index: reuse while fresh, rescan only what changed."""
+
+import json
+import os
+
+import pytest
+
+from corun import index, scanner
+
+from .conftest import make_library, write_script
+
+# An old mtime, so any later change to a directory gives a new fingerprint
+# even on filesystems with coarse timestamps
+OLD_NS = 1_000_000_000_000_000_000
+
+
+def age(*paths) -> None:
+    """Set the mtime of paths back in time."""
+    for path in paths:
+        os.utime(path, ns=(OLD_NS, OLD_NS))
+
+
+@pytest.fixture
+def scanned(addons_dir):
+    """A tree with one library and one script, scanned once."""
+    library_dir = make_library(addons_dir, "net", ("ping", "trace"))
+    write_script(addons_dir / "deploy.sh")
+    age(library_dir, library_dir / "metadata.json", addons_dir)
+    scanner.scan_tree(addons_dir)
+    return addons_dir
+
+
+@pytest.fixture
+def rescans(monkeypatch) -> list[str]:
+    """Record the library directories scan_tree() rescans."""
+    names = []
+    scan_library = scanner.scan_library
+
+    def counting(library_path):
+        names.append(library_path.name)
+        return scan_library(library_path)
+
+    monkeypatch.setattr(scanner, "scan_library", counting)
+    return names
+
+
+def test_scan_writes_fresh_index(scanned):
+    tree = index.get_fresh_tree(scanned)
+
+    assert tree is not None
+    assert tree["dirs"] == ["net"]
+    assert tree["scripts"] == ["deploy"]
+    assert tree["libraries"]["net"]["library_id"] == "net"
+
+
+def test_unchanged_tree_is_not_rescanned(scanned, rescans):
+    libraries, standalone = scanner.scan_tree(scanned)
+
+    assert rescans == []
+    assert [library.library_id for library in libraries] == ["net"]
+    assert sorted(c.name for c in libraries[0].commands) == ["ping", "trace"]
+    assert [command.name for command in standalone] == ["deploy"]
+
+
+def test_new_script_makes_listing_stale(scanned, rescans):
+    write_script(scanned / "backup.sh")
+
+    assert index.get_fresh_tree(scanned) is None
+    _, standalone = scanner.scan_tree(scanned)
+
+    assert sorted(command.name for command in standalone) == ["backup", "deploy"]
+    # The library itself did not change
+    assert rescans == []
+    assert index.get_fresh_tree(scanned) is not None
+
+
+def test_library_change_rescans_only_that_library(scanned, rescans):
+    other = make_library(scanned, "git")
+    age(other, other / "metadata.json")
+    scanner.scan_tree(scanned)
+    rescans.clear()
+
+    write_script(scanned / "net" / "dig.sh")
+
+    assert index.get_fresh_tree(scanned) is None
+    libraries, _ = scanner.scan_tree(scanned)
+
+    assert rescans == ["net"]
+    net = next(library for library in libraries if library.library_id == "net")
+    assert sorted(c.name for c in net.commands) == ["dig", "ping", "trace"]
+
+
+def test_metadata_edit_invalidates_library(scanned):
+    metadata_file = scanned / "net" / "metadata.json"
+    metadata = json.loads(metadata_file.read_text())
+    metadata["description"] = "Network tools, updated"
+    metadata_file.write_text(json.dumps(metadata))
+
+    assert index.get_fresh_tree(scanned) is None
+    libraries, _ = scanner.scan_tree(scanned)
+
+    assert libraries[0].metadata.description == "Network tools, updated"
+
+
+def test_removed_library_is_dropped(scanned):
+    for path in (scanned / "net").iterdir():
+        path.unlink()
+    (scanned / "net").rmdir()
+
+    libraries, _ = scanner.scan_tree(scanned)
+
+    assert libraries == []
+    assert index.get_fresh_tree(scanned)["libraries"] == {}
+
+
+def test_invalidate_library_drops_its_entry(scanned, rescans):
+    index.invalidate_index(scanned / "net")
+
+    tree = index.load_index()["trees"][str(scanned)]
+    assert "net" not in tree["libraries"]
+    assert "fingerprint" not in tree
+    assert index.get_fresh_tree(scanned) is None
+
+    scanner.scan_tree(scanned)
+    assert rescans == ["net"]
+
+
+def test_invalidate_all_removes_index_file(scanned):
+    index.invalidate_index()
+
+    assert not index.get_index_file().exists()
+    assert index.get_fresh_tree(scanned) is None
+
+
+@pytest.mark.parametrize(
+    "content", ["not json", json.dumps({"version": -1, "trees": {}}), "[]"]
+)
+def test_unusable_index_file_is_ignored(scanned, rescans, content):
+    index.get_index_file().write_text(content)
+
+    assert index.load_index() == {"version": index.INDEX_VERSION, "trees": {}}
+    libraries, _ = scanner.scan_tree(scanned)
+
+    assert rescans == ["net"]
+    assert [library.library_id for library in libraries] == ["net"]
+
+
+def test_fresh_names_follow_layer_precedence(scanned, tmp_path):
+    project = tmp_path / "project"
+    write_script(project / "deploy.sh")
+    make_library(project, "tools")
+    scanner.scan_tree(project)
+
+    names = index.get_fresh_names([project, scanned])
+
+    assert names["deploy"] == (project / "deploy.sh", None)
+    assert names["net"][0] == scanned / "net"
+    assert names["tools"][1]["library_id"] == "tools"
+
+
+def test_fresh_names_none_when_a_layer_is_stale(scanned, tmp_path):
+    write_script(scanned / "backup.sh")
+
+    assert index.get_fresh_names([tmp_path / "missing", scanned]) is None
@@ -0,0 +1,146 @@
+"""Library install: staging, atomic publish and reinstalls."""
+
+import os
+
+import pytest
+
+from corun import install
+
+from .conftest import make_library, write_script
+
+
+@pytest.fixture
+def removed(monkeypatch):
+    """Old trees handed to the background remover (deleted in place)."""
+    paths = []
+
+    def remove(path):
+        paths.append(path)
+        if path.is_dir():
+            install.shutil.rmtree(path)
+        else:
+            path.unlink()
+
+    monkeypatch.setattr(install, "remove_in_background", remove)
+    return paths
+
+
+@pytest.fixture(params=[True, False], ids=["exchange", "two-renames"])
+def swap(request, monkeypatch):
+    """Publish with renameat2(RENAME_EXCHANGE), or with two renames."""
+    if not request.param:
+        monkeypatch.setattr(install, "exchange", lambda a, b: False)
+    return request.param
+
+
+def hidden(addons_dir) -> list[str]:
+    """Staging or trash directories left in the addons directory."""
+    return [
+        name
+        for name in os.listdir(addons_dir)
+        if name.startswith((install.STAGING_PREFIX, install.TRASH_PREFIX))
+    ]
+
+
+def test_exchange_swaps_two_directories(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "from-a").touch()
+
+    if not install.exchange(tmp_path / "a", tmp_path / "b"):
+        pytest.skip("renameat2(RENAME_EXCHANGE) not supported here")
+
+    assert os.listdir(tmp_path / "a") == []
+    assert os.listdir(tmp_path / "b") == ["from-a"]
+
+
+def test_exchange_reports_missing_paths(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    if not install.exchange(tmp_path / "a", tmp_path / "b"):
+        pytest.skip("renameat2(RENAME_EXCHANGE) not supported here")
+
+    with pytest.raises(FileNotFoundError):
+        install.exchange(tmp_path / "a", tmp_path / "missing")
+
+
+def test_install_new_library(home, addons_dir, tmp_path, removed):
+    source = make_library(tmp_path / "src", "net", ("ping", "dns"))
+    (source / "data").mkdir()
+    (source / "data" / "hosts.txt").write_text("localhost\n")
+
+    stats = install.install_tree(source, addons_dir / "net")
+
+    target = addons_dir / "net"
+    assert sorted(os.listdir(target)) == ["data", "dns.sh", "metadata.json", "ping.sh"]
+    assert (target / "data" / "hosts.txt").read_text() == "localhost\n"
+    assert os.access(target / "ping.sh", os.X_OK)
+    assert stats.stored == 2
+    assert removed == []
+    assert hidden(addons_dir) == []
+
+
+def test_reinstall_replaces_existing_library(home, addons_dir, tmp_path, removed, swap):
+    make_library(addons_dir, "net", ("old",))
+    source = make_library(tmp_path / "src", "net", ("new",))
+
+    install.install_tree(source, addons_dir / "net")
+
+    assert sorted(os.listdir(addons_dir / "net")) == ["metadata.json", "new.sh"]
+    assert len(removed) == 1
+    assert removed[0].name.startswith(install.TRASH_PREFIX)
+    assert hidden(addons_dir) == []
+
+
+def test_failed_publish_keeps_existing_library(home, addons_dir, tmp_path, monkeypatch):
+    make_library(addons_dir, "net", ("old",))
+    source = make_library(tmp_path / "src", "net", ("new",))
+    monkeypatch.setattr(install, "exchange", lambda a, b: False)
+    rename = os.rename
+
+    def failing_rename(src, dst):
+        if os.path.basename(src).startswith(install.STAGING_PREFIX):
+            raise OSError("rename failed")
+        rename(src, dst)
+
+    monkeypatch.setattr(install.os, "rename", failing_rename)
+
+    with pytest.raises(OSError, match="rename failed"):
+        install.install_tree(source, addons_dir / "net")
+
+    assert sorted(os.listdir(addons_dir / "net")) == ["metadata.json", "old.sh"]
+    assert hidden(addons_dir) == []
+
+
+def test_failed_staging_keeps_existing_library(home, addons_dir, tmp_path):
+    make_library(addons_dir, "net", ("old",))
+
+    with pytest.raises(OSError):
+        install.install_tree(tmp_path / "missing", addons_dir / "net")
+
+    assert sorted(os.listdir(addons_dir / "net")) == ["metadata.json", "old.sh"]
+    assert hidden(addons_dir) == []
+
+
+def test_install_archive_replaces_existing_file(home, addons_dir, tmp_path, removed, swap):
+    (addons_dir / "net.corunlib").write_bytes(b"old")
+    source = tmp_path / "net.corunlib"
+    source.write_bytes(b"new")
+
+    install.install_file(source, addons_dir / "net.corunlib")
+
+    assert (addons_dir / "net.corunlib").read_bytes() == b"new"
+    assert len(removed) == 1
+
+
+def test_stale_directories_are_cleaned_up(home, addons_dir, tmp_path, removed):
+    stale = addons_dir / f"{install.STAGING_PREFIX}net-dead"
+    fresh = addons_dir / f"{install.TRASH_PREFIX}net-live"
+    write_script(stale / "x.sh")
+    write_script(fresh / "x.sh")
+    os.utime(stale, (0, 0))
+
+    install.cleanup_stale(addons_dir)
+
+    assert removed == [stale]
+    assert fresh.exists()
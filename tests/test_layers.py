@@ -0,0 +1,144 @@
+"""Addons layers: project lookup, precedence and shadowing."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun import registry, scanner
+
+from .conftest import SRC_DIR, make_library, write_script
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project directory with a layer and a nested working directory."""
+    root = tmp_path / "project"
+    (root / ".corun" / "addons").mkdir(parents=True)
+    (root / "src" / "deep").mkdir(parents=True)
+    return root
+
+
+def test_project_layer_found_from_subdirectory(home, project):
+    found = scanner.find_project_addons(project / "src" / "deep")
+
+    assert found == project / ".corun" / "addons"
+
+
+def test_no_project_layer_without_corun_dir(home, tmp_path):
+    (tmp_path / "plain").mkdir()
+
+    assert scanner.find_project_addons(tmp_path / "plain") is None
+
+
+def test_walk_stops_at_home(home, tmp_path, monkeypatch):
+    # tmp_path is HOME's parent: its .corun must not be picked up from below,
+    # even when the user layer lives elsewhere
+    monkeypatch.setattr(scanner, "ADDONS_DIR", tmp_path / "user-addons")
+    (tmp_path / ".corun" / "addons").mkdir(parents=True)
+    (home / "work").mkdir()
+
+    assert scanner.find_project_addons(home / "work") is None
+    assert scanner.find_project_addons(home) is None
+
+
+def test_home_directory_is_not_a_project(home):
+    assert scanner.find_project_addons(home / ".corun" / "addons") is None
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason="needs root to chown")
+@pytest.mark.parametrize("owned", [".corun", ".corun/addons"])
+def test_foreign_project_layer_is_ignored(home, project, owned):
+    os.chown(project / owned, 65534, 65534)
+
+    assert scanner.find_project_addons(project / "src") is None
+
+
+def test_own_and_root_owned_directories_are_trusted(home, project):
+    assert scanner.is_trusted(os.stat(project / ".corun"))
+    assert scanner.is_trusted(os.stat("/"))
+
+
+def test_search_path_override(home, addons_dir, tmp_path):
+    env = {"CORUN_PATH": f"{tmp_path / 'a'}{os.pathsep}{addons_dir}"}
+
+    assert scanner.get_search_paths(env=env) == [
+        (scanner.LAYER_PATH, tmp_path / "a"),
+        (scanner.LAYER_USER, addons_dir),
+    ]
+
+
+def test_higher_layer_shadows_lower(home, addons_dir, project, monkeypatch):
+    project_dir = project / ".corun" / "addons"
+    write_script(project_dir / "deploy.sh")
+    make_library(project_dir, "net")
+    write_script(addons_dir / "deploy.sh")
+    write_script(addons_dir / "net.sh")
+    make_library(addons_dir, "tools")
+    monkeypatch.chdir(project)
+
+    current = registry.get_registry()
+
+    assert [layer.name for layer in current.layers] == ["project", "user", "system"]
+    assert current.get_library("net").path == project_dir / "net"
+    assert current.get_library("tools").path == addons_dir / "tools"
+    assert [c.script_path for c in current.standalone] == [project_dir / "deploy.sh"]
+    assert sorted((name, hidden) for name, hidden, _ in current.shadowed) == [
+        ("deploy", addons_dir / "deploy.sh"),
+        ("net", addons_dir / "net.sh"),
+    ]
+    assert current.conflicts == {}
+
+
+def test_same_layer_library_and_script_conflict(home, addons_dir):
+    make_library(addons_dir, "tools")
+    write_script(addons_dir / "tools.sh")
+
+    assert list(registry.get_registry().conflicts) == ["tools"]
+
+
+def test_builtin_names_are_reported(home, addons_dir):
+    make_library(addons_dir, "stats")
+    write_script(addons_dir / "chain.sh")
+    write_script(addons_dir / "hello.sh")
+
+    current = registry.get_registry()
+
+    assert current.libraries == []
+    assert [c.name for c in current.standalone] == ["hello"]
+    assert sorted(name for name, _ in current.builtin_shadowed) == ["chain", "stats"]
+
+
+def test_builtin_names_are_dropped_from_conflicts(home, addons_dir):
+    make_library(addons_dir, "search")
+    write_script(addons_dir / "search.sh")
+    make_library(addons_dir, "tools")
+
+    current = registry.merge_registry(scanner.scan_layers())
+
+    assert current.conflicts == {}
+    assert [library.library_id for library in current.libraries] == ["tools"]
+    assert current.get_standalone("search") is None
+    assert sorted(current.builtin_shadowed) == [
+        ("search", addons_dir / "search"),
+        ("search", addons_dir / "search.sh"),
+    ]
+
+
+def test_running_a_builtin_warns_about_its_name_only(home, addons_dir):
+    make_library(addons_dir, "stats")
+    write_script(addons_dir / "chain.sh")
+
+    result = subprocess.run(
+        [sys.executable, "-m", "corun", "stats"],
+        cwd=home,
+        env=dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR)),
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "No runs recorded" in result.stdout
+    assert "'stats' is a built-in command" in result.stderr
+    assert "chain" not in result.stderr
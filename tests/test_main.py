@@ -0,0 +1,146 @@
+"""corun entry point: global flags, lazy registration, exec handoff and tracing."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun import trace
+from corun.builtin_commands import BUILTIN_COMMANDS
+from corun.main import pop_global_flag
+
+from .conftest import SRC_DIR, make_library, write_script
+
+# Runs the CLI in process, then prints the names it registered
+REGISTERED_CODE = """
+import json, sys
+from corun import main
+sys.argv[0] = "corun"
+try:
+    main.cli()
+except SystemExit:
+    pass
+groups = [group.name for group in main.app.registered_groups]
+commands = [command.name for command in main.app.registered_commands]
+print(json.dumps(groups + commands))
+"""
+
+
+@pytest.fixture
+def tree(home, addons_dir):
+    """Two libraries and two scripts; `args` echoes its arguments."""
+    make_library(addons_dir, "net", ("ping",))
+    make_library(addons_dir, "db", ("backup",))
+    write_script(addons_dir / "args.sh", 'echo "$@"\n')
+    write_script(addons_dir / "pid.sh", "echo $$\n")
+    return home
+
+
+def corun(home, *args, env=None, code=None):
+    """Run corun in a subprocess; returns (process pid, result)."""
+    argv = ["-c", code, *args] if code else ["-m", "corun", *args]
+    process = subprocess.Popen(
+        [sys.executable, *argv],
+        cwd=home,
+        env=dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR), **(env or {})),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    stdout, stderr = process.communicate()
+    result = subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+    return process.pid, result
+
+
+@pytest.mark.parametrize(
+    "argv, registered",
+    [
+        (["net", "ping"], ["net"]),
+        (["args"], ["args"]),
+        (["nothing"], []),
+    ],
+)
+def test_only_the_invoked_name_is_registered(tree, argv, registered):
+    _, result = corun(tree, *argv, code=REGISTERED_CODE)
+
+    names = json.loads(result.stdout.splitlines()[-1])
+    assert [name for name in names if name not in BUILTIN_COMMANDS] == registered
+
+
+@pytest.mark.parametrize("handoff", ["0", "1"])
+def test_exec_handoff(tree, handoff):
+    pid, result = corun(tree, "pid", env={"CORUN_EXEC": handoff})
+
+    assert result.returncode == 0, result.stderr
+    # With exec the script replaces corun, keeping its pid
+    assert (int(result.stdout) == pid) == (handoff == "1")
+
+
+@pytest.mark.parametrize(
+    "argv, output, rest",
+    [
+        (["corun", "--profile", "net"], trace.OUTPUT_TABLE, ["corun", "net"]),
+        (
+            ["corun", "--no-cache", "--profile=t.json", "net"],
+            "t.json",
+            ["corun", "--no-cache", "net"],
+        ),
+        (["corun", "--profile=", "net"], trace.OUTPUT_TABLE, ["corun", "net"]),
+        (["corun", "net", "--profile"], None, ["corun", "net", "--profile"]),
+    ],
+)
+def test_profile_flag_before_the_command(home, monkeypatch, argv, output, rest):
+    enabled = []
+    monkeypatch.setattr(trace, "enable", enabled.append)
+
+    trace.configure(argv)
+
+    assert enabled == ([output] if output else [])
+    assert argv == rest
+
+
+@pytest.mark.parametrize("handoff", ["0", "1"])
+def test_trace_file(tree, tmp_path, handoff):
+    trace_file = tmp_path / "trace.json"
+
+    _, result = corun(
+        tree, "net", "ping", env={"CORUN_TRACE": str(trace_file), "CORUN_EXEC": handoff}
+    )
+
+    assert result.returncode == 0, result.stderr
+    document = json.loads(trace_file.read_text())
+    events = document["traceEvents"]
+    assert all(
+        event["ph"] == "X" and event["dur"] >= 0 and event["ts"] >= 0 for event in events
+    )
+    names = {event["name"] for event in events}
+    assert {"import", "scan", "register", "resolve", "check"} <= names
+    assert ({"spawn", "runtime"} <= names) == (handoff == "0")
+
+
+@pytest.mark.parametrize(
+    "argv, found, rest",
+    [
+        (["corun", "--no-cache", "net", "ping"], True, ["corun", "net", "ping"]),
+        (["corun", "--profile", "--no-cache", "net"], True, ["corun", "--profile", "net"]),
+        (["corun", "net", "--no-cache"], False, ["corun", "net", "--no-cache"]),
+        (["corun", "--no-cache"], True, ["corun"]),
+        (["corun"], False, ["corun"]),
+    ],
+)
+def test_pop_global_flag(argv, found, rest):
+    assert pop_global_flag(argv, "--no-cache") == found
+    assert argv == rest
+
+
+def test_global_flags_in_any_order(tree):
+    _, result = corun(
+        tree, "--no-cache", "--profile", "args", "--", "--no-cache", "--profile"
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "--no-cache --profile\n"
+    assert "runtime" in result.stderr
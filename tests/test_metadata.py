@@ -0,0 +1,69 @@
+"""metadata.json: the scan fast path agrees with the pydantic schema."""
+
+import json
+from dataclasses import asdict
+
+import pytest
+
+from corun.models import MetadataRecord
+from corun.scanner import load_metadata, validate_metadata
+
+BASE = {"name": "Net", "version": "1.0.0", "description": "Tools", "library_id": "net"}
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {},
+        {"author": "me", "shells": ["bash"], "commands": ["ping"], "cache_env": ["LANG"]},
+        {"author": None},
+        {"cache": {"ping": 30}},
+        {"cache": {"ping": 1.5}},
+        {"cache": {"ping": "30"}},
+        {"cache": {"ping": " 1e3 "}},
+        {"cache": {"ping": True}},
+        {"cache": {"ping": "soon"}},
+        {"cache": {"ping": None}},
+        {"cache": []},
+        {"unknown": {"ignored": True}},
+        {"name": 1},
+        {"version": 1.0},
+        {"library_id": None},
+        {"author": 3},
+        {"shells": "bash"},
+        {"commands": ["ping", 2]},
+        {"cache_env": None},
+    ],
+)
+def test_fast_path_matches_schema(tmp_path, changes):
+    (tmp_path / "metadata.json").write_text(json.dumps({**BASE, **changes}))
+
+    record = load_metadata(tmp_path)
+    metadata, errors = validate_metadata(tmp_path)
+
+    assert (record is None) == (metadata is None), errors
+    if metadata is not None:
+        expected = {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in metadata.model_dump().items()
+        }
+        assert asdict(record) == expected
+
+
+@pytest.mark.parametrize("data", [None, [], "text", {"name": "only"}])
+def test_non_metadata_is_rejected(data):
+    assert MetadataRecord.from_dict(data) is None
+
+
+def test_missing_required_field(tmp_path):
+    (tmp_path / "metadata.json").write_text(json.dumps({"name": "Net"}))
+
+    assert load_metadata(tmp_path) is None
+    assert validate_metadata(tmp_path)[0] is None
+
+
+def test_record_is_hashable():
+    record = MetadataRecord.from_dict({**BASE, "cache": {"ping": 30}})
+
+    assert {record: 1}[record] == 1
+    assert record.cache == {"ping": 30.0}
@@ -0,0 +1,78 @@
+"""corun parallel: argument sets and job results."""
+
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from corun.parallel import print_summary, read_arg_sets, run_parallel
+
+from .conftest import SRC_DIR, write_script
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("a b\nc\n", [["a", "b"], ["c"]]),
+        ("'two words' \"and more\"\n", [["two words", "and more"]]),
+        ("x\\ y 'it''s'\n", [["x y", "its"]]),
+        ("\n   \n# comment\n  # indented comment\nlast", [["last"]]),
+        ("a # trailing\n", [["a", "#", "trailing"]]),
+        ("''\n", [[""]]),
+        ("", []),
+    ],
+)
+def test_read_arg_sets(text, expected):
+    assert read_arg_sets(io.StringIO(text)) == expected
+
+
+@pytest.mark.parametrize(
+    "text, line",
+    [("'open\n", 1), ("ok\n\n# skip\n\"open\n", 4), ("fine\nbad\\\n", 2)],
+)
+def test_read_arg_sets_reports_bad_line(text, line):
+    with pytest.raises(ValueError, match=f"^line {line}: "):
+        read_arg_sets(io.StringIO(text))
+
+
+def test_run_parallel_keeps_argument_order(tmp_path, capfd):
+    script = write_script(tmp_path / "job.sh", 'echo "job $1"\nexit "$2"\n')
+    arg_sets = [["a", "0"], ["b", "3"], ["c", "0"]]
+
+    results = run_parallel([str(script)], arg_sets, jobs=2)
+
+    assert [(r.label, r.exit_code) for r in results] == [
+        ("a 0", 0),
+        ("b 3", 3),
+        ("c 0", 0),
+    ]
+    out = capfd.readouterr().out
+    assert all(f"job {name}" in out for name in "abc")
+    assert print_summary(results) == 1
+
+
+def test_cli_parallel(home, addons_dir, tmp_path):
+    write_script(addons_dir / "greet.sh", 'echo "hello $1 $2"\n')
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(SRC_DIR))
+
+    def parallel(stdin: str):
+        return subprocess.run(
+            [sys.executable, "-m", "corun", "parallel", "greet", "-o", "buffer"],
+            cwd=tmp_path,
+            env=env,
+            input=stdin,
+            capture_output=True,
+            text=True,
+        )
+
+    result = parallel("'big world' 1\nsmall 2\n")
+    assert result.returncode == 0, result.stderr
+    assert "hello big world 1" in result.stdout
+    assert "hello small 2" in result.stdout
+
+    result = parallel("fine\n'unbalanced\n")
+    assert result.returncode == 1
+    assert "line 2: No closing quotation" in result.stdout
+    assert "Traceback" not in result.stderr
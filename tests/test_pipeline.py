@@ -0,0 +1,198 @@
+"""Pipelines: graph validation, start order and failure policies."""
+
+import json
+
+import pytest
+
+from corun.pipeline.runner import (
+    STATUS_FAILED,
+    STATUS_OK,
+    STATUS_SKIPPED,
+    run_pipeline,
+)
+from corun.pipeline.spec import (
+    POLICY_CONTINUE,
+    PipelineError,
+    load_pipeline,
+    parse_pipeline,
+    topological_chains,
+)
+
+
+def chain_names(pipeline) -> list[list[str]]:
+    """Names of the chains in a valid start order."""
+    return [[step.name for step in chain] for chain in topological_chains(pipeline)]
+
+
+def steps(**specs) -> dict:
+    """Pipeline data with a dummy run for every step."""
+    return {"steps": {name: {"run": "cmd", **spec} for name, spec in specs.items()}}
+
+
+def test_chains_start_after_their_needs():
+    pipeline = parse_pipeline(
+        steps(
+            report={"needs": ["backup", "check"]},
+            backup={"needs": ["check"]},
+            check={},
+        ),
+        "nightly",
+    )
+
+    assert chain_names(pipeline) == [["check"], ["backup"], ["report"]]
+
+
+def test_independent_steps_keep_file_order():
+    pipeline = parse_pipeline(steps(b={}, a={}, c={"needs": ["a", "b"]}), "p")
+
+    assert chain_names(pipeline) == [["b"], ["a"], ["c"]]
+
+
+def test_piped_steps_form_one_chain():
+    pipeline = parse_pipeline(
+        steps(
+            check={},
+            dump={"needs": ["check"]},
+            compress={"stdin": "dump"},
+            upload={"stdin": "compress"},
+        ),
+        "p",
+    )
+
+    assert chain_names(pipeline) == [["check"], ["dump", "compress", "upload"]]
+
+
+@pytest.mark.parametrize(
+    "specs, message",
+    [
+        ({"a": {"needs": ["a"]}}, "Dependency cycle"),
+        ({"a": {"needs": ["b"]}, "b": {"needs": ["a"]}}, "Dependency cycle"),
+        (
+            {"a": {"needs": ["c"]}, "b": {"stdin": "a"}, "c": {"needs": ["b"]}},
+            "Dependency cycle",
+        ),
+        ({"a": {"stdin": "b"}, "b": {"stdin": "a"}}, "Pipe cycle"),
+        ({"a": {"needs": ["missing"]}}, "unknown step 'missing'"),
+        ({"a": {"stdin": "missing"}}, "unknown step 'missing'"),
+        ({"a": {}, "b": {"stdin": "a"}, "c": {"stdin": "a"}}, "both read stdin"),
+        ({"a": {}, "b": {}, "c": {"stdin": "a", "needs": ["b"]}}, "own needs"),
+    ],
+)
+def test_invalid_graphs(specs, message):
+    with pytest.raises(PipelineError, match=message):
+        parse_pipeline(steps(**specs), "p")
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ([], "object/table"),
+        ({"steps": {}}, "non-empty"),
+        ({"policy": "sometimes", **steps(a={})}, "policy"),
+        ({"jobs": 0, **steps(a={})}, "jobs"),
+        ({"jobs": True, **steps(a={})}, "jobs"),
+        ({"steps": {"a": {"run": ""}}}, "run is empty"),
+        ({"steps": {"a": {"run": "echo 'open"}}}, "invalid run"),
+        ({"steps": {"a": {"run": 3}}}, "string or list"),
+    ],
+)
+def test_invalid_pipeline_files(data, message):
+    with pytest.raises(PipelineError, match=message):
+        parse_pipeline(data, "p")
+
+
+def test_load_pipeline_json(tmp_path):
+    path = tmp_path / "nightly.pipeline.json"
+    path.write_text(json.dumps({"policy": "continue", **steps(a={"run": ["x", "y z"]})}))
+
+    pipeline = load_pipeline(path)
+
+    assert pipeline.name == "nightly"
+    assert pipeline.policy == POLICY_CONTINUE
+    assert pipeline.steps["a"].run == ["x", "y z"]
+
+
+def test_load_pipeline_reports_bad_json(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{")
+
+    with pytest.raises(PipelineError, match="Invalid JSON"):
+        load_pipeline(path)
+
+
+def shell_steps(log, **scripts) -> dict[str, list[str]]:
+    """Commands that log their step name, then run a shell snippet."""
+    return {
+        name: ["sh", "-c", f'echo {name} >> "{log}"; {script}']
+        for name, script in scripts.items()
+    }
+
+
+def test_run_follows_dependency_order(tmp_path):
+    log = tmp_path / "log"
+    pipeline = parse_pipeline(
+        steps(
+            last={"needs": ["left", "right"]},
+            left={"needs": ["first"]},
+            right={"needs": ["first"]},
+            first={},
+        ),
+        "p",
+    )
+    commands = shell_steps(log, last="", left="", right="", first="")
+
+    results = run_pipeline(pipeline, commands, jobs=2)
+
+    assert [r.status for r in results] == [STATUS_OK] * 4
+    order = log.read_text().split()
+    assert order[0] == "first"
+    assert set(order[1:3]) == {"left", "right"}
+    assert order[3] == "last"
+
+
+def test_run_pipes_stdout_into_next_step(tmp_path, capfd):
+    pipeline = parse_pipeline(steps(produce={}, consume={"stdin": "produce"}), "p")
+    commands = {
+        "produce": ["printf", "a\\nb\\nc\\n"],
+        "consume": ["wc", "-l"],
+    }
+
+    results = run_pipeline(pipeline, commands)
+
+    assert [r.status for r in results] == [STATUS_OK, STATUS_OK]
+    assert capfd.readouterr().out.split()[-1] == "3"
+
+
+def test_fail_fast_skips_dependants(tmp_path):
+    log = tmp_path / "log"
+    pipeline = parse_pipeline(
+        steps(broken={}, after={"needs": ["broken"]}),
+        "p",
+    )
+
+    results = run_pipeline(pipeline, shell_steps(log, broken="exit 4", after=""))
+
+    assert [(r.name, r.status, r.exit_code) for r in results] == [
+        ("broken", STATUS_FAILED, 4),
+        ("after", STATUS_SKIPPED, None),
+    ]
+    assert log.read_text().split() == ["broken"]
+
+
+def test_continue_runs_independent_steps(tmp_path):
+    log = tmp_path / "log"
+    pipeline = parse_pipeline(
+        steps(broken={}, after={"needs": ["broken"]}, other={"needs": ["fine"]}, fine={}),
+        "p",
+    )
+    commands = shell_steps(log, broken="exit 1", after="", other="", fine="")
+
+    results = run_pipeline(pipeline, commands, jobs=1, policy=POLICY_CONTINUE)
+
+    statuses = {r.name: r.status for r in results}
+    assert statuses == {
+        "broken": STATUS_FAILED,
+        "after": STATUS_SKIPPED,
+        "other": STATUS_OK,
+        "fine": STATUS_OK,
+    }
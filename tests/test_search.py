@@ -0,0 +1,107 @@
+"""corun search: matching, ranking and incremental updates."""
+
+import pytest
+
+from corun import registry, search
+
+from .conftest import make_library, write_script
+
+
+def find(query: str) -> list[str]:
+    """Search with a fresh registry and return the labels of exact matches."""
+    registry._registry = None
+    results, fuzzy = search.search(query)
+    return [] if fuzzy else [result.label for result in results]
+
+
+@pytest.fixture
+def tree(addons_dir):
+    """Libraries with descriptions and header comments."""
+    net = make_library(addons_dir, "net", ("ping",))
+    write_script(net / "dns.sh", "# Resolve a hostname with dig\ndig \"$1\"\n")
+    make_library(addons_dir, "db", ("backup", "restore"))
+    write_script(addons_dir / "cleanup.sh", "# Remove old log files\nexit 0\n")
+    return addons_dir
+
+
+def test_matches_name_description_and_header(tree):
+    assert find("ping") == ["net ping"]
+    assert sorted(find("db library")) == ["db backup", "db restore"]
+    assert find("hostname") == ["net dns"]
+    assert find("old log") == ["cleanup"]
+
+
+def test_every_word_must_match(tree):
+    assert find("net hostname") == ["net dns"]
+    assert find("net backup") == []
+
+
+def test_exact_name_ranks_first(tree):
+    write_script(tree / "flush.sh", "# Flush the ping ping ping cache\n")
+
+    assert find("ping") == ["net ping", "flush"]
+
+
+def test_short_words_filter_results(tree):
+    assert sorted(find("db")) == ["db backup", "db restore"]
+    assert find("db rest") == ["db restore"]
+
+
+def test_typo_gives_fuzzy_results(tree):
+    registry._registry = None
+    results, fuzzy = search.search("hostnmae")
+
+    assert fuzzy
+    assert results[0].label == "net dns"
+
+
+def test_index_follows_addons_changes(tree):
+    assert find("deploy") == []
+
+    write_script(tree / "db" / "deploy.sh", "# Roll out a release\n")
+    assert find("deploy") == ["db deploy"]
+    assert find("release") == ["db deploy"]
+
+    (tree / "cleanup.sh").unlink()
+    assert find("cleanup") == []
+
+
+def test_unchanged_tree_is_not_reindexed(tree):
+    find("ping")
+    conn, _ = search.connect(search.get_search_file())
+    try:
+        registry._registry = None
+        assert search.sync_index(conn, search.collect_sources()) == 0
+    finally:
+        conn.close()
+
+
+def test_builtin_names_are_not_indexed(addons_dir):
+    write_script(addons_dir / "stats.sh", "# Shadowed by corun stats\n")
+
+    assert find("shadowed") == []
+
+
+def test_like_fallback_without_fts(tree):
+    find("ping")
+    conn, _ = search.connect(search.get_search_file())
+    try:
+        rows, fuzzy = search.query_index(conn, ["hostname"], False, 20)
+    finally:
+        conn.close()
+
+    assert [(row[0], row[1]) for row in rows] == [("net", "dns")]
+    assert not fuzzy
+
+
+@pytest.mark.parametrize(
+    "content, header",
+    [
+        (b"#!/bin/sh\n# First line\n#  Second\n\necho\n# not header\n", "First line\nSecond"),
+        (b"#!/bin/sh\n\n# After blank\necho\n", "After blank"),
+        (b"#!/bin/sh\necho no header\n", ""),
+        (b"# No shebang\n", "No shebang"),
+    ],
+)
+def test_read_header(content, header):
+    assert search.read_header(content) == header
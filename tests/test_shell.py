@@ -0,0 +1,112 @@
+"""corun shell: line dispatch, delegated commands and reloads."""
+
+import os
+import sys
+
+import pytest
+
+from corun import registry
+from corun.shell import CorunShell
+
+from .conftest import SRC_DIR, make_library, write_script
+
+
+@pytest.fixture(autouse=True)
+def stdin(monkeypatch):
+    """Scripts inherit stdin, which must be a real file."""
+    with open(os.devnull) as devnull:
+        monkeypatch.setattr(sys, "stdin", devnull)
+        yield
+
+
+@pytest.fixture
+def shell(home, addons_dir, monkeypatch):
+    """A shell over a small tree; delegated commands use this checkout."""
+    monkeypatch.setenv("PYTHONPATH", str(SRC_DIR))
+    make_library(addons_dir, "net", ("ping",))
+    write_script(addons_dir / "hello.sh", 'echo "hello $*"\n')
+    registry.get_registry()
+    return CorunShell()
+
+
+def test_runs_library_commands_and_scripts(shell, capfd):
+    shell.onecmd("net ping")
+    shell.onecmd("hello 'big world' --flag")
+
+    assert capfd.readouterr().out.splitlines() == ["net ping", "hello big world --flag"]
+
+
+def test_library_without_command_lists_commands(shell, capsys):
+    shell.onecmd("net")
+
+    assert "• ping" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [("net missing", "Command 'missing' not found in 'net'"), ("nope", "'nope' not found")],
+)
+def test_unknown_names(shell, capsys, line, message):
+    shell.onecmd(line)
+
+    assert message in capsys.readouterr().out
+
+
+def test_bad_quoting_is_reported(shell, capsys):
+    assert not shell.onecmd("hello 'open")
+
+    assert "No closing quotation" in capsys.readouterr().out
+
+
+def test_builtins_are_delegated(shell, capfd):
+    shell.onecmd("search ping")
+
+    assert "net ping" in capfd.readouterr().out
+
+
+def test_delegated_library_install_reloads(shell, tmp_path, capfd):
+    source = make_library(tmp_path / "src", "db", ("backup",))
+
+    shell.onecmd(f"library install {source}")
+    shell.onecmd("db backup")
+
+    assert capfd.readouterr().out.splitlines()[-1] == "db backup"
+
+
+def test_reload_picks_up_new_scripts(shell, addons_dir, capfd):
+    write_script(addons_dir / "later.sh", "echo later\n")
+    shell.onecmd("later")
+    assert "'later' not found" in capfd.readouterr().out
+
+    shell.onecmd("reload")
+    shell.onecmd("later")
+
+    assert capfd.readouterr().out.splitlines()[-1] == "later"
+
+
+def test_shell_commands_hide_libraries_and_scripts(shell, addons_dir, capfd):
+    make_library(addons_dir, "list", ("all",))
+    write_script(addons_dir / "reload.sh", "echo script\n")
+    write_script(addons_dir / "stats.sh", "echo script\n")
+
+    shell.onecmd("reload")
+
+    err = capfd.readouterr().err
+    assert "'list' is a shell command" in err
+    assert "'reload' is a shell command" in err
+    assert "'stats' is a built-in command" in err
+
+
+def test_exit_commands(shell):
+    assert shell.onecmd("exit")
+    assert shell.onecmd("quit")
+    assert shell.onecmd("EOF")
+    assert not shell.onecmd("")
+
+
+def test_completion(shell):
+    names = shell.completenames("")
+
+    assert {"net", "hello", "list", "library", "stats"} <= set(names)
+    assert "run" not in names
+    assert shell.completedefault("p", "net p", 4, 5) == ["ping"]
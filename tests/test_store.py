@@ -0,0 +1,112 @@
+"""Content-addressed script store: dedup, verification and gc."""
+
+import os
+import time
+
+import pytest
+
+from corun import store
+from corun.install import install_tree
+
+from .conftest import make_library, write_script
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A script to store."""
+    return write_script(tmp_path / "src" / "run.sh", "echo run\n")
+
+
+def test_identical_content_shares_one_object(home, source, tmp_path):
+    first = tmp_path / "a.sh"
+    second = tmp_path / "b.sh"
+
+    assert store.link_object(source, first) is False
+    assert store.link_object(source, second) is True
+
+    path = store.object_path(store.hash_file(source))
+    assert first.stat().st_ino == second.stat().st_ino == path.stat().st_ino
+    assert path.stat().st_nlink == 3
+    assert (path.stat().st_mode & 0o777) == store.OBJECT_MODE
+
+
+def test_object_is_named_by_content_hash(home, source):
+    path, existed = store.add_object(source)
+
+    digest = store.hash_file(source)
+    assert not existed
+    assert path == store.get_objects_dir() / digest[:2] / digest[2:]
+    assert path.read_bytes() == source.read_bytes()
+
+
+def test_modified_object_is_replaced(home, source, tmp_path):
+    edited = tmp_path / "a.sh"
+    store.link_object(source, edited)
+    edited.chmod(0o755)
+    edited.write_text("#!/bin/sh\necho changed\n")
+
+    fresh = tmp_path / "b.sh"
+    assert store.link_object(source, fresh) is False
+
+    assert fresh.read_bytes() == source.read_bytes()
+    assert fresh.stat().st_ino != edited.stat().st_ino
+    # The library that edited its copy keeps it
+    assert edited.read_text() == "#!/bin/sh\necho changed\n"
+
+
+def test_install_deduplicates_across_libraries(home, addons_dir, tmp_path):
+    for library_id in ("one", "two"):
+        library_dir = make_library(tmp_path / "src", library_id)
+        write_script(library_dir / "shared.sh", "echo shared\n")
+
+    first = install_tree(tmp_path / "src" / "one", addons_dir / "one")
+    second = install_tree(tmp_path / "src" / "two", addons_dir / "two")
+
+    assert (first.stored, first.deduplicated) == (2, 0)
+    assert (second.stored, second.deduplicated) == (2, 1)
+    assert (addons_dir / "one" / "shared.sh").stat().st_ino == (
+        addons_dir / "two" / "shared.sh"
+    ).stat().st_ino
+
+
+def test_gc_removes_only_unreferenced_objects(home, tmp_path):
+    kept_source = write_script(tmp_path / "kept.sh", "echo kept\n")
+    dropped_source = write_script(tmp_path / "dropped.sh", "echo dropped\n")
+    store.link_object(kept_source, tmp_path / "lib-kept.sh")
+    store.link_object(dropped_source, tmp_path / "lib-dropped.sh")
+    (tmp_path / "lib-dropped.sh").unlink()
+
+    removed, freed = store.gc()
+
+    assert removed == 1
+    assert freed == dropped_source.stat().st_size
+    assert store.object_path(store.hash_file(kept_source)).exists()
+    assert not store.object_path(store.hash_file(dropped_source)).exists()
+
+
+def test_gc_removes_empty_fanout_directories(home, source, tmp_path):
+    path, _ = store.add_object(source)
+
+    assert store.gc() == (1, source.stat().st_size)
+    assert not path.parent.exists()
+
+
+def test_gc_keeps_recent_temp_files(home, source):
+    path, _ = store.add_object(source)
+    recent = path.parent / f"{store.TEMP_PREFIX}recent"
+    abandoned = path.parent / f"{store.TEMP_PREFIX}abandoned"
+    recent.write_text("partial")
+    abandoned.write_text("partial")
+    old = time.time() - store.TEMP_MAX_AGE - 60
+    os.utime(abandoned, (old, old))
+    os.link(path, path.parent.parent / "keep")
+
+    removed, _ = store.gc()
+
+    assert removed == 1
+    assert recent.exists()
+    assert not abandoned.exists()
+
+
+def test_gc_without_store(home):
+    assert store.gc() == (0, 0)
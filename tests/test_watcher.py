@@ -0,0 +1,108 @@
+"""Addons watcher: every layer is followed, failures fall back to a rescan."""
+
+import threading
+
+import pytest
+
+from corun import registry, watcher
+
+from .conftest import make_library, write_script
+
+# Longest wait for the watcher to apply a change (seconds)
+TIMEOUT = 5.0
+
+
+class FastPollingSource(watcher.PollingSource):
+    """Polling source with a short interval."""
+
+    def __init__(self, addons_dir):
+        super().__init__(addons_dir, interval=0.05)
+
+
+@pytest.fixture(params=[False, True], ids=["inotify", "polling"])
+def polling(request, monkeypatch):
+    """Run each test with both change sources."""
+    monkeypatch.setattr(watcher, "PollingSource", FastPollingSource)
+    monkeypatch.setattr(watcher, "STOP_CHECK", 0.05)
+    return request.param
+
+
+@pytest.fixture
+def project_dir(home, tmp_path, monkeypatch):
+    """A project layer above the working directory."""
+    project_dir = tmp_path / "project" / ".corun" / "addons"
+    project_dir.mkdir(parents=True)
+    monkeypatch.chdir(project_dir.parent.parent)
+    return project_dir
+
+
+class Updates:
+    """Collect on_change calls and wait for the next one."""
+
+    def __init__(self):
+        self.changes = []
+        self.event = threading.Event()
+
+    def __call__(self, current, changes):
+        self.changes.append(changes)
+        self.event.set()
+
+    def wait(self):
+        assert self.event.wait(TIMEOUT), "watcher did not apply the change"
+        self.event.clear()
+        return self.changes[-1]
+
+
+@pytest.fixture
+def updates(project_dir, polling):
+    """A running watcher and the updates it reports."""
+    registry.get_registry()
+    updates = Updates()
+    running = watcher.start_watcher(updates, debounce=0.05, polling=polling)
+    yield updates
+    running.stop()
+
+
+def test_watches_every_layer(project_dir, addons_dir, polling):
+    registry.get_registry()
+    running = watcher.Watcher(polling=polling)
+    try:
+        assert running.paths[:2] == [project_dir, addons_dir]
+        assert len(running.paths) == len(registry.get_registry().layers)
+    finally:
+        running.close()
+
+
+def test_project_layer_change_is_applied(project_dir, updates):
+    write_script(project_dir / "deploy.sh")
+
+    changes = updates.wait()
+
+    assert changes.addons_dir == project_dir
+    assert registry.get_registry().standalone[0].script_path == project_dir / "deploy.sh"
+
+
+def test_user_layer_library_change_is_applied(addons_dir, updates):
+    make_library(addons_dir, "net", ("ping",))
+    updates.wait()
+    write_script(addons_dir / "net" / "dns.sh")
+
+    while "net" not in updates.wait().dirs:
+        pass
+
+    commands = registry.get_registry().get_library("net").commands
+    assert sorted(command.name for command in commands) == ["dns", "ping"]
+
+
+def test_failed_update_falls_back_to_rescan(project_dir, updates, monkeypatch, capfd):
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(registry, "update_registry", broken)
+    write_script(project_dir / "deploy.sh")
+
+    changes = updates.wait()
+
+    assert changes.overflow
+    assert [c.name for c in registry.get_registry().standalone] == ["deploy"]
+    assert "boom" in capfd.readouterr().err